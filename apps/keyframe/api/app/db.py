@@ -17,6 +17,7 @@ from sqlalchemy import (
     UniqueConstraint,
     create_engine,
     event,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, sessionmaker
 
@@ -26,6 +27,10 @@ DATA_DIR = APP_ROOT / "data"
 THUMBNAIL_DIR = DATA_DIR / "thumbnails"
 SCENE_DIR = DATA_DIR / "scenes"
 IMAGE_DIR = DATA_DIR / "images"
+FRAME_CACHE_DIR = DATA_DIR / "frames"
+TRICKPLAY_DIR = DATA_DIR / "trickplay"
+PLAYBACK_DIR = DATA_DIR / "prepared"
+PROBE_CACHE_DIR = DATA_DIR / "probe_cache"
 DATABASE_PATH = DATA_DIR / "keyframe.sqlite3"
 DATABASE_URL = f"sqlite:///{DATABASE_PATH.as_posix()}"
 
@@ -39,6 +44,18 @@ class Base(DeclarativeBase):
     pass
 
 
+# Sort keys of the movie list and their ``movie_files`` columns. Each gets a
+# ``(columns..., id)`` index and a ``(metadata_status, columns..., id)`` index so
+# every sort, with or without a status filter, pages in index order.
+MOVIE_SORT_KEYS = {
+    "title": ("title",),
+    "duration": ("duration_ms",),
+    "resolution": ("height", "width"),
+    "size": ("size_bytes",),
+    "codec": ("video_codec",),
+}
+
+
 class MovieFile(Base):
     __tablename__ = "movie_files"
     __table_args__ = (
@@ -52,6 +69,14 @@ class MovieFile(Base):
             name="ck_movie_files_playback_status",
         ),
         Index("ix_movie_files_playback_status", "playback_status"),
+        *(
+            Index(f"ix_movie_files_sort_{sort}", *columns, "id")
+            for sort, columns in MOVIE_SORT_KEYS.items()
+        ),
+        *(
+            Index(f"ix_movie_files_status_sort_{sort}", "metadata_status", *columns, "id")
+            for sort, columns in MOVIE_SORT_KEYS.items()
+        ),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -140,6 +165,283 @@ class Image(Base):
     embedding: Mapped[bytes | None] = mapped_column(LargeBinary)
 
 
+class MovieKeyframes(Base):
+    __tablename__ = "movie_keyframes"
+
+    movie_file_id: Mapped[int] = mapped_column(
+        ForeignKey("movie_files.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # Sorted keyframe timestamps in milliseconds, packed as little-endian uint32.
+    timestamps: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    keyframe_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+
+
+class MovieFingerprint(Base):
+    """Sampled content hash of a movie file; equal values mark copies of one file."""
+
+    __tablename__ = "movie_fingerprints"
+    __table_args__ = (Index("ix_movie_fingerprints_fingerprint", "fingerprint"),)
+
+    movie_file_id: Mapped[int] = mapped_column(
+        ForeignKey("movie_files.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    fingerprint: Mapped[str] = mapped_column(String(32), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+
+
+class MovieTrickplay(Base):
+    """Layout of the ``TRICKPLAY_DIR/<movie>-<version>.webp`` sprite sheet and its WebVTT index."""
+
+    __tablename__ = "movie_trickplay"
+
+    movie_file_id: Mapped[int] = mapped_column(
+        ForeignKey("movie_files.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    interval_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    columns: Mapped[int] = mapped_column(Integer, nullable=False)
+    tile_width: Mapped[int] = mapped_column(Integer, nullable=False)
+    tile_height: Mapped[int] = mapped_column(Integer, nullable=False)
+    tile_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Epoch milliseconds of generation; part of the file names and URLs so they can be cached forever.
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+
+
+class PlaybackPreparation(Base):
+    """Progress of remuxing or transcoding a movie into ``PLAYBACK_DIR/<movie>.mp4``."""
+
+    __tablename__ = "playback_preparations"
+    __table_args__ = (
+        CheckConstraint("mode IN ('remux', 'audio', 'transcode')", name="ck_playback_preparations_mode"),
+    )
+
+    movie_file_id: Mapped[int] = mapped_column(
+        ForeignKey("movie_files.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    mode: Mapped[str] = mapped_column(String(16), nullable=False)
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=utc_now,
+        onupdate=utc_now,
+    )
+
+
+class LibraryFolder(Base):
+    """An imported root folder that is rescanned to keep its movies in sync."""
+
+    __tablename__ = "library_folders"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    path: Mapped[str] = mapped_column(Text, nullable=False)
+    normalized_path: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
+    last_synced_at: Mapped[datetime | None] = mapped_column(DateTime)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+
+
+class LibraryCounter(Base):
+    """Row counts kept current by the triggers in :data:`COUNTER_TRIGGERS`.
+
+    Names are ``movies``, ``scenes``, ``images`` and ``movies:<metadata_status>``.
+    """
+
+    __tablename__ = "library_counters"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class MovieSceneCount(Base):
+    """Number of scenes per movie, kept current by :data:`COUNTER_TRIGGERS`."""
+
+    __tablename__ = "movie_scene_counts"
+
+    movie_file_id: Mapped[int] = mapped_column(
+        ForeignKey("movie_files.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    scene_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ImageGenerationJob(Base):
+    __tablename__ = "image_generation_jobs"
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('pending', 'processing', 'ready', 'failed')",
+            name="ck_image_generation_jobs_status",
+        ),
+        Index("ix_image_generation_jobs_status", "status"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    movie_file_id: Mapped[int] = mapped_column(
+        ForeignKey("movie_files.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    timestamp_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    settings: Mapped[dict] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    stage: Mapped[str | None] = mapped_column(String(16))
+    total_images: Mapped[int] = mapped_column(Integer, nullable=False)
+    completed_images: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    image_ids: Mapped[list[int]] = mapped_column(JSON, nullable=False, default=list)
+    prompt: Mapped[str | None] = mapped_column(Text)
+    error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=utc_now,
+        onupdate=utc_now,
+    )
+
+
+class SceneDetectionJob(Base):
+    __tablename__ = "scene_detection_jobs"
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('pending', 'processing', 'ready', 'failed')",
+            name="ck_scene_detection_jobs_status",
+        ),
+        Index("ix_scene_detection_jobs_movie", "movie_file_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    movie_file_id: Mapped[int] = mapped_column(
+        ForeignKey("movie_files.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    threshold: Mapped[float] = mapped_column(Float, nullable=False)
+    min_spacing_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    max_scenes: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    # Fraction of the movie scanned so far, 0 to 1.
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    boundary_count: Mapped[int | None] = mapped_column(Integer)
+    scene_ids: Mapped[list[int]] = mapped_column(JSON, nullable=False, default=list)
+    error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=utc_now,
+        onupdate=utc_now,
+    )
+
+
+class Job(Base):
+    """Outstanding media work; a row is deleted once its worker finishes."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        UniqueConstraint("job_type", "item_id", name="uq_jobs_type_item"),
+        Index("ix_jobs_type_rank", "job_type", "rank"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_type: Mapped[str] = mapped_column(String(16), nullable=False)
+    item_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Epoch seconds of the enqueue time plus priority * aging; lower runs first.
+    rank: Mapped[float] = mapped_column(Float, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    lease_owner: Mapped[str | None] = mapped_column(String(128))
+    lease_expires_at: Mapped[float | None] = mapped_column(Float)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+
+
+class FrameCacheEntry(Base):
+    """A WebP frame stored under ``FRAME_CACHE_DIR/<movie>/``."""
+
+    __tablename__ = "frame_cache"
+    __table_args__ = (
+        UniqueConstraint(
+            "movie_file_id",
+            "timestamp_ms",
+            "width",
+            "quality",
+            name="uq_frame_cache_key",
+        ),
+        Index("ix_frame_cache_last_used_at", "last_used_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    movie_file_id: Mapped[int] = mapped_column(
+        ForeignKey("movie_files.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    timestamp_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    width: Mapped[int] = mapped_column(Integer, nullable=False)
+    quality: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Size and mtime of the source file; a changed file invalidates the frame.
+    source_signature: Mapped[str] = mapped_column(String(64), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+
+
+class ProbeCacheEntry(Base):
+    """ffprobe metadata, keyframes and thumbnail of one version of a file.
+
+    Rows are not tied to ``movie_files``, so they outlive the movie and are
+    reused when the same unchanged file is imported again.
+    """
+
+    __tablename__ = "probe_cache"
+    __table_args__ = (
+        UniqueConstraint(
+            "normalized_path",
+            "size_bytes",
+            "modified_ns",
+            name="uq_probe_cache_key",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    normalized_path: Mapped[str] = mapped_column(Text, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    modified_ns: Mapped[int] = mapped_column(Integer, nullable=False)
+    metadata_json: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # Packed like ``movie_keyframes.timestamps``.
+    keyframes: Mapped[bytes | None] = mapped_column(LargeBinary)
+    # ``PROBE_CACHE_DIR/<digest>.webp`` relative to ``DATA_DIR``.
+    thumbnail_path: Mapped[str] = mapped_column(Text, nullable=False)
+    # Content fingerprint of this version, so a hit does not read the file again.
+    fingerprint: Mapped[str | None] = mapped_column(String(32))
+    hit_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+    last_hit_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+
+class SceneAnalysisCache(Base):
+    __tablename__ = "scene_analysis_cache"
+    __table_args__ = (
+        UniqueConstraint(
+            "snapshot_sha256",
+            "embedding_model",
+            "prompt_model",
+            name="uq_scene_analysis_cache_key",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    snapshot_sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    embedding_model: Mapped[str] = mapped_column(String(255), nullable=False)
+    prompt_model: Mapped[str] = mapped_column(String(255), nullable=False)
+    embedding: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    prompt: Mapped[str] = mapped_column(Text, nullable=False)
+    keywords: Mapped[list[str]] = mapped_column(JSON, nullable=False)
+    hit_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+    last_hit_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False, "timeout": 30},
@@ -155,6 +457,107 @@ def configure_sqlite(connection, _connection_record) -> None:
     cursor.close()
 
 
+METADATA_STATUSES = ("pending", "processing", "ready", "failed")
+
+
+def _add(name: str, delta: str) -> str:
+    return f"UPDATE library_counters SET value = value {delta} WHERE name = {name};"
+
+
+# Every write path, including foreign key cascades, goes through these, so the
+# list endpoints never have to COUNT(*) the large tables.
+COUNTER_TRIGGERS = {
+    "trg_movie_files_count_insert": f"""
+        AFTER INSERT ON movie_files BEGIN
+            {_add("'movies'", "+ 1")}
+            {_add("'movies:' || NEW.metadata_status", "+ 1")}
+            INSERT OR IGNORE INTO movie_scene_counts (movie_file_id, scene_count)
+            VALUES (NEW.id, 0);
+        END""",
+    "trg_movie_files_count_delete": f"""
+        AFTER DELETE ON movie_files BEGIN
+            {_add("'movies'", "- 1")}
+            {_add("'movies:' || OLD.metadata_status", "- 1")}
+        END""",
+    "trg_movie_files_count_status": f"""
+        AFTER UPDATE OF metadata_status ON movie_files
+        WHEN OLD.metadata_status IS NOT NEW.metadata_status BEGIN
+            {_add("'movies:' || OLD.metadata_status", "- 1")}
+            {_add("'movies:' || NEW.metadata_status", "+ 1")}
+        END""",
+    "trg_scenes_count_insert": f"""
+        AFTER INSERT ON scenes BEGIN
+            {_add("'scenes'", "+ 1")}
+            UPDATE movie_scene_counts SET scene_count = scene_count + 1
+            WHERE movie_file_id = NEW.movie_file_id;
+        END""",
+    "trg_scenes_count_delete": f"""
+        AFTER DELETE ON scenes BEGIN
+            {_add("'scenes'", "- 1")}
+            UPDATE movie_scene_counts SET scene_count = scene_count - 1
+            WHERE movie_file_id = OLD.movie_file_id;
+        END""",
+    "trg_images_count_insert": f"""
+        AFTER INSERT ON images BEGIN {_add("'images'", "+ 1")} END""",
+    "trg_images_count_delete": f"""
+        AFTER DELETE ON images BEGIN {_add("'images'", "- 1")} END""",
+}
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_missing_indexes(metadata, connection, **_kwargs) -> None:
+    """Add indexes declared after their table was created in an existing database."""
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def install_counter_triggers(_metadata, connection, **_kwargs) -> None:
+    """Create the counter triggers and seed the counters from the current rows.
+
+    Runs on every ``create_all``; the seed only happens together with the
+    trigger creation so an existing database is counted once.
+    """
+    installed = set(
+        connection.scalars(
+            text("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        ).all()
+    )
+    if installed.issuperset(COUNTER_TRIGGERS):
+        return
+    for name in COUNTER_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    connection.execute(text("DELETE FROM library_counters"))
+    connection.execute(text("DELETE FROM movie_scene_counts"))
+    connection.execute(
+        text(
+            "INSERT INTO library_counters (name, value) "
+            "SELECT 'movies', count(*) FROM movie_files "
+            "UNION ALL SELECT 'scenes', count(*) FROM scenes "
+            "UNION ALL SELECT 'images', count(*) FROM images"
+        )
+    )
+    for status in METADATA_STATUSES:
+        connection.execute(
+            text(
+                "INSERT INTO library_counters (name, value) "
+                "SELECT :name, count(*) FROM movie_files WHERE metadata_status = :status"
+            ),
+            {"name": f"movies:{status}", "status": status},
+        )
+    connection.execute(
+        text(
+            "INSERT INTO movie_scene_counts (movie_file_id, scene_count) "
+            "SELECT movie_files.id, count(scenes.id) FROM movie_files "
+            "LEFT JOIN scenes ON scenes.movie_file_id = movie_files.id "
+            "GROUP BY movie_files.id"
+        )
+    )
+    for name, body in COUNTER_TRIGGERS.items():
+        connection.execute(text(f"CREATE TRIGGER {name} {body}"))
+
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 
@@ -163,4 +566,8 @@ def init_db() -> None:
     THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
     SCENE_DIR.mkdir(parents=True, exist_ok=True)
     IMAGE_DIR.mkdir(parents=True, exist_ok=True)
+    FRAME_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    TRICKPLAY_DIR.mkdir(parents=True, exist_ok=True)
+    PLAYBACK_DIR.mkdir(parents=True, exist_ok=True)
+    PROBE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
     Base.metadata.create_all(bind=engine)
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, FastAPI, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from ..services.media_queue import attach_queue_status
+from ..services.movie_query import get_movie_changes
+from ..services.scene_query import get_scene_changes
+from ..services.status_events import latest_event_id, status_changes_after
+
+
+STATUS_EVENT_INTERVAL_SECONDS = 0.5
+KEEPALIVE_SECONDS = 15.0
+RECONNECT_MILLISECONDS = 3000
+router = APIRouter(prefix="/api")
+
+
+@router.get("/events")
+def status_events(
+    request: Request,
+    last_event_id: str | None = Header(default=None),
+) -> StreamingResponse:
+    """Push movie and scene status changes as server-sent events.
+
+    ``movies`` carries changed movies and ``processing_count``, ``scenes`` the
+    changed scenes. A new connection starts with ``ready`` and a resumed one
+    with ``resumed``, after which the missed changes follow; only ``ready``
+    and ``reset`` ask the client to reload, the latter because the changes
+    since its ``Last-Event-ID`` are no longer known.
+    """
+    return StreamingResponse(
+        _status_event_stream(request, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _status_event_stream(request: Request, last_event_id: str | None) -> AsyncIterator[str]:
+    cursor, event = latest_event_id(), "ready"
+    if last_event_id:
+        if status_changes_after(last_event_id) is None:
+            event = "reset"
+        else:
+            cursor, event = last_event_id, "resumed"
+    yield f"retry: {RECONNECT_MILLISECONDS}\n" + _message(event, {}, cursor)
+    sent_at = time.monotonic()
+    while not await request.is_disconnected():
+        changes = status_changes_after(cursor)
+        if changes is None:
+            cursor = latest_event_id()
+            yield _message("reset", {}, cursor)
+            sent_at = time.monotonic()
+            continue
+        cursor, changed = changes
+        if changed:
+            messages = await run_in_threadpool(_load_changes, request.app, changed)
+            for index, (name, data) in enumerate(messages):
+                # The id goes on the last message so a resume never skips one.
+                yield _message(name, data, cursor if index == len(messages) - 1 else None)
+            sent_at = time.monotonic()
+        elif time.monotonic() - sent_at >= KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"
+            sent_at = time.monotonic()
+        await asyncio.sleep(STATUS_EVENT_INTERVAL_SECONDS)
+
+
+def _load_changes(app: FastAPI, changed: dict[str, list[int]]) -> list[tuple[str, dict]]:
+    messages = []
+    if "movie" in changed:
+        movies = get_movie_changes(changed["movie"])
+        attach_queue_status(app, "metadata", movies["items"])
+        messages.append(("movies", movies))
+    if "scene" in changed:
+        messages.append(("scenes", {"items": get_scene_changes(changed["scene"])}))
+    return messages
+
+
+def _message(event: str, data: dict, event_id: str | None) -> str:
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    id_line = f"id: {event_id}\n" if event_id else ""
+    return f"{id_line}event: {event}\ndata: {payload}\n\n"
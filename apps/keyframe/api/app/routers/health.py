@@ -1,15 +1,19 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from sqlalchemy import text
 
 from ..db import SessionLocal
-from ..services.media_processing import ffmpeg_status
+from ..services.frame_cache import frame_cache_stats
+from ..services.media_processing import ffmpeg_status, media_backend
+from ..services.media_queue import media_queue_stats
+from ..services.probe_cache import probe_cache_stats
+from ..services.scene_analysis_cache import scene_analysis_cache_stats
 
 
 router = APIRouter(prefix="/api")
 
 
 @router.get("/health")
-def health() -> dict:
+def health(request: Request) -> dict:
     database_ok = True
     try:
         with SessionLocal() as database:
@@ -21,4 +25,9 @@ def health() -> dict:
         "status": "ok" if database_ok and all(tools.values()) else "degraded",
         "database_ok": database_ok,
         **tools,
+        "media_backend": media_backend().name,
+        "scene_analysis_cache": scene_analysis_cache_stats() if database_ok else None,
+        "frame_cache": frame_cache_stats() if database_ok else None,
+        "probe_cache": probe_cache_stats() if database_ok else None,
+        "media_queue": media_queue_stats(request.app),
     }
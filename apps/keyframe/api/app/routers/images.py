@@ -1,19 +1,29 @@
+import asyncio
+import hashlib
+import json
+from collections.abc import AsyncIterator
 from typing import Literal
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, field_validator, model_validator
 
-from ..services.image_generation import generate_movie_images
+from ..services.image_generation import create_image_job, get_image_job
 from ..services.image_query import get_image_page, image_file
+from ..services.media_cache import not_modified, versioned_file_response
+from ..services.media_queue import attach_queue_status, schedule_image_jobs
 from ..services.scene_models import (
     IMAGE_PROMPT_MAX_BYTES,
     SdxlGenerationSettings,
-    get_sdxl_models,
+    SdxlModelsPayload,
+    get_sdxl_models_async,
+    refresh_sdxl_models_async,
 )
 
 
 MAX_SEED = 2_147_483_647
+JOB_EVENT_INTERVAL_SECONDS = 0.5
 router = APIRouter(prefix="/api")
 
 
@@ -70,15 +80,37 @@ def list_images(
 
 
 @router.get("/images/models")
-def list_sdxl_models() -> dict:
+async def list_sdxl_models(
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+) -> dict:
+    try:
+        payload = await get_sdxl_models_async()
+    except Exception as error:
+        raise _models_unavailable(error) from error
+    catalog = _model_catalog(payload)
+    etag = _catalog_etag(catalog)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match is not None and etag in {
+        value.strip() for value in if_none_match.split(",")
+    }:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return catalog
+
+
+@router.post("/images/models/refresh")
+async def refresh_sdxl_models(response: Response) -> dict:
     try:
-        payload = get_sdxl_models()
+        payload = await refresh_sdxl_models_async()
     except Exception as error:
-        message = str(error) or error.__class__.__name__
-        raise HTTPException(
-            status_code=503,
-            detail=f"SDXL 모델 목록을 불러오지 못했습니다: {message}",
-        ) from error
+        raise _models_unavailable(error) from error
+    catalog = _model_catalog(payload)
+    response.headers["ETag"] = _catalog_etag(catalog)
+    return catalog
+
+
+def _model_catalog(payload: SdxlModelsPayload) -> dict:
     return {
         "default_model": payload.default_model,
         "models": [
@@ -91,22 +123,85 @@ def list_sdxl_models() -> dict:
     }
 
 
+def _catalog_etag(catalog: dict) -> str:
+    encoded = json.dumps(catalog, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return f'"{hashlib.sha256(encoded).hexdigest()[:32]}"'
+
+
+def _models_unavailable(error: Exception) -> HTTPException:
+    message = str(error) or error.__class__.__name__
+    return HTTPException(
+        status_code=503,
+        detail=f"SDXL 모델 목록을 불러오지 못했습니다: {message}",
+    )
+
+
+@router.get("/images/jobs/{job_id}")
+def image_job(job_id: int, request: Request) -> dict:
+    try:
+        job = get_image_job(job_id)
+    except LookupError as error:
+        raise HTTPException(status_code=404, detail=str(error)) from error
+    attach_queue_status(request.app, "image", [job])
+    return job
+
+
+@router.get("/images/jobs/{job_id}/events")
+def image_job_events(job_id: int, request: Request) -> StreamingResponse:
+    try:
+        get_image_job(job_id)
+    except LookupError as error:
+        raise HTTPException(status_code=404, detail=str(error)) from error
+    return StreamingResponse(
+        _job_event_stream(job_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+async def _job_event_stream(job_id: int, request: Request) -> AsyncIterator[str]:
+    previous: str | None = None
+    sequence = 0
+    while True:
+        try:
+            job = await run_in_threadpool(get_image_job, job_id)
+        except LookupError:
+            return
+        data = json.dumps(job, ensure_ascii=False, separators=(",", ":"))
+        if data != previous:
+            sequence += 1
+            previous = data
+            yield f"id: {sequence}\nevent: job\ndata: {data}\n\n"
+        if job["status"] not in {"pending", "processing"}:
+            return
+        if await request.is_disconnected():
+            return
+        await asyncio.sleep(JOB_EVENT_INTERVAL_SECONDS)
+
+
 @router.get("/images/{image_id}/file")
-def get_image_file(image_id: int) -> FileResponse:
+def get_image_file(
+    image_id: int,
+    v: str | None = None,
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    cached = not_modified("image", image_id, v, if_none_match)
+    if cached is not None:
+        return cached
     try:
         path = image_file(image_id)
+        media_type = "image/jpeg" if path.suffix.lower() == ".jpg" else "image/png"
+        return versioned_file_response(path, media_type, "image", image_id, v)
     except FileNotFoundError as error:
         raise HTTPException(status_code=404, detail=str(error)) from error
-    media_type = "image/jpeg" if path.suffix.lower() == ".jpg" else "image/png"
-    return FileResponse(
-        path,
-        media_type=media_type,
-        headers={"Cache-Control": "no-cache"},
-    )
 
 
-@router.post("/movies/{movie_id}/images", status_code=201)
-def create_images(movie_id: int, payload: ImageGenerationRequest) -> dict:
+@router.post("/movies/{movie_id}/images", status_code=202)
+def create_images(
+    movie_id: int,
+    payload: ImageGenerationRequest,
+    request: Request,
+) -> dict:
     seeds = (
         [payload.seed + index for index in range(payload.count)]
         if payload.seed is not None
@@ -125,18 +220,13 @@ def create_images(movie_id: int, payload: ImageGenerationRequest) -> dict:
         format=payload.format,
     )
     try:
-        return {
-            "items": generate_movie_images(movie_id, payload.timestamp_ms, settings)
-        }
+        job = create_image_job(movie_id, payload.timestamp_ms, settings)
     except LookupError as error:
         raise HTTPException(status_code=404, detail=str(error)) from error
     except FileNotFoundError as error:
         raise HTTPException(status_code=404, detail=str(error)) from error
     except ValueError as error:
         raise HTTPException(status_code=422, detail=str(error)) from error
-    except (RuntimeError, TimeoutError) as error:
-        message = str(error) or error.__class__.__name__
-        raise HTTPException(
-            status_code=503,
-            detail=f"이미지 생성에 실패했습니다: {message}",
-        ) from error
+    schedule_image_jobs(request.app, [job["id"]])
+    attach_queue_status(request.app, "image", [job])
+    return job
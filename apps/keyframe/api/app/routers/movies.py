@@ -1,15 +1,40 @@
+import json
+import queue
+import threading
+from collections.abc import Iterator
 from pathlib import Path
+from typing import Literal
 
-from fastapi import APIRouter, HTTPException, Query, Request
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 from ..db import DATA_DIR, MovieFile, SessionLocal
 from ..services.dialogs import choose_video_files, choose_video_folder
-from ..services.media_queue import schedule_movies
+from ..services.library_sync import (
+    library_sync_status,
+    list_library_folders,
+    remember_library_folder,
+    sync_library,
+)
+from ..services.media_cache import (
+    IMMUTABLE_CACHE_CONTROL,
+    media_etag,
+    not_modified,
+    versioned_file_response,
+)
+from ..services.media_processing import ACTIVE_METADATA_STATUSES
+from ..services.media_queue import attach_queue_status, schedule_movies, schedule_playback
 from ..services.movie_import import empty_import_result, register_movie_paths, scan_video_folder
-from ..services.movie_query import get_movie_detail, get_movie_page, get_movie_statuses
+from ..services.movie_query import (
+    get_duplicate_groups,
+    get_movie_detail,
+    get_movie_page,
+    get_movie_statuses,
+)
 from ..services.playback import playback_file, prepare_playback
+from ..services.trickplay import trickplay_file
+from ..services.worker_pool import INTERACTIVE_PRIORITY
 
 
 router = APIRouter(prefix="/api/movies")
@@ -21,29 +46,47 @@ class StatusRequest(BaseModel):
 
 @router.get("")
 def list_movies(
+    request: Request,
     limit: int = Query(default=24, ge=1, le=100),
     before_id: int | None = Query(default=None, ge=1),
+    sort: Literal["id", "title", "duration", "resolution", "size", "codec"] = "id",
+    order: Literal["asc", "desc"] = "desc",
+    status: Literal["pending", "processing", "ready", "failed"] | None = None,
 ) -> dict:
-    return get_movie_page(limit, before_id)
+    try:
+        page = get_movie_page(limit, before_id, sort, order == "desc", status)
+    except LookupError as error:
+        raise HTTPException(status_code=404, detail=str(error)) from error
+    attach_queue_status(request.app, "metadata", page["items"])
+    return page
 
 
 @router.post("/statuses")
-def movie_statuses(payload: StatusRequest) -> dict:
-    return get_movie_statuses(payload.ids)
+def movie_statuses(payload: StatusRequest, request: Request) -> dict:
+    statuses = get_movie_statuses(payload.ids)
+    attach_queue_status(request.app, "metadata", statuses["items"])
+    return statuses
+
+
+@router.get("/duplicates")
+def movie_duplicates(limit: int = Query(default=50, ge=1, le=200)) -> dict:
+    """Groups of movies whose sampled content fingerprints are equal."""
+    return get_duplicate_groups(limit)
 
 
 @router.get("/{movie_id}")
-def movie_detail(movie_id: int) -> dict:
+def movie_detail(movie_id: int, request: Request) -> dict:
     detail = get_movie_detail(movie_id)
     if detail is None:
         raise HTTPException(status_code=404, detail="영상을 찾을 수 없습니다")
+    attach_queue_status(request.app, "metadata", [detail])
     return detail
 
 
 @router.post("/{movie_id}/playback/prepare")
-def prepare_movie_playback(movie_id: int) -> dict:
+def prepare_movie_playback(movie_id: int, request: Request) -> dict:
     try:
-        prepare_playback(movie_id)
+        queued = prepare_playback(movie_id)
     except LookupError as error:
         raise HTTPException(status_code=404, detail=str(error)) from error
     except FileNotFoundError as error:
@@ -53,6 +96,12 @@ def prepare_movie_playback(movie_id: int) -> dict:
     detail = get_movie_detail(movie_id)
     if detail is None:
         raise HTTPException(status_code=404, detail="영상을 찾을 수 없습니다")
+    # The user is waiting on this movie, so move its metadata ahead of bulk imports.
+    if detail["metadata_status"] in ACTIVE_METADATA_STATUSES:
+        schedule_movies(request.app, [movie_id], INTERACTIVE_PRIORITY)
+    if queued:
+        schedule_playback(request.app, [movie_id])
+    attach_queue_status(request.app, "metadata", [detail])
     return detail
 
 
@@ -82,7 +131,7 @@ def import_files(request: Request) -> dict:
     if not selected:
         return empty_import_result()
     result = register_movie_paths(selected)
-    schedule_movies(request.app, result["added_ids"])
+    schedule_movies(request.app, result["added_ids"] + result["updated_ids"])
     return result
 
 
@@ -96,12 +145,84 @@ def import_folder(request: Request) -> dict:
         return empty_import_result()
     paths, scan_failures = scan_video_folder(selected_folder)
     result = register_movie_paths(paths, scan_failures)
-    schedule_movies(request.app, result["added_ids"])
+    remember_library_folder(selected_folder)
+    schedule_movies(request.app, result["added_ids"] + result["updated_ids"])
+    return result
+
+
+@router.post("/import/folder/stream")
+def import_folder_stream(request: Request) -> StreamingResponse:
+    """Folder import that reports scan progress as NDJSON lines before the result."""
+    try:
+        selected_folder = choose_video_folder()
+    except Exception as error:
+        raise HTTPException(status_code=503, detail=f"폴더 탐색기를 열 수 없습니다: {error}") from error
+    if selected_folder:
+        events = _folder_import_events(request.app, selected_folder)
+    else:
+        events = iter([_ndjson({"type": "result", **empty_import_result()})])
+    return StreamingResponse(
+        events,
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+def _folder_import_events(app: FastAPI, folder: str) -> Iterator[str]:
+    events: queue.SimpleQueue[dict | None] = queue.SimpleQueue()
+
+    def run() -> None:
+        try:
+            paths, scan_failures = scan_video_folder(
+                folder,
+                on_progress=lambda directories, videos: events.put(
+                    {"type": "progress", "directories": directories, "videos": videos}
+                ),
+            )
+            result = register_movie_paths(paths, scan_failures)
+            remember_library_folder(folder)
+            schedule_movies(app, result["added_ids"] + result["updated_ids"])
+            events.put({"type": "result", **result})
+        except Exception as error:
+            events.put({"type": "error", "detail": f"폴더를 가져오지 못했습니다: {error}"})
+        finally:
+            events.put(None)
+
+    # The import finishes even if the client goes away mid-scan.
+    threading.Thread(target=run, name="movie-folder-import", daemon=True).start()
+    while (event := events.get()) is not None:
+        yield _ndjson(event)
+
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+@router.get("/library/folders")
+def library_folders() -> dict:
+    return {"items": list_library_folders(), "last_sync": library_sync_status()}
+
+
+@router.post("/library/sync")
+def library_sync(request: Request) -> dict:
+    """Rescan the imported folders now instead of waiting for the periodic sync."""
+    try:
+        result = sync_library()
+    except Exception as error:
+        raise HTTPException(status_code=503, detail=f"라이브러리를 동기화하지 못했습니다: {error}") from error
+    schedule_movies(request.app, result["added_ids"] + result["updated_ids"])
     return result
 
 
 @router.get("/{movie_id}/thumbnail")
-def movie_thumbnail(movie_id: int) -> FileResponse:
+def movie_thumbnail(
+    movie_id: int,
+    v: str | None = None,
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    cached = not_modified("thumbnail", movie_id, v, if_none_match)
+    if cached is not None:
+        return cached
     with SessionLocal() as database:
         movie = database.get(MovieFile, movie_id)
         if movie is None or not movie.thumbnail_path:
@@ -111,8 +232,49 @@ def movie_thumbnail(movie_id: int) -> FileResponse:
     data_root = DATA_DIR.resolve()
     if not thumbnail.is_relative_to(data_root) or not thumbnail.is_file():
         raise HTTPException(status_code=404, detail="썸네일을 찾을 수 없습니다")
+    try:
+        return versioned_file_response(Path(thumbnail), "image/webp", "thumbnail", movie_id, v)
+    except FileNotFoundError as error:
+        raise HTTPException(status_code=404, detail="썸네일을 찾을 수 없습니다") from error
+
+
+@router.get("/{movie_id}/trickplay.vtt")
+def movie_trickplay_index(
+    movie_id: int,
+    v: str | None = None,
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    return _trickplay_response(movie_id, ".vtt", "text/vtt", v, if_none_match)
+
+
+@router.get("/{movie_id}/trickplay.webp")
+def movie_trickplay_sprite(
+    movie_id: int,
+    v: str | None = None,
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    return _trickplay_response(movie_id, ".webp", "image/webp", v, if_none_match)
+
+
+def _trickplay_response(
+    movie_id: int,
+    suffix: str,
+    media_type: str,
+    version: str | None,
+    if_none_match: str | None,
+) -> Response:
+    kind = f"trickplay{suffix}"
+    cached = not_modified(kind, movie_id, version, if_none_match)
+    if cached is not None:
+        return cached
+    try:
+        path, current = trickplay_file(movie_id, suffix)
+    except FileNotFoundError as error:
+        raise HTTPException(status_code=404, detail=str(error)) from error
+    # An old ?v= gets the current generation, which it must not keep.
+    cache_control = IMMUTABLE_CACHE_CONTROL if version == current else "no-cache"
     return FileResponse(
-        Path(thumbnail),
-        media_type="image/webp",
-        headers={"Cache-Control": "no-cache"},
+        path,
+        media_type=media_type,
+        headers={"ETag": media_etag(kind, movie_id, current), "Cache-Control": cache_control},
     )
@@ -1,18 +1,24 @@
-from fastapi import APIRouter, HTTPException, Query, Request
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
 from sqlalchemy.exc import IntegrityError
 
-from ..services.media_queue import schedule_scenes
+from ..services.media_cache import not_modified, versioned_file_response
+from ..services.media_queue import (
+    attach_queue_status,
+    schedule_detection_jobs,
+    schedule_scenes,
+)
+from ..services.scene_detection import create_detection_job, get_detection_job
+from ..services.worker_pool import INTERACTIVE_PRIORITY
 from ..services.scene_query import (
     create_scene,
     delete_scene,
     get_scene_detail,
-    get_scene_page,
     get_similar_scene_page,
     list_scenes,
     retry_scene,
     scene_snapshot_file,
+    search_scene_page,
 )
 
 
@@ -21,16 +27,23 @@ router = APIRouter(prefix="/api")
 
 class SceneCreateRequest(BaseModel):
     timestamp_ms: int = Field(ge=0)
+    snap_to_keyframe: bool = False
+
+
+class SceneDetectionRequest(BaseModel):
+    threshold: float = Field(default=0.3, gt=0.0, le=1.0)
+    min_spacing_ms: int = Field(default=2_000, ge=0, le=600_000)
+    max_scenes: int = Field(default=100, ge=1, le=1_000)
 
 
 @router.get("/scenes")
-def explore_scenes(
+async def explore_scenes(
     query: str | None = Query(default=None, max_length=500),
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=48, ge=1, le=100),
 ) -> dict:
     try:
-        return get_scene_page(query, offset, limit)
+        return await search_scene_page(query, offset, limit)
     except Exception as error:
         if query and query.strip():
             message = str(error) or error.__class__.__name__
@@ -42,10 +55,11 @@ def explore_scenes(
 
 
 @router.get("/scenes/{scene_id}")
-def scene_detail(scene_id: int) -> dict:
+def scene_detail(scene_id: int, request: Request) -> dict:
     scene = get_scene_detail(scene_id)
     if scene is None:
         raise HTTPException(status_code=404, detail="Scene을 찾을 수 없습니다")
+    attach_queue_status(request.app, "scene", [scene])
     return scene
 
 
@@ -69,45 +83,76 @@ def similar_scenes(
 
 
 @router.get("/movies/{movie_id}/scenes")
-def movie_scenes(movie_id: int) -> dict:
+def movie_scenes(movie_id: int, request: Request) -> dict:
     items = list_scenes(movie_id)
     if items is None:
         raise HTTPException(status_code=404, detail="영상을 찾을 수 없습니다")
-    return {"items": items}
+    return {"items": attach_queue_status(request.app, "scene", items)}
 
 
 @router.post("/movies/{movie_id}/scenes", status_code=201)
 def add_scene(movie_id: int, payload: SceneCreateRequest, request: Request) -> dict:
     try:
-        scene = create_scene(movie_id, payload.timestamp_ms)
+        scene = create_scene(movie_id, payload.timestamp_ms, payload.snap_to_keyframe)
     except LookupError as error:
         raise HTTPException(status_code=404, detail=str(error)) from error
     except ValueError as error:
         raise HTTPException(status_code=422, detail=str(error)) from error
     except IntegrityError as error:
         raise HTTPException(status_code=409, detail="같은 timestamp의 Scene이 이미 있습니다") from error
-    schedule_scenes(request.app, [scene["id"]])
+    schedule_scenes(request.app, [scene["id"]], INTERACTIVE_PRIORITY)
+    attach_queue_status(request.app, "scene", [scene])
     return scene
 
 
+@router.post("/movies/{movie_id}/scene-detection", status_code=202)
+def detect_scenes(movie_id: int, payload: SceneDetectionRequest, request: Request) -> dict:
+    try:
+        job = create_detection_job(
+            movie_id,
+            payload.threshold,
+            payload.min_spacing_ms,
+            payload.max_scenes,
+        )
+    except (LookupError, FileNotFoundError) as error:
+        raise HTTPException(status_code=404, detail=str(error)) from error
+    schedule_detection_jobs(request.app, [job["id"]])
+    attach_queue_status(request.app, "detection", [job])
+    return job
+
+
+@router.get("/scene-detection/{job_id}")
+def scene_detection_job(job_id: int, request: Request) -> dict:
+    try:
+        job = get_detection_job(job_id)
+    except LookupError as error:
+        raise HTTPException(status_code=404, detail=str(error)) from error
+    attach_queue_status(request.app, "detection", [job])
+    return job
+
+
 @router.post("/scenes/{scene_id}/retry")
 def retry_failed_scene(scene_id: int, request: Request) -> dict:
     scene = retry_scene(scene_id)
     if scene is None:
         raise HTTPException(status_code=404, detail="Scene을 찾을 수 없습니다")
     if scene["analysis_status"] in {"pending", "processing"}:
-        schedule_scenes(request.app, [scene_id])
+        schedule_scenes(request.app, [scene_id], INTERACTIVE_PRIORITY)
+    attach_queue_status(request.app, "scene", [scene])
     return scene
 
 
 @router.get("/scenes/{scene_id}/snapshot")
-def scene_snapshot(scene_id: int) -> FileResponse:
+def scene_snapshot(
+    scene_id: int,
+    v: str | None = None,
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    cached = not_modified("snapshot", scene_id, v, if_none_match)
+    if cached is not None:
+        return cached
     try:
         path = scene_snapshot_file(scene_id)
+        return versioned_file_response(path, "image/webp", "snapshot", scene_id, v)
     except FileNotFoundError as error:
         raise HTTPException(status_code=404, detail=str(error)) from error
-    return FileResponse(
-        path,
-        media_type="image/webp",
-        headers={"Cache-Control": "no-cache"},
-    )
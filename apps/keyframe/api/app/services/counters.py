@@ -0,0 +1,28 @@
+"""Reads of the row counters maintained by the triggers in :mod:`app.db`."""
+
+from __future__ import annotations
+
+from sqlalchemy import select
+
+from ..db import LibraryCounter, MovieSceneCount
+
+
+def counter_values(database, *names: str) -> dict[str, int]:
+    values = dict(
+        database.execute(
+            select(LibraryCounter.name, LibraryCounter.value).where(
+                LibraryCounter.name.in_(names)
+            )
+        ).all()
+    )
+    return {name: values.get(name, 0) for name in names}
+
+
+def counter_value(database, name: str) -> int:
+    return counter_values(database, name)[name]
+
+
+def movie_scene_count(database, movie_id: int) -> int:
+    return database.scalar(
+        select(MovieSceneCount.scene_count).where(MovieSceneCount.movie_file_id == movie_id)
+    ) or 0
@@ -0,0 +1,262 @@
+"""Disk cache of decoded movie frames shared by every WebP frame consumer.
+
+Frames are keyed by ``(movie, timestamp_ms, width, quality)`` and stored as
+``FRAME_CACHE_DIR/<movie>/<timestamp>-<width>-<quality>.webp``. A hit is
+hard-linked (or copied) to the caller's target so that eviction never removes
+a file somebody else still uses. Once the cached files exceed the byte budget
+the least recently used entries are deleted.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+from pathlib import Path
+from uuid import uuid4
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from ..db import FRAME_CACHE_DIR, FrameCacheEntry, SessionLocal, utc_now
+from .media_processing import media_backend
+
+
+DEFAULT_FRAME_CACHE_BYTES = 1024 * 1024 * 1024
+EVICTION_BATCH_SIZE = 256
+
+_stats_lock = threading.Lock()
+_budget_bytes = DEFAULT_FRAME_CACHE_BYTES
+_hits = 0
+_misses = 0
+
+
+def configure_frame_cache(max_bytes: int) -> None:
+    """Set the byte budget; ``0`` disables caching of new frames."""
+    global _budget_bytes
+    if max_bytes < 0:
+        raise ValueError("max_bytes must not be negative")
+    with _stats_lock:
+        _budget_bytes = max_bytes
+
+
+def write_cached_frames(
+    source_path: str,
+    movie_id: int,
+    frames: list[tuple[int, Path]],
+    *,
+    width: int,
+    quality: int,
+    keyframes: list[int] | None = None,
+) -> None:
+    """Write ``(timestamp_ms, target)`` frames, decoding only cache misses.
+
+    Like ``MediaBackend.write_frames`` a frame the backend could not produce
+    is left missing or empty for the caller to report.
+    """
+    signature = _source_signature(source_path)
+    missing = (
+        _link_cached_frames(movie_id, signature, frames, width, quality)
+        if signature is not None
+        else list(frames)
+    )
+    _record_lookups(len(frames) - len(missing), len(missing))
+    if not missing:
+        return
+    for _timestamp_ms, target in missing:
+        # A target may be a hard link of a cached frame; never write through it.
+        target.unlink(missing_ok=True)
+    media_backend().write_frames(
+        source_path,
+        missing,
+        width=width,
+        quality=quality,
+        keyframes=keyframes,
+    )
+    with _stats_lock:
+        budget = _budget_bytes
+    if signature is not None and budget > 0:
+        _store_frames(movie_id, signature, missing, width, quality, budget)
+
+
+def frame_cache_stats() -> dict:
+    with _stats_lock:
+        hits, misses, budget = _hits, _misses, _budget_bytes
+    with SessionLocal() as database:
+        entries, stored_bytes = database.execute(
+            select(
+                func.count(FrameCacheEntry.id),
+                func.coalesce(func.sum(FrameCacheEntry.size_bytes), 0),
+            )
+        ).one()
+    lookups = hits + misses
+    return {
+        "entries": entries,
+        "bytes": stored_bytes,
+        "budget_bytes": budget,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def _link_cached_frames(
+    movie_id: int,
+    signature: str,
+    frames: list[tuple[int, Path]],
+    width: int,
+    quality: int,
+) -> list[tuple[int, Path]]:
+    """Materialize cached frames into their targets and return the misses."""
+    with SessionLocal() as database:
+        entries = {
+            entry.timestamp_ms: entry
+            for entry in database.scalars(
+                select(FrameCacheEntry).where(
+                    FrameCacheEntry.movie_file_id == movie_id,
+                    FrameCacheEntry.width == width,
+                    FrameCacheEntry.quality == quality,
+                    FrameCacheEntry.timestamp_ms.in_(
+                        {timestamp_ms for timestamp_ms, _target in frames}
+                    ),
+                )
+            ).all()
+        }
+        stale = {
+            entry.id: _frame_path(movie_id, entry.timestamp_ms, width, quality)
+            for entry in entries.values()
+            if entry.source_signature != signature
+        }
+        missing: list[tuple[int, Path]] = []
+        used: set[int] = set()
+        for timestamp_ms, target in frames:
+            entry = entries.get(timestamp_ms)
+            if entry is None or entry.id in stale:
+                missing.append((timestamp_ms, target))
+                continue
+            try:
+                _link(_frame_path(movie_id, timestamp_ms, width, quality), target)
+            except OSError:
+                # Evicted by another worker after the lookup.
+                missing.append((timestamp_ms, target))
+                continue
+            used.add(entry.id)
+        if used:
+            database.execute(
+                update(FrameCacheEntry)
+                .where(FrameCacheEntry.id.in_(used))
+                .values(last_used_at=utc_now())
+            )
+        if stale:
+            database.execute(delete(FrameCacheEntry).where(FrameCacheEntry.id.in_(stale)))
+        database.commit()
+    for path in stale.values():
+        path.unlink(missing_ok=True)
+    return missing
+
+
+def _store_frames(
+    movie_id: int,
+    signature: str,
+    frames: list[tuple[int, Path]],
+    width: int,
+    quality: int,
+    budget: int,
+) -> None:
+    stored: list[dict] = []
+    for timestamp_ms, target in frames:
+        if not target.is_file() or target.stat().st_size == 0:
+            continue
+        cached_path = _frame_path(movie_id, timestamp_ms, width, quality)
+        cached_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = cached_path.with_name(f"{cached_path.stem}.{uuid4().hex[:8]}.tmp")
+        try:
+            _link(target, temporary_path)
+            os.replace(temporary_path, cached_path)
+        except OSError:
+            temporary_path.unlink(missing_ok=True)
+            continue
+        stored.append(
+            {
+                "movie_file_id": movie_id,
+                "timestamp_ms": timestamp_ms,
+                "width": width,
+                "quality": quality,
+                "source_signature": signature,
+                "size_bytes": cached_path.stat().st_size,
+                "created_at": utc_now(),
+                "last_used_at": utc_now(),
+            }
+        )
+    if not stored:
+        return
+    with SessionLocal() as database:
+        statement = insert(FrameCacheEntry).values(stored)
+        database.execute(
+            statement.on_conflict_do_update(
+                index_elements=["movie_file_id", "timestamp_ms", "width", "quality"],
+                set_={
+                    "source_signature": statement.excluded.source_signature,
+                    "size_bytes": statement.excluded.size_bytes,
+                    "last_used_at": statement.excluded.last_used_at,
+                },
+            )
+        )
+        evicted = _evict(database, budget)
+        database.commit()
+    for path in evicted:
+        path.unlink(missing_ok=True)
+
+
+def _evict(database, budget: int) -> list[Path]:
+    """Delete least recently used rows over ``budget`` and return their files."""
+    total = database.scalar(
+        select(func.coalesce(func.sum(FrameCacheEntry.size_bytes), 0))
+    )
+    evicted: list[Path] = []
+    while total > budget:
+        oldest = database.scalars(
+            select(FrameCacheEntry)
+            .order_by(FrameCacheEntry.last_used_at, FrameCacheEntry.id)
+            .limit(EVICTION_BATCH_SIZE)
+        ).all()
+        if not oldest:
+            break
+        removed: list[int] = []
+        for entry in oldest:
+            if total <= budget:
+                break
+            total -= entry.size_bytes
+            removed.append(entry.id)
+            evicted.append(
+                _frame_path(entry.movie_file_id, entry.timestamp_ms, entry.width, entry.quality)
+            )
+        database.execute(delete(FrameCacheEntry).where(FrameCacheEntry.id.in_(removed)))
+    return evicted
+
+
+def _frame_path(movie_id: int, timestamp_ms: int, width: int, quality: int) -> Path:
+    return FRAME_CACHE_DIR / str(movie_id) / f"{timestamp_ms}-{width}-{quality}.webp"
+
+
+def _source_signature(source_path: str) -> str | None:
+    try:
+        stat = os.stat(source_path)
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _link(source: Path, target: Path) -> None:
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _record_lookups(hits: int, misses: int) -> None:
+    global _hits, _misses
+    with _stats_lock:
+        _hits += hits
+        _misses += misses
@@ -1,81 +1,245 @@
+from dataclasses import asdict
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from uuid import uuid4
 
-from ..db import DATA_DIR, IMAGE_DIR, Image, MovieFile, SessionLocal
+from sqlalchemy import exists, select, update
+
+from ..db import (
+    DATA_DIR,
+    IMAGE_DIR,
+    Image,
+    ImageGenerationJob,
+    Job,
+    MovieFile,
+    SessionLocal,
+    utc_now,
+)
+from .frame_cache import write_cached_frames
+from .keyframes import load_keyframes
+from .media_cache import versioned_url
+from .movie_query import iso_utc
 from .scene_models import (
+    GeneratedImageAnalysis,
     SdxlGenerationSettings,
     generate_images_from_snapshot,
 )
-from .media_processing import _run_command
+from .media_processing import SNAPSHOT_QUALITY, SNAPSHOT_WIDTH
+
+
+ACTIVE_JOB_STATUSES = ("pending", "processing")
 
 
-def generate_movie_images(
+def create_image_job(
     movie_id: int,
     timestamp_ms: int,
     settings: SdxlGenerationSettings,
-) -> list[dict]:
+) -> dict:
     with SessionLocal() as database:
         movie = database.get(MovieFile, movie_id)
         if movie is None:
             raise LookupError("영상을 찾을 수 없습니다")
         if movie.duration_ms is not None and timestamp_ms > movie.duration_ms:
             raise ValueError("영상 길이를 벗어난 timestamp입니다")
+        if not Path(movie.path).is_file():
+            raise FileNotFoundError("원본 영상 파일을 찾을 수 없습니다")
+        job = ImageGenerationJob(
+            movie_file_id=movie_id,
+            timestamp_ms=timestamp_ms,
+            settings=asdict(settings),
+            status="pending",
+            total_images=settings.count,
+            completed_images=0,
+            image_ids=[],
+        )
+        database.add(job)
+        database.commit()
+        return serialize_image_job(job, [])
+
+
+def get_image_job(job_id: int) -> dict:
+    with SessionLocal() as database:
+        job = database.get(ImageGenerationJob, job_id)
+        if job is None:
+            raise LookupError("이미지 생성 작업을 찾을 수 없습니다")
+        images = list(database.scalars(
+            select(Image).where(Image.id.in_(job.image_ids)).order_by(Image.id.desc())
+        ).all()) if job.image_ids else []
+        return serialize_image_job(job, images)
+
+
+def process_image_job(job_id: int) -> None:
+    with SessionLocal() as database:
+        job = database.get(ImageGenerationJob, job_id)
+        if job is None or job.status not in ACTIVE_JOB_STATUSES:
+            return
+        movie = database.get(MovieFile, job.movie_file_id)
+        if movie is None:
+            return
+        job.status = "processing"
+        job.stage = "snapshot"
+        job.error = None
+        job.updated_at = utc_now()
         source_path = Path(movie.path).resolve()
+        timestamp_ms = job.timestamp_ms
+        settings = SdxlGenerationSettings(**job.settings)
+        movie_id = movie.id
+        keyframes = load_keyframes(database, movie_id)
+        database.commit()
+
+    error_message: str | None = None
+    try:
+        if not source_path.is_file():
+            raise FileNotFoundError("원본 영상 파일을 찾을 수 없습니다")
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        with TemporaryDirectory(prefix="image-generation-", dir=DATA_DIR) as temporary_dir:
+            snapshot = Path(temporary_dir) / "snapshot.webp"
+            _extract_snapshot(source_path, movie_id, timestamp_ms, snapshot, keyframes)
+            generate_images_from_snapshot(
+                snapshot,
+                settings,
+                on_stage=lambda stage: _set_job_stage(job_id, stage),
+                on_image=lambda prompt, image: _store_image(job_id, prompt, image),
+            )
+    except Exception as error:
+        error_message = str(error) or error.__class__.__name__
+
+    with SessionLocal() as database:
+        job = database.get(ImageGenerationJob, job_id)
+        if job is None:
+            return
+        if error_message:
+            job.status = "failed"
+            job.error = error_message[-2000:]
+        else:
+            job.status = "ready"
+            job.stage = None
+            job.error = None
+        job.updated_at = utc_now()
+        database.commit()
+
 
-    if not source_path.is_file():
-        raise FileNotFoundError("원본 영상 파일을 찾을 수 없습니다")
-
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with TemporaryDirectory(prefix="image-generation-", dir=DATA_DIR) as temporary_dir:
-        snapshot = Path(temporary_dir) / "snapshot.webp"
-        _run_command(
-            [
-                "ffmpeg", "-hide_banner", "-loglevel", "error", "-ss",
-                f"{timestamp_ms / 1000:.3f}", "-i", str(source_path), "-map", "0:v:0",
-                "-frames:v", "1", "-vf",
-                "scale=1280:-2:force_original_aspect_ratio=decrease",
-                "-c:v", "libwebp", "-q:v", "90", "-y", str(snapshot),
-            ],
-            timeout=180,
+def fail_image_job(job_id: int, error_message: str) -> None:
+    """Mark an active generation job failed when it cannot finish."""
+    with SessionLocal() as database:
+        database.execute(
+            update(ImageGenerationJob)
+            .where(
+                ImageGenerationJob.id == job_id,
+                ImageGenerationJob.status.in_(ACTIVE_JOB_STATUSES),
+            )
+            .values(status="failed", error=error_message[-2000:], updated_at=utc_now())
+        )
+        database.commit()
+
+
+def reset_image_jobs() -> list[int]:
+    """Fail interrupted jobs and return pending ones that have no queued job.
+
+    Images stored before the interruption stay in the feed, so rerunning the
+    job would render more images than were requested.
+    """
+    orphaned = ~exists().where(
+        Job.job_type == "image",
+        Job.item_id == ImageGenerationJob.id,
+    )
+    with SessionLocal() as database:
+        database.execute(
+            update(ImageGenerationJob)
+            .where(ImageGenerationJob.status == "processing", orphaned)
+            .values(
+                status="failed",
+                error="서버가 재시작되어 이미지 생성이 중단되었습니다",
+                updated_at=utc_now(),
+            )
+            .execution_options(synchronize_session=False)
         )
-        if not snapshot.is_file() or snapshot.stat().st_size == 0:
-            raise RuntimeError("FFmpeg가 이미지 생성 snapshot을 만들지 못했습니다")
-        analysis = generate_images_from_snapshot(snapshot, settings)
+        ids = list(database.scalars(
+            select(ImageGenerationJob.id)
+            .where(ImageGenerationJob.status == "pending", orphaned)
+            .order_by(ImageGenerationJob.id)
+        ).all())
+        database.commit()
+        return ids
+
+
+def serialize_image_job(job: ImageGenerationJob, images: list[Image]) -> dict:
+    return {
+        "id": job.id,
+        "movie_id": job.movie_file_id,
+        "timestamp_ms": job.timestamp_ms,
+        "status": job.status,
+        "stage": job.stage,
+        "total_images": job.total_images,
+        "completed_images": job.completed_images,
+        "prompt": job.prompt,
+        "error": job.error,
+        "images": [
+            {
+                "id": image.id,
+                "prompt": image.prompt,
+                "image_url": versioned_url(f"/api/images/{image.id}/file", image.file_path),
+            }
+            for image in images
+        ],
+        "created_at": iso_utc(job.created_at),
+        "updated_at": iso_utc(job.updated_at),
+    }
+
+
+def _extract_snapshot(
+    source_path: Path,
+    movie_id: int,
+    timestamp_ms: int,
+    snapshot: Path,
+    keyframes: list[int] | None = None,
+) -> None:
+    write_cached_frames(
+        str(source_path),
+        movie_id,
+        [(timestamp_ms, snapshot)],
+        width=SNAPSHOT_WIDTH,
+        quality=SNAPSHOT_QUALITY,
+        keyframes=keyframes,
+    )
+    if not snapshot.is_file() or snapshot.stat().st_size == 0:
+        raise RuntimeError("FFmpeg가 이미지 생성 snapshot을 만들지 못했습니다")
+
+
+def _set_job_stage(job_id: int, stage: str) -> None:
+    with SessionLocal() as database:
+        job = database.get(ImageGenerationJob, job_id)
+        if job is None:
+            return
+        job.stage = stage
+        job.updated_at = utc_now()
+        database.commit()
+
 
+def _store_image(job_id: int, prompt: str, generated: GeneratedImageAnalysis) -> None:
     IMAGE_DIR.mkdir(parents=True, exist_ok=True)
-    temporary_paths: list[Path] = []
-    final_paths: list[Path] = []
+    final_path = IMAGE_DIR / f"{uuid4().hex}.{generated.format}"
+    temporary_path = final_path.with_name(f".{final_path.name}.tmp")
     with SessionLocal() as database:
         try:
-            rows: list[Image] = []
-            for generated in analysis.images:
-                final_path = IMAGE_DIR / f"{uuid4().hex}.{generated.format}"
-                temporary_path = final_path.with_name(f".{final_path.name}.tmp")
-                temporary_paths.append(temporary_path)
-                temporary_path.write_bytes(generated.data)
-                temporary_path.replace(final_path)
-                final_paths.append(final_path)
-                image = Image(
-                    file_path=final_path.relative_to(DATA_DIR).as_posix(),
-                    prompt=analysis.prompt,
-                    embedding=generated.embedding,
-                )
-                database.add(image)
-                rows.append(image)
+            temporary_path.write_bytes(generated.data)
+            temporary_path.replace(final_path)
+            image = Image(
+                file_path=final_path.relative_to(DATA_DIR).as_posix(),
+                prompt=prompt,
+                embedding=generated.embedding,
+            )
+            database.add(image)
             database.flush()
-            items = [
-                {
-                    "id": image.id,
-                    "prompt": image.prompt,
-                    "image_url": f"/api/images/{image.id}/file",
-                }
-                for image in sorted(rows, key=lambda item: item.id, reverse=True)
-            ]
+            job = database.get(ImageGenerationJob, job_id)
+            if job is not None:
+                job.image_ids = [*job.image_ids, image.id]
+                job.completed_images = len(job.image_ids)
+                job.prompt = prompt
+                job.updated_at = utc_now()
             database.commit()
-            return items
         except BaseException:
             database.rollback()
-            for path in [*temporary_paths, *final_paths]:
-                path.unlink(missing_ok=True)
+            temporary_path.unlink(missing_ok=True)
+            final_path.unlink(missing_ok=True)
             raise
@@ -1,8 +1,10 @@
 from pathlib import Path
 
-from sqlalchemy import func, select
+from sqlalchemy import select
 
 from ..db import DATA_DIR, Image, SessionLocal
+from .counters import counter_value
+from .media_cache import versioned_url
 
 
 def get_image_page(limit: int, before_id: int | None) -> dict:
@@ -18,11 +20,11 @@ def get_image_page(limit: int, before_id: int | None) -> dict:
                 {
                     "id": image.id,
                     "prompt": image.prompt,
-                    "image_url": f"/api/images/{image.id}/file",
+                    "image_url": versioned_url(f"/api/images/{image.id}/file", image.file_path),
                 }
                 for image in page
             ],
-            "total": database.scalar(select(func.count(Image.id))) or 0,
+            "total": counter_value(database, "images"),
             "next_cursor": page[-1].id if has_more and page else None,
             "has_more": has_more,
         }
@@ -0,0 +1,174 @@
+"""Durable media job queue stored in the ``jobs`` table.
+
+A row exists only while its work is outstanding. Workers claim rows by
+writing a lease owner and expiry in one ``UPDATE ... RETURNING`` statement;
+rows whose lease expired because the owning process stopped become
+claimable again, so a restart reads only outstanding rows and several API
+processes can drain the same database safely.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import aliased
+
+from ..db import Job, SessionLocal, utc_now
+
+
+MAX_JOB_ATTEMPTS = 3
+ENQUEUE_CHUNK_SIZE = 500
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: int
+    item_id: int
+    attempts: int
+
+
+def enqueue_jobs(
+    job_type: str,
+    item_ids: list[int],
+    priority: int,
+    aging_seconds: float,
+    *,
+    now: float,
+) -> None:
+    """Insert jobs, or move existing ones ahead when ``priority`` is lower."""
+    unique_ids = list(dict.fromkeys(item_ids))
+    if not unique_ids:
+        return
+    created_at = utc_now()
+    with SessionLocal() as database:
+        for start in range(0, len(unique_ids), ENQUEUE_CHUNK_SIZE):
+            statement = insert(Job).values([
+                {
+                    "job_type": job_type,
+                    "item_id": item_id,
+                    "priority": priority,
+                    "rank": now + priority * aging_seconds,
+                    "attempts": 0,
+                    "created_at": created_at,
+                }
+                for item_id in unique_ids[start:start + ENQUEUE_CHUNK_SIZE]
+            ])
+            # Rank is enqueue time plus priority * aging, so lowering the
+            # priority by one step moves the job ahead by one aging period.
+            statement = statement.on_conflict_do_update(
+                index_elements=["job_type", "item_id"],
+                set_={
+                    "priority": func.min(Job.priority, statement.excluded.priority),
+                    "rank": func.min(
+                        Job.rank,
+                        Job.rank - (Job.priority - statement.excluded.priority) * aging_seconds,
+                    ),
+                },
+            )
+            database.execute(statement)
+        database.commit()
+
+
+def claim_jobs(
+    job_type: str,
+    owner: str,
+    limit: int,
+    lease_seconds: float,
+    *,
+    now: float,
+) -> list[ClaimedJob]:
+    if limit < 1:
+        return []
+    candidates = (
+        select(Job.id)
+        .where(Job.job_type == job_type, _claimable(now))
+        .order_by(Job.rank, Job.id)
+        .limit(limit)
+    )
+    statement = (
+        update(Job)
+        .where(Job.id.in_(candidates))
+        .values(
+            lease_owner=owner,
+            lease_expires_at=now + lease_seconds,
+            attempts=Job.attempts + 1,
+        )
+        .returning(Job.id, Job.item_id, Job.attempts, Job.rank)
+        .execution_options(synchronize_session=False)
+    )
+    with SessionLocal() as database:
+        rows = database.execute(statement).all()
+        database.commit()
+    return [
+        ClaimedJob(id=row.id, item_id=row.item_id, attempts=row.attempts)
+        for row in sorted(rows, key=lambda row: (row.rank, row.id))
+    ]
+
+
+def renew_leases(owner: str, job_ids: list[int], lease_seconds: float, *, now: float) -> None:
+    if not job_ids:
+        return
+    with SessionLocal() as database:
+        database.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), Job.lease_owner == owner)
+            .values(lease_expires_at=now + lease_seconds)
+            .execution_options(synchronize_session=False)
+        )
+        database.commit()
+
+
+def finish_job(job_id: int, owner: str) -> None:
+    """Delete a claimed job unless another worker took over its lease."""
+    with SessionLocal() as database:
+        database.execute(
+            delete(Job)
+            .where(Job.id == job_id, Job.lease_owner == owner)
+            .execution_options(synchronize_session=False)
+        )
+        database.commit()
+
+
+def job_counts(job_type: str, *, now: float) -> dict[str, int]:
+    with SessionLocal() as database:
+        queued, total = database.execute(
+            select(
+                func.count(Job.id).filter(_claimable(now)),
+                func.count(Job.id),
+            ).where(Job.job_type == job_type)
+        ).one()
+    return {"queued": queued, "running": total - queued}
+
+
+def jobs_ahead(job_type: str, item_ids: list[int], *, now: float) -> dict[int, int | None]:
+    """Return how many waiting jobs precede each item; ``None`` means leased."""
+    if not item_ids:
+        return {}
+    ahead = aliased(Job)
+    waiting_ahead = (
+        select(func.count(ahead.id))
+        .where(
+            ahead.job_type == Job.job_type,
+            or_(ahead.lease_owner.is_(None), ahead.lease_expires_at < now),
+            or_(
+                ahead.rank < Job.rank,
+                and_(ahead.rank == Job.rank, ahead.id < Job.id),
+            ),
+        )
+        .scalar_subquery()
+    )
+    with SessionLocal() as database:
+        rows = database.execute(
+            select(Job.item_id, _claimable(now), waiting_ahead)
+            .where(Job.job_type == job_type, Job.item_id.in_(set(item_ids)))
+        ).all()
+    return {
+        item_id: count if claimable else None
+        for item_id, claimable, count in rows
+    }
+
+
+def _claimable(now: float):
+    return or_(Job.lease_owner.is_(None), Job.lease_expires_at < now)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import bisect
+import struct
+
+from sqlalchemy.dialects.sqlite import insert
+
+from ..db import MovieKeyframes, utc_now
+
+
+def pack_keyframes(timestamps_ms: list[int]) -> bytes:
+    return struct.pack(f"<{len(timestamps_ms)}I", *timestamps_ms)
+
+
+def unpack_keyframes(data: bytes) -> list[int]:
+    return list(struct.unpack(f"<{len(data) // 4}I", data))
+
+
+def store_keyframes(database, movie_id: int, timestamps_ms: list[int]) -> None:
+    values = {
+        "timestamps": pack_keyframes(timestamps_ms),
+        "keyframe_count": len(timestamps_ms),
+        "created_at": utc_now(),
+    }
+    database.execute(
+        insert(MovieKeyframes)
+        .values(movie_file_id=movie_id, **values)
+        .on_conflict_do_update(index_elements=["movie_file_id"], set_=values)
+    )
+
+
+def load_keyframes(database, movie_id: int) -> list[int] | None:
+    index = database.get(MovieKeyframes, movie_id)
+    return unpack_keyframes(index.timestamps) if index is not None else None
+
+
+def nearest_keyframe(
+    keyframes: list[int],
+    timestamp_ms: int,
+    limit_ms: int | None = None,
+) -> int | None:
+    """Return the keyframe closest to ``timestamp_ms``, ignoring ones past ``limit_ms``."""
+    if limit_ms is not None:
+        keyframes = keyframes[:bisect.bisect_right(keyframes, limit_ms)]
+    if not keyframes:
+        return None
+    index = bisect.bisect_left(keyframes, timestamp_ms)
+    candidates = keyframes[max(index - 1, 0):index + 1]
+    return min(candidates, key=lambda keyframe: abs(keyframe - timestamp_ms))
+
+
+def seek_start_ms(keyframes: list[int] | None, timestamp_ms: int) -> int:
+    """Return where an ffmpeg ``-ss`` for ``timestamp_ms`` should land.
+
+    With an index the seek goes to the keyframe at or before the timestamp,
+    so the demuxer lands on it directly and the caller trims the frames up to
+    ``timestamp_ms``. The seek starts 1 ms early because the index stores
+    rounded timestamps. Index times are relative to the file's start time,
+    the same origin ``-ss`` uses.
+    """
+    if keyframes:
+        index = bisect.bisect_right(keyframes, timestamp_ms) - 1
+        if index >= 0:
+            return max(keyframes[index] - 1, 0)
+    return timestamp_ms
+
+
+def is_keyframe(keyframes: list[int] | None, timestamp_ms: int) -> bool:
+    if not keyframes:
+        return False
+    index = bisect.bisect_left(keyframes, timestamp_ms)
+    return index < len(keyframes) and keyframes[index] == timestamp_ms
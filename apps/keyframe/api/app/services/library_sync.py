@@ -0,0 +1,206 @@
+"""Keep movies below imported folders in sync with the file system.
+
+Every folder imported through the folder picker is remembered as a library
+root. A sync rescans the roots with :func:`scan_video_folder` and compares the
+stat data with the stored rows: new files are registered, files whose size or
+modification time changed are queued for metadata (probe, keyframes and
+thumbnail) again, and movies whose file is gone are marked failed with
+``MISSING_FILE_ERROR``. Scenes and images of a missing movie are kept, so a
+file that comes back picks up where it left off.
+
+A root that cannot be listed, or whose scan reported errors, is not checked
+for missing files; an unmounted NAS share must not mark its whole library
+missing.
+
+The outcome of the last sync round, including an error that stopped it, is
+kept in memory for :func:`library_sync_status`.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Callable
+
+from sqlalchemy import or_, select, update
+
+from ..db import LibraryFolder, MovieFile, SessionLocal, utc_now
+from .movie_import import (
+    MISSING_FILE_ERROR,
+    normalize_path,
+    register_movie_paths,
+    scan_video_folder,
+)
+from .status_events import publish_status
+
+
+SYNC_CHUNK_SIZE = 500
+_SYNC_LOCK = threading.Lock()
+_status_lock = threading.Lock()
+_last_sync: dict = {"finished_at": None, "error": None}
+
+
+def remember_library_folder(folder: str | os.PathLike[str]) -> None:
+    """Add ``folder`` as a library root unless an existing root already covers it."""
+    root = os.path.realpath(os.fspath(folder))
+    normalized = normalize_path(root)
+    with SessionLocal() as database:
+        existing = database.scalars(select(LibraryFolder)).all()
+        if any(_contains(folder_row.normalized_path, normalized) for folder_row in existing):
+            return
+        for folder_row in existing:
+            if _contains(normalized, folder_row.normalized_path):
+                database.delete(folder_row)
+        database.add(LibraryFolder(path=root, normalized_path=normalized))
+        database.commit()
+
+
+def list_library_folders() -> list[dict]:
+    with SessionLocal() as database:
+        folders = database.scalars(select(LibraryFolder).order_by(LibraryFolder.id)).all()
+        return [
+            {
+                "id": folder.id,
+                "path": folder.path,
+                "last_synced_at": folder.last_synced_at.isoformat() if folder.last_synced_at else None,
+            }
+            for folder in folders
+        ]
+
+
+def library_sync_status() -> dict:
+    """When the last sync round ended and the error that stopped it, if any."""
+    with _status_lock:
+        return dict(_last_sync)
+
+
+def sync_library() -> dict:
+    """Rescan every library root; return the affected movie ids.
+
+    ``added_ids`` and ``updated_ids`` need metadata processing,
+    ``missing_ids`` were marked failed because their file is gone.
+    """
+    try:
+        result = _sync_roots()
+    except Exception as error:
+        _record_sync(str(error) or error.__class__.__name__)
+        raise
+    _record_sync(None)
+    return result
+
+
+def _sync_roots() -> dict:
+    with SessionLocal() as database:
+        roots = database.execute(
+            select(LibraryFolder.id, LibraryFolder.path, LibraryFolder.normalized_path).order_by(
+                LibraryFolder.id
+            )
+        ).all()
+
+    result: dict = {
+        "folder_count": len(roots),
+        "added_ids": [],
+        "updated_ids": [],
+        "missing_ids": [],
+        "failures": [],
+    }
+    with _SYNC_LOCK:
+        for folder_id, path, normalized in roots:
+            if not os.path.isdir(path):
+                result["failures"].append(f"{path}: 폴더를 찾을 수 없습니다")
+                continue
+            videos, scan_failures = scan_video_folder(path)
+            registered = register_movie_paths(videos, scan_failures)
+            result["added_ids"].extend(registered["added_ids"])
+            result["updated_ids"].extend(registered["updated_ids"])
+            result["failures"].extend(registered["failures"])
+            if registered["failed_count"] == 0:
+                present = {video.normalized_path for video in videos}
+                result["missing_ids"].extend(_mark_missing(normalized, present))
+            with SessionLocal() as database:
+                database.execute(
+                    update(LibraryFolder)
+                    .where(LibraryFolder.id == folder_id)
+                    .values(last_synced_at=utc_now())
+                )
+                database.commit()
+    result["failures"] = result["failures"][:20]
+    return result
+
+
+class LibrarySyncWorker:
+    """Runs :func:`sync_library` at startup and then every ``interval_seconds``.
+
+    ``on_changes`` receives the ids of added and changed movies. An interval of
+    ``0`` disables periodic syncs; the API endpoint still works.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float,
+        on_changes: Callable[[list[int]], None],
+    ) -> None:
+        self.interval_seconds = interval_seconds
+        self.on_changes = on_changes
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="library-sync", daemon=True)
+
+    def start(self) -> None:
+        if self.interval_seconds > 0:
+            self._thread.start()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stopped.set()
+        if wait and self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                result = sync_library()
+                changed_ids = result["added_ids"] + result["updated_ids"]
+                if changed_ids:
+                    self.on_changes(changed_ids)
+            except Exception:
+                # sync_library recorded the error for library_sync_status; the
+                # next round retries.
+                pass
+            self._stopped.wait(self.interval_seconds)
+
+
+def _record_sync(error_message: str | None) -> None:
+    with _status_lock:
+        _last_sync["finished_at"] = utc_now().isoformat()
+        _last_sync["error"] = error_message
+
+
+def _mark_missing(root: str, present: set[str]) -> list[int]:
+    prefix = root.rstrip(os.sep) + os.sep
+    with SessionLocal() as database:
+        registered = database.execute(
+            select(MovieFile.id, MovieFile.normalized_path).where(
+                MovieFile.normalized_path.startswith(prefix, autoescape=True),
+                or_(
+                    MovieFile.metadata_error.is_(None),
+                    MovieFile.metadata_error != MISSING_FILE_ERROR,
+                ),
+            )
+        ).all()
+        missing_ids = sorted(
+            movie_id for movie_id, normalized in registered if normalized not in present
+        )
+        now = utc_now()
+        for start in range(0, len(missing_ids), SYNC_CHUNK_SIZE):
+            database.execute(
+                update(MovieFile)
+                .where(MovieFile.id.in_(missing_ids[start : start + SYNC_CHUNK_SIZE]))
+                .values(metadata_status="failed", metadata_error=MISSING_FILE_ERROR, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        database.commit()
+    publish_status("movie", *missing_ids)
+    return missing_ids
+
+
+def _contains(parent: str, child: str) -> bool:
+    return child == parent or child.startswith(parent.rstrip(os.sep) + os.sep)
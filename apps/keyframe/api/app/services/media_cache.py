@@ -0,0 +1,80 @@
+"""Versioned URLs and HTTP validators for generated files under ``DATA_DIR``.
+
+A file's version is a digest of its size and modification time, so
+``...?v=<version>`` names one content and may be cached for good. The strong
+ETag depends only on the item and the version, which lets a revalidation be
+answered with 304 before any database lookup or file access.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from fastapi import Response
+from fastapi.responses import FileResponse
+
+from ..db import DATA_DIR
+
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def file_version(path: Path) -> str | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return hashlib.blake2b(
+        f"{stat.st_size}:{stat.st_mtime_ns}".encode("ascii"), digest_size=8
+    ).hexdigest()
+
+
+def versioned_url(url: str, relative_path: str | None) -> str | None:
+    """Return ``url?v=<version>`` for a ``DATA_DIR`` file, or ``None`` if it is missing."""
+    if not relative_path:
+        return None
+    version = file_version(DATA_DIR / relative_path)
+    return f"{url}?v={version}" if version else None
+
+
+def media_etag(kind: str, item_id: int, version: str) -> str:
+    return f'"{kind}-{item_id}-{version}"'
+
+
+def not_modified(
+    kind: str,
+    item_id: int,
+    version: str | None,
+    if_none_match: str | None,
+) -> Response | None:
+    """Answer 304 when the client already holds the requested version."""
+    if not version or if_none_match is None:
+        return None
+    etag = media_etag(kind, item_id, version)
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    if etag not in candidates:
+        return None
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
+
+
+def versioned_file_response(
+    path: Path,
+    media_type: str,
+    kind: str,
+    item_id: int,
+    version: str | None,
+) -> FileResponse:
+    """Serve ``path``; only a request for its current version is cached for good."""
+    current = file_version(path)
+    if current is None:
+        raise FileNotFoundError(path)
+    cache_control = IMMUTABLE_CACHE_CONTROL if version == current else "no-cache"
+    return FileResponse(
+        path,
+        media_type=media_type,
+        headers={"ETag": media_etag(kind, item_id, current), "Cache-Control": cache_control},
+    )
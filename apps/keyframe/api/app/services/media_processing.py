@@ -4,14 +4,42 @@ import json
 import os
 import shutil
 import subprocess
+import tempfile
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
 from fractions import Fraction
+from pathlib import Path
+from typing import Protocol
 
-from sqlalchemy import select
+from sqlalchemy import exists, select, update
 
-from ..db import DATA_DIR, THUMBNAIL_DIR, MovieFile, SessionLocal, utc_now
+from ..db import DATA_DIR, THUMBNAIL_DIR, Job, MovieFile, SessionLocal, utc_now
+from .fingerprint import content_fingerprint, store_fingerprint
+from .keyframes import is_keyframe, nearest_keyframe, seek_start_ms, store_keyframes
+from .probe_cache import METADATA_FIELDS, lookup_probe, probe_key, store_probe
+from .status_events import publish_status
+from .trickplay import (
+    TrickplayLayout,
+    new_trickplay_version,
+    remove_stale_trickplay,
+    reuse_trickplay,
+    sprite_path,
+    store_trickplay,
+    trickplay_interval_ms,
+    trickplay_layout,
+)
 
 
 ACTIVE_METADATA_STATUSES = ("pending", "processing")
+THUMBNAIL_WIDTH = 640
+THUMBNAIL_QUALITY = 78
+SNAPSHOT_WIDTH = 1280
+SNAPSHOT_QUALITY = 90
+SCENE_SCORE_WIDTH = 160
+TRICKPLAY_QUALITY = 60
+# Timestamps this close share one seeked input; decoding the frames between
+# them is cheaper than opening, probing and seeking the file again.
+FRAME_GROUP_SPAN_MS = 10_000
 
 
 def _run_command(command: list[str], timeout: int) -> subprocess.CompletedProcess[str]:
@@ -79,31 +107,184 @@ def probe_video(path: str) -> dict:
     }
 
 
-def create_thumbnail(path: str, movie_id: int, duration_ms: int | None) -> str:
-    THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+def probe_keyframes(path: str) -> list[int]:
+    """Return sorted keyframe timestamps (ms) of the first video stream.
+
+    Only packet flags are read, so the file is demuxed but not decoded.
+    Times are relative to the container start time, like ``-ss`` and the
+    player's ``currentTime``, so MPEG-TS and other files that do not start at
+    zero index the frames a seek actually reaches.
+    """
+    result = _run_command(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags:format=start_time",
+            "-of", "csv=p=0", path,
+        ],
+        timeout=600,
+    )
+    packets: list[tuple[str, str]] = []
+    start_seconds = 0.0
+    for line in result.stdout.splitlines():
+        pts_time, separator, flags = line.partition(",")
+        if not separator:
+            # The format section is the only line without a flags column.
+            try:
+                start_seconds = float(pts_time)
+            except ValueError:
+                pass
+            continue
+        packets.append((pts_time, flags))
+    keyframes: set[int] = set()
+    for pts_time, flags in packets:
+        if "K" not in flags or pts_time in ("", "N/A"):
+            continue
+        try:
+            timestamp_ms = round((float(pts_time) - start_seconds) * 1000)
+        except ValueError:
+            continue
+        if timestamp_ms >= 0:
+            keyframes.add(timestamp_ms)
+    return sorted(keyframes)
+
+
+def stream_scene_scores(path: str) -> Iterator[tuple[int, float]]:
+    """Yield ``(timestamp_ms, score)`` for every frame of the first video stream.
+
+    The score is ffmpeg's scene-change score (0 to 1) on frames downscaled to
+    ``SCENE_SCORE_WIDTH``. Lines are read while ffmpeg decodes, so memory
+    stays flat however long the movie is; closing the generator stops ffmpeg.
+    """
+    # No -copyts: ffmpeg shifts input timestamps by -start_time, so pts_time
+    # already counts from the file start like the keyframe index and -ss.
+    # Subtracting start_time again here would shift every scene backwards.
+    command = [
+        "ffmpeg", "-hide_banner", "-nostdin", "-v", "error",
+        "-i", path, "-map", "0:v:0",
+        "-vf", (
+            f"scale={SCENE_SCORE_WIDTH}:-2,select='gte(scene,0)',"
+            "metadata=print:key=lavfi.scene_score:file=-"
+        ),
+        "-f", "null", "-",
+    ]
+    creation_flags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                creationflags=creation_flags,
+            )
+        except FileNotFoundError as error:
+            raise RuntimeError("ffmpeg 실행 파일을 찾을 수 없습니다") from error
+        try:
+            timestamp_ms: int | None = None
+            for line in process.stdout:
+                if line.startswith("frame:"):
+                    pts_time = line.rpartition("pts_time:")[2].strip()
+                    try:
+                        timestamp_ms = round(float(pts_time) * 1000)
+                    except ValueError:
+                        timestamp_ms = None
+                elif line.startswith("lavfi.scene_score=") and timestamp_ms is not None:
+                    try:
+                        score = float(line.partition("=")[2])
+                    except ValueError:
+                        continue
+                    yield timestamp_ms, score
+            if process.wait() != 0:
+                stderr.seek(0)
+                detail = stderr.read().decode("utf-8", errors="replace").strip()
+                raise RuntimeError(detail[-1200:] or "ffmpeg scene 분석이 실패했습니다")
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            process.stdout.close()
+
+
+def stream_ffmpeg_progress(arguments: list[str]) -> Iterator[int]:
+    """Run ``ffmpeg <arguments>`` and yield the output position in milliseconds.
+
+    Positions come from ffmpeg's ``-progress`` key/value stream, roughly twice
+    a second. Closing the generator stops ffmpeg.
+    """
+    command = [
+        "ffmpeg", "-hide_banner", "-nostdin", "-v", "error",
+        "-progress", "pipe:1", "-nostats",
+        *arguments,
+    ]
+    creation_flags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                creationflags=creation_flags,
+            )
+        except FileNotFoundError as error:
+            raise RuntimeError("ffmpeg 실행 파일을 찾을 수 없습니다") from error
+        try:
+            for line in process.stdout:
+                # out_time_us and the misnamed out_time_ms both hold microseconds.
+                if line.startswith("out_time_us="):
+                    try:
+                        yield max(0, int(line.partition("=")[2]) // 1000)
+                    except ValueError:
+                        continue
+            if process.wait() != 0:
+                stderr.seek(0)
+                detail = stderr.read().decode("utf-8", errors="replace").strip()
+                raise RuntimeError(detail[-1200:] or "ffmpeg 변환이 실패했습니다")
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            process.stdout.close()
+
+
+def thumbnail_time_ms(duration_ms: int | None, keyframes: list[int] | None) -> int:
     duration_seconds = (duration_ms or 0) / 1000
     primary_time = (
         min(max(duration_seconds * 0.1, 1.0), 60.0, max(duration_seconds - 0.1, 0.0))
         if duration_seconds > 0
         else 1.0
     )
+    timestamp_ms = round(primary_time * 1000)
+    if keyframes:
+        # Any frame near the primary time will do, and a keyframe decodes alone.
+        snapped = nearest_keyframe(keyframes, timestamp_ms, duration_ms)
+        if snapped is not None:
+            timestamp_ms = snapped
+    return timestamp_ms
+
+
+def write_thumbnail(
+    movie_id: int,
+    duration_ms: int | None,
+    keyframes: list[int] | None,
+    write_frame: Callable[[int, Path], None],
+) -> str:
+    """Write ``THUMBNAIL_DIR/<movie>.webp`` atomically, retrying at 0 s on failure."""
+    THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+    primary_ms = thumbnail_time_ms(duration_ms, keyframes)
     final_path = THUMBNAIL_DIR / f"{movie_id}.webp"
     temporary_path = THUMBNAIL_DIR / f"{movie_id}.tmp.webp"
-    attempts = [primary_time, 0.0] if primary_time > 0 else [primary_time]
+    attempts = [primary_ms, 0] if primary_ms > 0 else [primary_ms]
     last_error: RuntimeError | None = None
 
-    for timestamp in attempts:
+    for timestamp_ms in attempts:
         temporary_path.unlink(missing_ok=True)
         try:
-            _run_command(
-                [
-                    "ffmpeg", "-hide_banner", "-loglevel", "error", "-ss",
-                    f"{timestamp:.3f}", "-i", path, "-map", "0:v:0", "-frames:v", "1",
-                    "-vf", "scale=640:-2:force_original_aspect_ratio=decrease",
-                    "-c:v", "libwebp", "-q:v", "78", "-y", str(temporary_path),
-                ],
-                timeout=90,
-            )
+            write_frame(timestamp_ms, temporary_path)
             if not temporary_path.exists() or temporary_path.stat().st_size == 0:
                 raise RuntimeError("FFmpeg가 썸네일 파일을 만들지 못했습니다")
             temporary_path.replace(final_path)
@@ -115,6 +296,243 @@ def create_thumbnail(path: str, movie_id: int, duration_ms: int | None) -> str:
     raise last_error or RuntimeError("썸네일을 만들지 못했습니다")
 
 
+def create_thumbnail(
+    path: str,
+    movie_id: int,
+    duration_ms: int | None,
+    keyframes: list[int] | None = None,
+) -> str:
+    return write_thumbnail(
+        movie_id,
+        duration_ms,
+        keyframes,
+        lambda timestamp_ms, target: SubprocessMediaBackend().write_frames(
+            path,
+            [(timestamp_ms, target)],
+            width=THUMBNAIL_WIDTH,
+            quality=THUMBNAIL_QUALITY,
+            keyframes=keyframes,
+            timeout=90,
+        ),
+    )
+
+
+def create_trickplay_sprite(
+    path: str,
+    movie_id: int,
+    layout: TrickplayLayout,
+    version: int,
+    keyframes: list[int] | None = None,
+) -> None:
+    """Write the movie's tiled sprite sheet in a single decode pass.
+
+    When every keyframe gap fits in one interval only keyframes are decoded;
+    the ``fps`` filter repeats the latest one for each tile.
+    """
+    target = sprite_path(movie_id, version)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = target.with_name(f"{movie_id}-{version}.tmp.webp")
+    temporary_path.unlink(missing_ok=True)
+    keyframes_only = bool(keyframes) and all(
+        later - earlier <= layout.interval_ms
+        for earlier, later in zip(keyframes, keyframes[1:])
+    )
+    try:
+        _run_command(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                *(["-skip_frame", "nokey"] if keyframes_only else []),
+                "-i", path, "-map", "0:v:0", "-an",
+                "-vf", (
+                    f"fps=1000/{layout.interval_ms}:round=down,"
+                    f"scale={layout.tile_width}:{layout.tile_height},"
+                    f"tile={layout.columns}x{layout.rows}"
+                ),
+                "-frames:v", "1",
+                "-c:v", "libwebp", "-q:v", str(TRICKPLAY_QUALITY),
+                "-y", str(temporary_path),
+            ],
+            timeout=1800,
+        )
+        if not temporary_path.is_file() or temporary_path.stat().st_size == 0:
+            raise RuntimeError("FFmpeg가 trickplay sprite를 만들지 못했습니다")
+        os.replace(temporary_path, target)
+    finally:
+        temporary_path.unlink(missing_ok=True)
+
+
+@dataclass(frozen=True)
+class MovieInspection:
+    metadata: dict
+    keyframes: list[int] | None
+    thumbnail_path: str | None
+    thumbnail_error: str | None = None
+
+
+class MediaBackend(Protocol):
+    name: str
+
+    def inspect_movie(self, path: str, movie_id: int) -> MovieInspection:
+        """Probe metadata and keyframes and write the movie thumbnail.
+
+        Raises when the file cannot be probed; a thumbnail failure is
+        reported through ``thumbnail_error`` so the metadata is kept.
+        """
+
+    def write_frames(
+        self,
+        path: str,
+        frames: list[tuple[int, Path]],
+        *,
+        width: int,
+        quality: int,
+        keyframes: list[int] | None = None,
+        timeout: int | None = None,
+    ) -> None:
+        """Encode the frame at each ``(timestamp_ms, target)`` as WebP.
+
+        Targets that could not be produced are left missing or empty.
+        """
+
+
+class SubprocessMediaBackend:
+    """Runs ffprobe and ffmpeg as child processes for every operation."""
+
+    name = "ffmpeg"
+
+    def inspect_movie(self, path: str, movie_id: int) -> MovieInspection:
+        metadata = probe_video(path)
+        try:
+            keyframes = probe_keyframes(path) or None
+        except RuntimeError:
+            # Seeking works without the index, only slower.
+            keyframes = None
+        try:
+            thumbnail_path = create_thumbnail(
+                path, movie_id, metadata.get("duration_ms"), keyframes
+            )
+        except (OSError, RuntimeError) as error:
+            return MovieInspection(
+                metadata, keyframes, None, str(error) or error.__class__.__name__
+            )
+        return MovieInspection(metadata, keyframes, thumbnail_path)
+
+    def write_frames(
+        self,
+        path: str,
+        frames: list[tuple[int, Path]],
+        *,
+        width: int,
+        quality: int,
+        keyframes: list[int] | None = None,
+        timeout: int | None = None,
+    ) -> None:
+        command = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+        graphs: list[str] = []
+        outputs: list[str] = []
+        for group_index, group in enumerate(_frame_groups(frames)):
+            first_ms = group[0][0]
+            seek_ms = seek_start_ms(keyframes, first_ms)
+            if len(group) == 1 and is_keyframe(keyframes, first_ms):
+                # Only the keyframe itself has to be decoded.
+                command += ["-skip_frame", "nokey"]
+            # The decoder runs on from the seek point; trim picks each frame.
+            command += ["-ss", f"{seek_ms / 1000:.3f}", "-i", path]
+            labels = [f"f{group_index}_{index}" for index in range(len(group))]
+            graphs.append(
+                f"[{group_index}:v:0]split={len(group)}" + "".join(f"[{label}s]" for label in labels)
+            )
+            for label, (timestamp_ms, target) in zip(labels, group):
+                offset_ms = timestamp_ms - seek_ms - 1
+                trim = f"trim=start={offset_ms / 1000:.3f}," if offset_ms > 0 else ""
+                graphs.append(
+                    f"[{label}s]{trim}scale={width}:-2:force_original_aspect_ratio=decrease[{label}]"
+                )
+                outputs += [
+                    "-map", f"[{label}]", "-frames:v", "1",
+                    "-c:v", "libwebp", "-q:v", str(quality), "-y", str(target),
+                ]
+        command += ["-filter_complex", ";".join(graphs), *outputs]
+        _run_command(command, timeout=timeout or 180 + 30 * (len(frames) - 1))
+
+
+def _frame_groups(frames: list[tuple[int, Path]]) -> list[list[tuple[int, Path]]]:
+    """Split frames, by timestamp, into runs spanning at most ``FRAME_GROUP_SPAN_MS``."""
+    groups: list[list[tuple[int, Path]]] = []
+    for frame in sorted(frames, key=lambda frame: frame[0]):
+        if groups and frame[0] - groups[-1][0][0] <= FRAME_GROUP_SPAN_MS:
+            groups[-1].append(frame)
+        else:
+            groups.append([frame])
+    return groups
+
+
+class FallbackMediaBackend:
+    """Uses ``primary`` and retries an operation with ``fallback`` when it fails."""
+
+    def __init__(self, primary: MediaBackend, fallback: MediaBackend) -> None:
+        self.name = primary.name
+        self._primary = primary
+        self._fallback = fallback
+
+    def inspect_movie(self, path: str, movie_id: int) -> MovieInspection:
+        try:
+            inspection = self._primary.inspect_movie(path, movie_id)
+        except Exception:
+            return self._fallback.inspect_movie(path, movie_id)
+        if inspection.thumbnail_error is None:
+            return inspection
+        return self._fallback.inspect_movie(path, movie_id)
+
+    def write_frames(
+        self,
+        path: str,
+        frames: list[tuple[int, Path]],
+        *,
+        width: int,
+        quality: int,
+        keyframes: list[int] | None = None,
+        timeout: int | None = None,
+    ) -> None:
+        options = {"width": width, "quality": quality, "keyframes": keyframes, "timeout": timeout}
+        try:
+            self._primary.write_frames(path, frames, **options)
+        except Exception:
+            self._fallback.write_frames(path, frames, **options)
+            return
+        missing = [
+            frame for frame in frames
+            if not frame[1].is_file() or frame[1].stat().st_size == 0
+        ]
+        if missing:
+            self._fallback.write_frames(path, missing, **options)
+
+
+_media_backend: MediaBackend = SubprocessMediaBackend()
+
+
+def create_media_backend(name: str) -> MediaBackend:
+    if name == "ffmpeg":
+        return SubprocessMediaBackend()
+    try:
+        from .pyav_backend import PyAvMediaBackend
+    except ImportError as error:
+        if name == "pyav":
+            raise RuntimeError("PyAV(av) 패키지가 설치되지 않았습니다") from error
+        return SubprocessMediaBackend()
+    return FallbackMediaBackend(PyAvMediaBackend(), SubprocessMediaBackend())
+
+
+def configure_media_backend(name: str) -> MediaBackend:
+    global _media_backend
+    _media_backend = create_media_backend(name)
+    return _media_backend
+
+
+def media_backend() -> MediaBackend:
+    return _media_backend
+
+
 def process_movie_metadata(movie_id: int) -> None:
     with SessionLocal() as database:
         movie = database.get(MovieFile, movie_id)
@@ -124,44 +542,130 @@ def process_movie_metadata(movie_id: int) -> None:
         movie.metadata_error = None
         movie.updated_at = utc_now()
         source_path = movie.path
+        normalized_path = movie.normalized_path
         database.commit()
+    publish_status("movie", movie_id)
 
     metadata: dict = {}
+    keyframes: list[int] | None = None
     thumbnail_path: str | None = None
     error_message: str | None = None
-    try:
-        metadata = probe_video(source_path)
-        thumbnail_path = create_thumbnail(source_path, movie_id, metadata.get("duration_ms"))
-    except (OSError, RuntimeError, ValueError, json.JSONDecodeError) as error:
-        error_message = str(error) or error.__class__.__name__
+    fingerprints: list[str | None] = []
+
+    def fingerprint() -> str | None:
+        # Reads a few MiB, so it runs at most once and not at all on a key hit.
+        if not fingerprints:
+            try:
+                fingerprints.append(content_fingerprint(source_path))
+            except OSError:
+                fingerprints.append(None)
+        return fingerprints[0]
+
+    # An unchanged file that was probed before, or a copy of a ready movie,
+    # skips ffprobe, the thumbnail and, with a matching layout, the sprite.
+    key = probe_key(normalized_path, source_path)
+    cached = lookup_probe(key, movie_id, fingerprint) if key is not None else None
+    if cached is not None:
+        metadata = cached.metadata
+        keyframes = cached.keyframes
+        thumbnail_path = cached.thumbnail_path
+        if cached.fingerprint is not None:
+            fingerprints[:] = [cached.fingerprint]
+    else:
+        try:
+            inspection = media_backend().inspect_movie(source_path, movie_id)
+            metadata = inspection.metadata
+            keyframes = inspection.keyframes
+            thumbnail_path = inspection.thumbnail_path
+            error_message = inspection.thumbnail_error
+        except (OSError, RuntimeError, ValueError, json.JSONDecodeError) as error:
+            error_message = str(error) or error.__class__.__name__
+        if key is not None and thumbnail_path and not error_message:
+            store_probe(key, metadata, keyframes, thumbnail_path, fingerprint())
+
+    layout = _trickplay_layout(metadata) if not error_message else None
+    trickplay_version = new_trickplay_version()
+    reused_version = (
+        reuse_trickplay(cached.source_movie_id, movie_id, layout, trickplay_version)
+        if layout is not None and cached is not None and cached.source_movie_id is not None
+        else None
+    )
+    if reused_version is not None:
+        trickplay_version = reused_version
+    elif layout is not None:
+        try:
+            create_trickplay_sprite(source_path, movie_id, layout, trickplay_version, keyframes)
+        except (OSError, RuntimeError):
+            # Previews are optional; the movie stays usable without them and
+            # the detail view simply reports no trickplay_url.
+            layout = None
 
     with SessionLocal() as database:
         movie = database.get(MovieFile, movie_id)
         if movie is None:
             return
-        for key in ("duration_ms", "width", "height", "fps", "video_codec", "audio_codec"):
-            if key in metadata:
-                setattr(movie, key, metadata[key])
+        for field in METADATA_FIELDS:
+            if field in metadata:
+                setattr(movie, field, metadata[field])
         movie.thumbnail_path = thumbnail_path
         movie.metadata_status = "failed" if error_message else "ready"
         movie.metadata_error = error_message
         movie.updated_at = utc_now()
+        if keyframes:
+            store_keyframes(database, movie_id, keyframes)
+        content = fingerprint()
+        if content is not None:
+            store_fingerprint(database, movie_id, content)
+        if layout is not None:
+            store_trickplay(database, movie_id, layout, trickplay_version)
         database.commit()
+    if layout is not None:
+        # Clients that still hold an older index are sent the current one.
+        remove_stale_trickplay(movie_id, trickplay_version)
+    publish_status("movie", movie_id)
+
+
+def _trickplay_layout(metadata: dict) -> TrickplayLayout | None:
+    interval_ms = trickplay_interval_ms()
+    duration_ms = metadata.get("duration_ms")
+    width, height = metadata.get("width"), metadata.get("height")
+    if not interval_ms or not duration_ms or not width or not height:
+        return None
+    return trickplay_layout(duration_ms, width, height, interval_ms)
+
+
+def fail_movie_metadata(movie_id: int, error_message: str) -> None:
+    """Mark an active movie failed when its metadata job cannot finish."""
+    with SessionLocal() as database:
+        database.execute(
+            update(MovieFile)
+            .where(
+                MovieFile.id == movie_id,
+                MovieFile.metadata_status.in_(ACTIVE_METADATA_STATUSES),
+            )
+            .values(
+                metadata_status="failed",
+                metadata_error=error_message[-2000:],
+                updated_at=utc_now(),
+            )
+        )
+        database.commit()
+    publish_status("movie", movie_id)
 
 
 def reset_interrupted_jobs() -> list[int]:
+    """Return active movies that have no row in the jobs table."""
+    orphaned = ~exists().where(Job.job_type == "metadata", Job.item_id == MovieFile.id)
     with SessionLocal() as database:
-        processing = database.scalars(
-            select(MovieFile).where(MovieFile.metadata_status == "processing")
-        ).all()
-        for movie in processing:
-            movie.metadata_status = "pending"
-            movie.metadata_error = None
-            movie.updated_at = utc_now()
-        database.flush()
+        database.execute(
+            update(MovieFile)
+            .where(MovieFile.metadata_status == "processing", orphaned)
+            .values(metadata_status="pending", metadata_error=None, updated_at=utc_now())
+            .execution_options(synchronize_session=False)
+        )
         pending_ids = database.scalars(
             select(MovieFile.id)
-            .where(MovieFile.metadata_status == "pending")
+            .where(MovieFile.metadata_status == "pending", orphaned)
             .order_by(MovieFile.id)
         ).all()
         database.commit()
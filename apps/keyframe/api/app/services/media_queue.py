@@ -1,61 +1,174 @@
 from __future__ import annotations
 
-import threading
-from concurrent.futures import ThreadPoolExecutor
+import os
+import socket
 from typing import Callable
+from uuid import uuid4
 
 from fastapi import FastAPI
 
-from .media_processing import process_movie_metadata, reset_interrupted_jobs
-from .playback import normalize_playback_states
-from .scene_processing import process_scene, reset_scene_jobs
+from ..settings import KeyframeSettings
+from .frame_cache import configure_frame_cache
+from .image_generation import fail_image_job, process_image_job, reset_image_jobs
+from .library_sync import LibrarySyncWorker
+from .media_processing import (
+    configure_media_backend,
+    fail_movie_metadata,
+    process_movie_metadata,
+    reset_interrupted_jobs,
+)
+from .playback import (
+    fail_playback,
+    normalize_playback_states,
+    process_playback,
+    reset_playback_jobs,
+)
+from .scene_detection import fail_detection_job, process_detection_job, reset_detection_jobs
+from .scene_processing import fail_scene, process_scene, reset_scene_jobs
+from .trickplay import configure_trickplay
+from .worker_pool import BACKGROUND_PRIORITY, INTERACTIVE_PRIORITY, JobWorkerPool
+
+
+MAX_METADATA_WORKERS = 32
 
 
 def _schedule(
     app: FastAPI,
     task_type: str,
     item_ids: list[int],
-    processor: Callable[[int], None],
+    priority: int,
 ) -> None:
-    for item_id in item_ids:
-        key = (task_type, item_id)
-        with app.state.queue_lock:
-            if key in app.state.queued_tasks:
-                continue
-            app.state.queued_tasks.add(key)
+    app.state.media_pools[task_type].submit(item_ids, priority)
 
-        def run_and_release(
-            current_id: int = item_id,
-            current_key: tuple[str, int] = key,
-        ) -> None:
-            try:
-                processor(current_id)
-            finally:
-                with app.state.queue_lock:
-                    app.state.queued_tasks.discard(current_key)
 
-        app.state.media_executor.submit(run_and_release)
+def schedule_movies(
+    app: FastAPI,
+    movie_ids: list[int],
+    priority: int = BACKGROUND_PRIORITY,
+) -> None:
+    _schedule(app, "metadata", movie_ids, priority)
+
+
+def schedule_scenes(
+    app: FastAPI,
+    scene_ids: list[int],
+    priority: int = BACKGROUND_PRIORITY,
+) -> None:
+    _schedule(app, "scene", scene_ids, priority)
 
 
-def schedule_movies(app: FastAPI, movie_ids: list[int]) -> None:
-    _schedule(app, "metadata", movie_ids, process_movie_metadata)
+def schedule_image_jobs(
+    app: FastAPI,
+    job_ids: list[int],
+    priority: int = INTERACTIVE_PRIORITY,
+) -> None:
+    _schedule(app, "image", job_ids, priority)
 
 
-def schedule_scenes(app: FastAPI, scene_ids: list[int]) -> None:
-    _schedule(app, "scene", scene_ids, process_scene)
+def schedule_detection_jobs(
+    app: FastAPI,
+    job_ids: list[int],
+    priority: int = INTERACTIVE_PRIORITY,
+) -> None:
+    _schedule(app, "detection", job_ids, priority)
 
 
-def start_media_queue(app: FastAPI) -> None:
-    app.state.media_executor = ThreadPoolExecutor(
-        max_workers=1,
-        thread_name_prefix="keyframe-media",
+def schedule_playback(
+    app: FastAPI,
+    movie_ids: list[int],
+    priority: int = INTERACTIVE_PRIORITY,
+) -> None:
+    _schedule(app, "playback", movie_ids, priority)
+
+
+def queue_positions(app: FastAPI, task_type: str, item_ids: list[int]) -> dict[int, dict]:
+    return app.state.media_pools[task_type].positions(item_ids)
+
+
+def attach_queue_status(app: FastAPI, task_type: str, items: list[dict]) -> list[dict]:
+    positions = queue_positions(app, task_type, [item["id"] for item in items])
+    for item in items:
+        item["queue"] = positions.get(item["id"])
+    return items
+
+
+def media_queue_stats(app: FastAPI) -> dict:
+    return {
+        task_type: pool.stats()
+        for task_type, pool in app.state.media_pools.items()
+    }
+
+
+def media_worker_counts(settings: KeyframeSettings) -> dict[str, int]:
+    metadata_workers = settings.media_metadata_workers or min(
+        MAX_METADATA_WORKERS, os.cpu_count() or 1
     )
-    app.state.queue_lock = threading.Lock()
-    app.state.queued_tasks = set()
+    return {
+        # ffprobe and thumbnail extraction are local subprocesses.
+        "metadata": metadata_workers,
+        # Scene analysis mostly waits on GP Station, which runs this many jobs at once.
+        "scene": settings.gpstation_job_slots,
+        # Image generation holds GP Station for minutes; keep it to one job.
+        "image": 1,
+        # Shot detection decodes whole movies; one at a time leaves CPU for the rest.
+        "detection": 1,
+        # Transcodes saturate the CPU on their own; remuxes are disk bound.
+        "playback": settings.playback_workers,
+    }
+
+
+def start_media_queue(app: FastAPI) -> None:
+    settings = app.state.settings
+    configure_media_backend(settings.media_backend)
+    configure_frame_cache(settings.frame_cache_max_mb * 1024 * 1024)
+    configure_trickplay(settings.trickplay_interval_seconds)
+    processors: dict[str, Callable[[int], None]] = {
+        "metadata": process_movie_metadata,
+        "scene": process_scene,
+        "image": process_image_job,
+        "detection": lambda job_id: process_detection_job(
+            job_id, on_scenes=lambda scene_ids: schedule_scenes(app, scene_ids)
+        ),
+        "playback": process_playback,
+    }
+    failure_handlers: dict[str, Callable[[int, str], None]] = {
+        "metadata": fail_movie_metadata,
+        "scene": fail_scene,
+        "image": fail_image_job,
+        "detection": fail_detection_job,
+        "playback": fail_playback,
+    }
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+    app.state.media_pools = {
+        task_type: JobWorkerPool(
+            task_type,
+            processors[task_type],
+            workers,
+            settings.media_queue_aging_seconds,
+            owner=owner,
+            lease_seconds=settings.media_job_lease_seconds,
+            on_failure=failure_handlers[task_type],
+        )
+        for task_type, workers in media_worker_counts(settings).items()
+    }
     normalize_playback_states()
+    # Jobs survive restarts in the jobs table; these only pick up items whose
+    # status is active but that have no job row, e.g. from older versions.
     schedule_scenes(app, reset_scene_jobs())
     schedule_movies(app, reset_interrupted_jobs())
+    schedule_image_jobs(app, reset_image_jobs())
+    schedule_detection_jobs(app, reset_detection_jobs())
+    schedule_playback(app, reset_playback_jobs(), BACKGROUND_PRIORITY)
+    app.state.library_sync = LibrarySyncWorker(
+        settings.library_sync_interval_seconds,
+        lambda movie_ids: schedule_movies(app, movie_ids),
+    )
+    app.state.library_sync.start()
 
 
 def stop_media_queue(app: FastAPI) -> None:
-    app.state.media_executor.shutdown(wait=True, cancel_futures=True)
+    app.state.library_sync.shutdown()
+    for pool in app.state.media_pools.values():
+        pool.shutdown(wait=False)
+    for pool in app.state.media_pools.values():
+        pool.shutdown(wait=True)
@@ -2,127 +2,288 @@ from __future__ import annotations
 
 import os
 import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import Iterable
 
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert
 
-from ..db import MovieFile, SessionLocal
+from ..db import MovieFile, SessionLocal, utc_now
+from .status_events import publish_status
 
 
 SUPPORTED_EXTENSIONS = frozenset(
     {".mp4", ".m4v", ".webm"}
 )
+# Directory listing waits on the file system, so threads overlap NAS round trips.
+SCAN_WORKERS = 8
+SCAN_PROGRESS_INTERVAL_SECONDS = 0.25
+# Rows per INSERT statement and transaction during registration.
+IMPORT_CHUNK_SIZE = 500
+# Set by library sync on movies whose file disappeared from a library folder.
+MISSING_FILE_ERROR = "원본 영상 파일을 찾을 수 없습니다"
 _IMPORT_LOCK = threading.Lock()
 
 
+@dataclass(frozen=True)
+class ScannedVideo:
+    """A video found by :func:`scan_video_folder` with its already resolved stat."""
+
+    path: str
+    size_bytes: int
+    modified_at: datetime
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    @property
+    def normalized_path(self) -> str:
+        # ``path`` is already real, so this skips normalize_path's realpath.
+        return os.path.normcase(self.path).casefold()
+
+
 def normalize_path(path: str | os.PathLike[str]) -> str:
     return os.path.normcase(os.path.realpath(os.fspath(path))).casefold()
 
 
-def scan_video_folder(folder: str | os.PathLike[str]) -> tuple[list[str], list[str]]:
-    videos: list[str] = []
+def scan_video_folder(
+    folder: str | os.PathLike[str],
+    on_progress: Callable[[int, int], None] | None = None,
+    workers: int = SCAN_WORKERS,
+) -> tuple[list[ScannedVideo], list[str]]:
+    """Find supported videos below ``folder`` without following directory links.
+
+    Directories are listed with ``os.scandir`` on ``workers`` threads and the
+    entries' stat results are kept, so registering the videos needs no further
+    file system calls. ``on_progress(directories, videos)`` is called while
+    scanning and once at the end.
+    """
+    root = os.path.realpath(os.fspath(folder))
+    videos: list[ScannedVideo] = []
     failures: list[str] = []
+    directory_count = 0
+    reported_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="movie-scan") as executor:
+        pending: set[Future] = {executor.submit(_list_directory, root)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdirectories, found, errors = future.result()
+                directory_count += 1
+                videos.extend(found)
+                failures.extend(errors)
+                pending.update(
+                    executor.submit(_list_directory, directory) for directory in subdirectories
+                )
+            now = time.monotonic()
+            if on_progress is not None and now - reported_at >= SCAN_PROGRESS_INTERVAL_SECONDS:
+                reported_at = now
+                on_progress(directory_count, len(videos))
+    if on_progress is not None:
+        on_progress(directory_count, len(videos))
 
-    def handle_walk_error(error: OSError) -> None:
-        failures.append(f"{error.filename or folder}: {error.strerror or error}")
-
-    for root, directories, filenames in os.walk(
-        folder,
-        followlinks=False,
-        onerror=handle_walk_error,
-    ):
-        directories[:] = [
-            name for name in directories if not Path(root, name).is_symlink()
-        ]
-        for filename in filenames:
-            candidate = Path(root, filename)
-            if candidate.suffix.casefold() in SUPPORTED_EXTENSIONS:
-                videos.append(str(candidate))
-
-    videos.sort(key=normalize_path)
+    videos.sort(key=lambda video: video.normalized_path)
     return videos, failures
 
 
+def _list_directory(directory: str) -> tuple[list[str], list[ScannedVideo], list[str]]:
+    subdirectories: list[str] = []
+    videos: list[ScannedVideo] = []
+    failures: list[str] = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif (
+                        os.path.splitext(entry.name)[1].casefold() in SUPPORTED_EXTENSIONS
+                        and entry.is_file()
+                    ):
+                        videos.append(_scanned_video(entry))
+                except OSError as error:
+                    failures.append(f"{entry.path}: {error.strerror or error}")
+    except OSError as error:
+        failures.append(f"{error.filename or directory}: {error.strerror or error}")
+    return subdirectories, videos, failures
+
+
+def _scanned_video(entry: os.DirEntry) -> ScannedVideo:
+    if entry.is_symlink():
+        path = os.path.realpath(entry.path)
+        file_stat = os.stat(path)
+    else:
+        path = entry.path
+        file_stat = entry.stat()
+    return ScannedVideo(path, file_stat.st_size, _modified_at(file_stat.st_mtime))
+
+
+def _modified_at(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=UTC).replace(tzinfo=None)
+
+
 def register_movie_paths(
     paths: Iterable[str | os.PathLike[str]],
     initial_failures: Iterable[str] = (),
 ) -> dict:
-    path_list = [os.fspath(path) for path in paths]
+    """Register new videos and queue changed ones for metadata again.
+
+    Already registered files with the same size and modification time are
+    counted as duplicates without being touched.
+    """
+    path_list = list(paths)
     failures = list(initial_failures)
     duplicate_count = 0
     candidates: dict[str, dict] = {}
 
     for raw_path in path_list:
         try:
-            candidate = Path(raw_path)
-            if candidate.suffix.casefold() not in SUPPORTED_EXTENSIONS:
-                raise ValueError("지원하지 않는 영상 확장자입니다")
-            resolved = candidate.resolve(strict=True)
-            if not resolved.is_file():
-                raise ValueError("일반 파일이 아닙니다")
-            file_stat = resolved.stat()
-            normalized = normalize_path(resolved)
+            if isinstance(raw_path, ScannedVideo):
+                video = raw_path
+            else:
+                video = _stat_video(os.fspath(raw_path))
+            normalized = video.normalized_path
             if normalized in candidates:
                 duplicate_count += 1
                 continue
+            resolved = Path(video.path)
             candidates[normalized] = {
                 "title": resolved.stem,
-                "path": str(resolved),
+                "path": video.path,
                 "normalized_path": normalized,
                 "ext": resolved.suffix.casefold(),
-                "size_bytes": file_stat.st_size,
-                "file_modified_at": datetime.fromtimestamp(
-                    file_stat.st_mtime,
-                    tz=UTC,
-                ).replace(tzinfo=None),
+                "size_bytes": video.size_bytes,
+                "file_modified_at": video.modified_at,
             }
         except (OSError, ValueError) as error:
-            failures.append(f"{raw_path}: {error}")
+            failures.append(f"{os.fspath(raw_path)}: {error}")
 
     added_ids: list[int] = []
-    with _IMPORT_LOCK, SessionLocal() as database:
-        normalized_paths = list(candidates)
-        existing: set[str] = set()
-        for start in range(0, len(normalized_paths), 500):
-            chunk = normalized_paths[start : start + 500]
-            existing.update(
-                database.scalars(
-                    select(MovieFile.normalized_path).where(
-                        MovieFile.normalized_path.in_(chunk)
-                    )
-                ).all()
-            )
-
-        for normalized, values in candidates.items():
-            if normalized in existing:
-                duplicate_count += 1
-                continue
-            movie = MovieFile(**values)
-            database.add(movie)
-            database.flush()
-            added_ids.append(movie.id)
-        database.commit()
+    updated_ids: list[int] = []
+    rows = list(candidates.values())
+    with SessionLocal() as database:
+        # A short transaction per chunk lets media workers commit their status
+        # updates between chunks of a large import.
+        for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+            chunk = rows[start : start + IMPORT_CHUNK_SIZE]
+            with _IMPORT_LOCK:
+                added, updated = _register_chunk(database, chunk)
+                database.commit()
+            added_ids.extend(added)
+            updated_ids.extend(updated)
+            publish_status("movie", *added, *updated)
+            duplicate_count += len(chunk) - len(added) - len(updated)
 
     return {
         "cancelled": False,
         "selected_count": len(path_list),
         "added_count": len(added_ids),
         "duplicate_count": duplicate_count,
+        "updated_count": len(updated_ids),
         "failed_count": len(failures),
         "added_ids": added_ids,
+        "updated_ids": updated_ids,
         "failures": failures[:20],
     }
 
 
+def _register_chunk(database, rows: list[dict]) -> tuple[list[int], list[int]]:
+    """Insert new rows and re-queue changed ones; return their ids in row order.
+
+    Rows whose path is already registered come back from the insert as
+    conflicts; only those are read again to compare size and mtime. A file
+    that was missing and came back is queued again even if it is unchanged.
+    """
+    now = utc_now()
+    inserted = dict(
+        database.execute(
+            insert(MovieFile)
+            .values(
+                [
+                    {**row, "metadata_status": "pending", "created_at": now, "updated_at": now}
+                    for row in rows
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["normalized_path"])
+            .returning(MovieFile.normalized_path, MovieFile.id)
+        ).all()
+    )
+    conflicts = {
+        row["normalized_path"]: row for row in rows if row["normalized_path"] not in inserted
+    }
+    registered = {}
+    if conflicts:
+        registered = {
+            normalized: (movie_id, size_bytes, modified_at, error)
+            for normalized, movie_id, size_bytes, modified_at, error in database.execute(
+                select(
+                    MovieFile.normalized_path,
+                    MovieFile.id,
+                    MovieFile.size_bytes,
+                    MovieFile.file_modified_at,
+                    MovieFile.metadata_error,
+                ).where(MovieFile.normalized_path.in_(list(conflicts)))
+            ).all()
+        }
+    changed = {
+        normalized: movie_id
+        for normalized, (movie_id, size_bytes, modified_at, error) in registered.items()
+        if error == MISSING_FILE_ERROR
+        or (size_bytes, modified_at)
+        != (conflicts[normalized]["size_bytes"], conflicts[normalized]["file_modified_at"])
+    }
+    if changed:
+        database.execute(
+            update(MovieFile),
+            [
+                {"id": movie_id, **_changed_values(conflicts[normalized], now)}
+                for normalized, movie_id in changed.items()
+            ],
+        )
+    added_ids = [inserted[row["normalized_path"]] for row in rows if row["normalized_path"] in inserted]
+    updated_ids = [changed[row["normalized_path"]] for row in rows if row["normalized_path"] in changed]
+    return added_ids, updated_ids
+
+
+def _stat_video(raw_path: str) -> ScannedVideo:
+    candidate = Path(raw_path)
+    if candidate.suffix.casefold() not in SUPPORTED_EXTENSIONS:
+        raise ValueError("지원하지 않는 영상 확장자입니다")
+    resolved = candidate.resolve(strict=True)
+    if not resolved.is_file():
+        raise ValueError("일반 파일이 아닙니다")
+    file_stat = resolved.stat()
+    return ScannedVideo(str(resolved), file_stat.st_size, _modified_at(file_stat.st_mtime))
+
+
+def _changed_values(row: dict, now) -> dict:
+    """Queue a file whose content changed since it was registered for metadata again."""
+    return {
+        "size_bytes": row["size_bytes"],
+        "file_modified_at": row["file_modified_at"],
+        "metadata_status": "pending",
+        "metadata_error": None,
+        "video_codec": None,
+        "audio_codec": None,
+        "playback_status": "unprepared",
+        "playback_error": None,
+        "updated_at": now,
+    }
+
+
 def empty_import_result(cancelled: bool = True) -> dict:
     return {
         "cancelled": cancelled,
         "selected_count": 0,
         "added_count": 0,
         "duplicate_count": 0,
+        "updated_count": 0,
         "failed_count": 0,
         "added_ids": [],
+        "updated_ids": [],
         "failures": [],
     }
@@ -1,9 +1,21 @@
 from __future__ import annotations
 
-from sqlalchemy import func, select
+from sqlalchemy import func, or_, select, tuple_
 
-from ..db import MovieFile, Scene, SessionLocal
+from ..db import (
+    MOVIE_SORT_KEYS,
+    MovieFile,
+    MovieFingerprint,
+    MovieKeyframes,
+    MovieTrickplay,
+    SessionLocal,
+)
+from .counters import counter_value, counter_values, movie_scene_count
+from .fingerprint import duplicate_movies
+from .media_cache import versioned_url
 from .media_processing import ACTIVE_METADATA_STATUSES
+from .playback import playback_progress
+from .trickplay import trickplay_url
 
 
 def iso_utc(value) -> str | None:
@@ -25,8 +37,8 @@ def serialize_movie(movie: MovieFile) -> dict:
         "metadata_status": movie.metadata_status,
         "metadata_error": movie.metadata_error,
         "thumbnail_url": (
-            f"/api/movies/{movie.id}/thumbnail"
-            if movie.metadata_status == "ready" and movie.thumbnail_path
+            versioned_url(f"/api/movies/{movie.id}/thumbnail", movie.thumbnail_path)
+            if movie.metadata_status == "ready"
             else None
         ),
         "created_at": iso_utc(movie.created_at),
@@ -34,31 +46,80 @@ def serialize_movie(movie: MovieFile) -> dict:
     }
 
 
+def stream_url(movie: MovieFile) -> str | None:
+    if movie.playback_status not in {"direct", "ready"}:
+        return None
+    return f"/api/movies/{movie.id}/stream"
+
+
 def processing_count(database) -> int:
-    return database.scalar(
-        select(func.count(MovieFile.id)).where(
-            MovieFile.metadata_status.in_(ACTIVE_METADATA_STATUSES)
-        )
-    ) or 0
+    names = [f"movies:{status}" for status in ACTIVE_METADATA_STATUSES]
+    return sum(counter_values(database, *names).values())
+
 
+def get_movie_page(
+    limit: int,
+    before_id: int | None,
+    sort: str = "id",
+    descending: bool = True,
+    status: str | None = None,
+) -> dict:
+    """Page movies by ``sort`` with ``before_id`` as the keyset cursor.
 
-def get_movie_page(limit: int, before_id: int | None) -> dict:
+    The cursor is the last movie of the previous page; for sorts other than
+    ``id`` its current sort values mark where the next page starts. Movies
+    without a value for the sort key come last, in id order.
+    """
+    columns = [getattr(MovieFile, name) for name in MOVIE_SORT_KEYS.get(sort, ())]
     with SessionLocal() as database:
-        statement = select(MovieFile).order_by(MovieFile.id.desc())
+        statement = select(MovieFile)
+        if status is not None:
+            statement = statement.where(MovieFile.metadata_status == status)
+        cursor = None
         if before_id is not None:
-            statement = statement.where(MovieFile.id < before_id)
-        rows = list(database.scalars(statement.limit(limit + 1)).all())
+            if columns:
+                movie = database.get(MovieFile, before_id)
+                if movie is None:
+                    raise LookupError("목록 위치의 영상을 찾을 수 없습니다")
+                cursor = [getattr(movie, column.key) for column in columns] + [movie.id]
+            else:
+                cursor = [before_id]
+        rows = _keyset_rows(database, statement, columns, descending, cursor, limit + 1)
         has_more = len(rows) > limit
         page = rows[:limit]
         return {
             "items": [serialize_movie(movie) for movie in page],
-            "total": database.scalar(select(func.count(MovieFile.id))) or 0,
+            "total": counter_value(database, f"movies:{status}" if status else "movies"),
             "processing_count": processing_count(database),
             "next_cursor": page[-1].id if has_more and page else None,
             "has_more": has_more,
         }
 
 
+def _keyset_rows(database, statement, columns, descending, cursor, limit) -> list[MovieFile]:
+    # Row values compare as NULL when a key is NULL, so movies with a value
+    # and movies without one are read as two index-ordered segments.
+    segments = [(columns, [column.is_not(None) for column in columns])]
+    if any(column.nullable for column in columns):
+        segments.append(([], [or_(*(column.is_(None) for column in columns))]))
+    if cursor is not None and None in cursor[:-1]:
+        segments, cursor = segments[1:], cursor[-1:]
+    rows: list[MovieFile] = []
+    for sort_columns, conditions in segments:
+        keys = [*sort_columns, MovieFile.id]
+        segment = statement.where(*conditions) if conditions else statement
+        if cursor is not None:
+            # Only the segment holding the cursor starts after it.
+            position, values = tuple_(*keys), tuple_(*cursor)
+            segment = segment.where(position < values if descending else position > values)
+            cursor = None
+        segment = segment.order_by(*(key.desc() if descending else key.asc() for key in keys))
+        rows.extend(database.scalars(segment.limit(limit - len(rows))).all())
+        if len(rows) >= limit:
+            break
+    return rows
+
+
 def get_movie_statuses(ids: list[int]) -> dict:
     unique_ids = list(dict.fromkeys(ids))
     with SessionLocal() as database:
@@ -77,6 +138,26 @@ def get_movie_statuses(ids: list[int]) -> dict:
         }
 
 
+def get_movie_changes(ids: list[int]) -> dict:
+    """Current state of changed movies for the status event stream."""
+    with SessionLocal() as database:
+        items = []
+        for start in range(0, len(ids), 500):
+            for movie in database.scalars(
+                select(MovieFile).where(MovieFile.id.in_(ids[start : start + 500]))
+            ):
+                items.append(
+                    {
+                        **serialize_movie(movie),
+                        "playback_status": movie.playback_status,
+                        "playback_error": movie.playback_error,
+                        "playback_progress": playback_progress(database, movie),
+                        "stream_url": stream_url(movie),
+                    }
+                )
+        return {"items": items, "processing_count": processing_count(database)}
+
+
 def get_movie_detail(movie_id: int) -> dict | None:
     with SessionLocal() as database:
         movie = database.get(MovieFile, movie_id)
@@ -89,14 +170,44 @@ def get_movie_detail(movie_id: int) -> dict | None:
                 "audio_codec": movie.audio_codec,
                 "playback_status": movie.playback_status,
                 "playback_error": movie.playback_error,
-                "stream_url": (
-                    f"/api/movies/{movie.id}/stream"
-                    if movie.playback_status == "direct"
-                    else None
+                "stream_url": stream_url(movie),
+                "playback_progress": playback_progress(database, movie),
+                "scene_count": movie_scene_count(database, movie.id),
+                "keyframe_count": database.scalar(
+                    select(MovieKeyframes.keyframe_count).where(
+                        MovieKeyframes.movie_file_id == movie.id
+                    )
                 ),
-                "scene_count": database.scalar(
-                    select(func.count(Scene.id)).where(Scene.movie_file_id == movie.id)
-                ) or 0,
+                "trickplay_url": trickplay_url(
+                    movie.id, database.get(MovieTrickplay, movie.id)
+                ),
+                "duplicates": duplicate_movies(database, movie.id),
             }
         )
         return detail
+
+
+def get_duplicate_groups(limit: int) -> dict:
+    with SessionLocal() as database:
+        fingerprints = database.scalars(
+            select(MovieFingerprint.fingerprint)
+            .group_by(MovieFingerprint.fingerprint)
+            .having(func.count() > 1)
+            .order_by(func.min(MovieFingerprint.movie_file_id))
+            .limit(limit)
+        ).all()
+        groups: dict[str, list[dict]] = {fingerprint: [] for fingerprint in fingerprints}
+        rows = database.execute(
+            select(MovieFingerprint.fingerprint, MovieFile)
+            .join(MovieFile, MovieFile.id == MovieFingerprint.movie_file_id)
+            .where(MovieFingerprint.fingerprint.in_(fingerprints))
+            .order_by(MovieFile.id)
+        ).all()
+        for fingerprint, movie in rows:
+            groups[fingerprint].append(serialize_movie(movie))
+        return {
+            "items": [
+                {"fingerprint": fingerprint, "movies": movies}
+                for fingerprint, movies in groups.items()
+            ]
+        }
@@ -1,27 +1,85 @@
+"""Browser playback of movies, directly or through a prepared MP4.
+
+Movies a browser can decode are streamed from the original file. Everything
+else is queued for preparation: codec-compatible streams are remuxed into
+``PLAYBACK_DIR/<movie>.mp4`` without re-encoding, other streams are
+transcoded to H.264/AAC. The output is fragmented MP4 with a global ``sidx``
+index, so playback and seeking work as soon as the file is in place.
+"""
+
 from __future__ import annotations
 
+import os
+import time
+from collections.abc import Iterable
 from pathlib import Path
 
-from sqlalchemy import select
+from sqlalchemy import and_, exists, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
 
-from ..db import MovieFile, SessionLocal, utc_now
-from .media_processing import probe_video
+from ..db import PLAYBACK_DIR, Job, MovieFile, PlaybackPreparation, SessionLocal, utc_now
+from .media_processing import probe_video, stream_ffmpeg_progress
+from .status_events import publish_status
 
 
-SUPPORTED_PLAYBACK_EXTENSIONS = frozenset({".mp4", ".m4v", ".webm"})
+ACTIVE_PLAYBACK_STATUSES = ("pending", "processing")
+PROGRESS_INTERVAL_SECONDS = 1.0
+FRAGMENTED_MP4_FLAGS = "+frag_keyframe+empty_moov+default_base_moof+global_sidx"
+# Container extension -> (video codecs, audio codecs) a browser plays as is.
+DIRECT_PLAYBACK_CODECS = {
+    ".mp4": (frozenset({"h264"}), frozenset({"aac", "mp3"})),
+    ".m4v": (frozenset({"h264"}), frozenset({"aac", "mp3"})),
+    ".webm": (frozenset({"vp8", "vp9"}), frozenset({"opus", "vorbis"})),
+}
+REMUX_VIDEO_CODECS = frozenset({"h264"})
+REMUX_AUDIO_CODECS = frozenset({None, "aac", "mp3"})
+# Older versions marked these movies failed instead of preparing them.
 UNSUPPORTED_EXTENSION_ERROR = "브라우저에서 직접 재생할 수 없는 파일 형식입니다"
 UNSUPPORTED_CODEC_ERROR = "브라우저에서 직접 재생할 수 없는 영상 codec입니다"
 
 
 def is_direct_playback(ext: str, video_codec: str | None, audio_codec: str | None) -> bool:
-    if ext in {".mp4", ".m4v"}:
-        return video_codec == "h264" and audio_codec in {None, "aac", "mp3"}
-    if ext == ".webm":
-        return video_codec in {"vp8", "vp9"} and audio_codec in {None, "opus", "vorbis"}
-    return False
+    if ext not in DIRECT_PLAYBACK_CODECS:
+        return False
+    video_codecs, audio_codecs = DIRECT_PLAYBACK_CODECS[ext]
+    return video_codec in video_codecs and (audio_codec is None or audio_codec in audio_codecs)
+
+
+def _direct_playback_clause():
+    """SQL counterpart of :func:`is_direct_playback`.
+
+    The ``IS NOT NULL`` keeps the clause two-valued, so ``~clause`` also
+    matches movies whose codec is still unknown.
+    """
+    return or_(
+        *(
+            and_(
+                MovieFile.ext == ext,
+                MovieFile.video_codec.is_not(None),
+                MovieFile.video_codec.in_(video_codecs),
+                or_(MovieFile.audio_codec.is_(None), MovieFile.audio_codec.in_(audio_codecs)),
+            )
+            for ext, (video_codecs, audio_codecs) in DIRECT_PLAYBACK_CODECS.items()
+        )
+    )
+
+
+def preparation_mode(video_codec: str | None, audio_codec: str | None) -> str:
+    """``remux`` copies both streams, ``audio`` re-encodes only the audio."""
+    if video_codec not in REMUX_VIDEO_CODECS:
+        return "transcode"
+    return "remux" if audio_codec in REMUX_AUDIO_CODECS else "audio"
 
 
-def prepare_playback(movie_id: int) -> None:
+def prepared_path(movie_id: int) -> Path:
+    return PLAYBACK_DIR / f"{movie_id}.mp4"
+
+
+def prepare_playback(movie_id: int) -> bool:
+    """Mark the movie direct or queue its preparation.
+
+    Returns ``True`` when a playback job should be scheduled.
+    """
     with SessionLocal() as database:
         movie = database.get(MovieFile, movie_id)
         if movie is None:
@@ -29,23 +87,107 @@ def prepare_playback(movie_id: int) -> None:
         if not Path(movie.path).is_file():
             raise FileNotFoundError("원본 영상 파일을 찾을 수 없습니다")
 
-        if movie.ext not in SUPPORTED_PLAYBACK_EXTENSIONS:
-            _mark_failed(movie, UNSUPPORTED_EXTENSION_ERROR)
-            database.commit()
-            return
-
         if not movie.video_codec:
             metadata = probe_video(movie.path)
             movie.video_codec = metadata.get("video_codec")
             movie.audio_codec = metadata.get("audio_codec")
 
         if is_direct_playback(movie.ext, movie.video_codec, movie.audio_codec):
+            queued = False
             movie.playback_status = "direct"
             movie.playback_error = None
+        elif movie.playback_status in ACTIVE_PLAYBACK_STATUSES:
+            queued = True
+        elif movie.playback_status == "ready" and _prepared_file(movie) is not None:
+            queued = False
+        else:
+            queued = True
+            movie.playback_status = "pending"
+            movie.playback_error = None
+        movie.updated_at = utc_now()
+        database.commit()
+    publish_status("movie", movie_id)
+    return queued
+
+
+def process_playback(movie_id: int) -> None:
+    """Remux or transcode a pending movie into its prepared MP4."""
+    with SessionLocal() as database:
+        movie = database.get(MovieFile, movie_id)
+        if movie is None or movie.playback_status not in ACTIVE_PLAYBACK_STATUSES:
+            return
+        mode = preparation_mode(movie.video_codec, movie.audio_codec)
+        movie.playback_status = "processing"
+        movie.playback_error = None
+        movie.updated_at = utc_now()
+        values = {"mode": mode, "progress": 0.0, "updated_at": utc_now()}
+        database.execute(
+            insert(PlaybackPreparation)
+            .values(movie_file_id=movie_id, **values)
+            .on_conflict_do_update(index_elements=["movie_file_id"], set_=values)
+        )
+        source_path = movie.path
+        duration_ms = movie.duration_ms
+        database.commit()
+    publish_status("movie", movie_id)
+
+    target = prepared_path(movie_id)
+    temporary_path = target.with_name(f"{movie_id}.tmp.mp4")
+    error_message: str | None = None
+    try:
+        if not Path(source_path).is_file():
+            raise FileNotFoundError("원본 영상 파일을 찾을 수 없습니다")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path.unlink(missing_ok=True)
+        positions = stream_ffmpeg_progress(
+            playback_arguments(source_path, mode, temporary_path)
+        )
+        _report_progress(movie_id, positions, duration_ms)
+        if not temporary_path.is_file() or temporary_path.stat().st_size == 0:
+            raise RuntimeError("FFmpeg가 재생용 영상을 만들지 못했습니다")
+        os.replace(temporary_path, target)
+    except Exception as error:
+        error_message = str(error) or error.__class__.__name__
+    finally:
+        temporary_path.unlink(missing_ok=True)
+
+    with SessionLocal() as database:
+        movie = database.get(MovieFile, movie_id)
+        if movie is None:
+            target.unlink(missing_ok=True)
+            return
+        if error_message:
+            movie.playback_status = "failed"
+            movie.playback_error = error_message[-2000:]
         else:
-            _mark_failed(movie, UNSUPPORTED_CODEC_ERROR)
+            movie.playback_status = "ready"
+            movie.playback_path = _relative_prepared_path(movie_id)
+            movie.playback_error = None
+            preparation = database.get(PlaybackPreparation, movie_id)
+            if preparation is not None:
+                preparation.progress = 1.0
         movie.updated_at = utc_now()
         database.commit()
+    publish_status("movie", movie_id)
+
+
+def playback_arguments(source_path: str, mode: str, target: Path) -> list[str]:
+    """ffmpeg arguments writing the first video and audio stream as fragmented MP4."""
+    if mode == "transcode":
+        video = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "20", "-pix_fmt", "yuv420p"]
+    else:
+        video = ["-c:v", "copy"]
+    if mode == "remux":
+        audio = ["-c:a", "copy"]
+    else:
+        audio = ["-c:a", "aac", "-b:a", "192k", "-ac", "2"]
+    return [
+        "-i", source_path,
+        "-map", "0:v:0", "-map", "0:a:0?",
+        *video, *audio, "-sn", "-dn",
+        "-movflags", FRAGMENTED_MP4_FLAGS,
+        "-f", "mp4", "-y", str(target),
+    ]
 
 
 def playback_file(movie_id: int) -> tuple[Path, str]:
@@ -53,43 +195,147 @@ def playback_file(movie_id: int) -> tuple[Path, str]:
         movie = database.get(MovieFile, movie_id)
         if movie is None:
             raise LookupError("영상을 찾을 수 없습니다")
-        if movie.playback_status != "direct" or not is_direct_playback(
+        if movie.playback_status == "direct" and is_direct_playback(
             movie.ext, movie.video_codec, movie.audio_codec
         ):
-            raise RuntimeError("브라우저에서 직접 재생할 수 없는 영상입니다")
-        path = Path(movie.path).resolve()
-        media_type = "video/webm" if movie.ext == ".webm" else "video/mp4"
+            path = Path(movie.path).resolve()
+            media_type = "video/webm" if movie.ext == ".webm" else "video/mp4"
+        elif movie.playback_status == "ready":
+            path = _prepared_file(movie)
+            if path is None:
+                raise FileNotFoundError("재생용 영상 파일을 찾을 수 없습니다")
+            media_type = "video/mp4"
+        else:
+            raise RuntimeError("재생 준비가 끝나지 않은 영상입니다")
     if not path.is_file():
         raise FileNotFoundError("재생할 영상 파일을 찾을 수 없습니다")
     return path, media_type
 
 
+def playback_progress(database, movie: MovieFile) -> float | None:
+    if movie.playback_status not in ACTIVE_PLAYBACK_STATUSES:
+        return None
+    preparation = database.get(PlaybackPreparation, movie.id)
+    return round(preparation.progress, 4) if preparation is not None else 0.0
+
+
+def fail_playback(movie_id: int, error_message: str) -> None:
+    """Mark an active preparation failed when its playback job cannot finish."""
+    with SessionLocal() as database:
+        database.execute(
+            update(MovieFile)
+            .where(
+                MovieFile.id == movie_id,
+                MovieFile.playback_status.in_(ACTIVE_PLAYBACK_STATUSES),
+            )
+            .values(
+                playback_status="failed",
+                playback_error=error_message[-2000:],
+                updated_at=utc_now(),
+            )
+        )
+        database.commit()
+    publish_status("movie", movie_id)
+
+
+def reset_playback_jobs() -> list[int]:
+    """Return movies waiting for preparation that have no row in the jobs table."""
+    orphaned = ~exists().where(Job.job_type == "playback", Job.item_id == MovieFile.id)
+    with SessionLocal() as database:
+        database.execute(
+            update(MovieFile)
+            .where(MovieFile.playback_status == "processing", orphaned)
+            .values(playback_status="pending", updated_at=utc_now())
+            .execution_options(synchronize_session=False)
+        )
+        ids = database.scalars(
+            select(MovieFile.id)
+            .where(MovieFile.playback_status == "pending", orphaned)
+            .order_by(MovieFile.id)
+        ).all()
+        database.commit()
+        return list(ids)
+
+
 def normalize_playback_states() -> None:
+    """Reconcile stored playback states with the current rules in a few UPDATEs."""
+    direct = _direct_playback_clause()
+    now = utc_now()
+    with SessionLocal() as database:
+        database.execute(
+            update(MovieFile)
+            .where(
+                direct,
+                or_(MovieFile.playback_status != "direct", MovieFile.playback_error.is_not(None)),
+            )
+            .values(playback_status="direct", playback_error=None, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        # Only ready movies need a file check; proxies of older versions are
+        # left on disk but not served.
+        ready = database.execute(
+            select(MovieFile.id, MovieFile.playback_path).where(
+                MovieFile.playback_status == "ready", ~direct
+            )
+        ).all()
+        stale_ids = [
+            movie_id
+            for movie_id, playback_path in ready
+            if playback_path != _relative_prepared_path(movie_id)
+            or not prepared_path(movie_id).is_file()
+        ]
+        database.execute(
+            update(MovieFile)
+            .where(
+                ~direct,
+                or_(
+                    MovieFile.playback_status == "direct",
+                    and_(
+                        MovieFile.playback_status == "failed",
+                        MovieFile.playback_error.in_(
+                            [UNSUPPORTED_EXTENSION_ERROR, UNSUPPORTED_CODEC_ERROR]
+                        ),
+                    ),
+                ),
+            )
+            .values(playback_status="unprepared", playback_error=None, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        for start in range(0, len(stale_ids), 500):
+            database.execute(
+                update(MovieFile)
+                .where(MovieFile.id.in_(stale_ids[start : start + 500]))
+                .values(playback_status="unprepared", playback_error=None, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        database.commit()
+
+
+def _relative_prepared_path(movie_id: int) -> str:
+    return f"{PLAYBACK_DIR.name}/{movie_id}.mp4"
+
+
+def _prepared_file(movie: MovieFile) -> Path | None:
+    if movie.playback_path != _relative_prepared_path(movie.id):
+        return None
+    path = prepared_path(movie.id)
+    return path if path.is_file() else None
+
+
+def _report_progress(movie_id: int, positions: Iterable[int], duration_ms: int | None) -> None:
+    reported_at = time.monotonic()
+    for position_ms in positions:
+        now = time.monotonic()
+        if duration_ms and now - reported_at >= PROGRESS_INTERVAL_SECONDS:
+            reported_at = now
+            _set_progress(movie_id, min(position_ms / duration_ms, 0.99))
+
+
+def _set_progress(movie_id: int, progress: float) -> None:
     with SessionLocal() as database:
-        movies = database.scalars(select(MovieFile)).all()
-        changed = False
-        for movie in movies:
-            if movie.ext not in SUPPORTED_PLAYBACK_EXTENSIONS:
-                status, error = "failed", UNSUPPORTED_EXTENSION_ERROR
-            elif movie.video_codec:
-                direct = is_direct_playback(movie.ext, movie.video_codec, movie.audio_codec)
-                status = "direct" if direct else "failed"
-                error = None if direct else UNSUPPORTED_CODEC_ERROR
-            elif movie.playback_status in {"direct", "pending", "processing", "ready"}:
-                status, error = "unprepared", None
-            else:
-                continue
-
-            if movie.playback_status != status or movie.playback_error != error:
-                movie.playback_status = status
-                movie.playback_error = error
-                movie.updated_at = utc_now()
-                changed = True
-        if changed:
-            database.commit()
-
-
-def _mark_failed(movie: MovieFile, message: str) -> None:
-    movie.playback_status = "failed"
-    movie.playback_error = message
-    movie.updated_at = utc_now()
+        preparation = database.get(PlaybackPreparation, movie_id)
+        if preparation is None:
+            return
+        preparation.progress = progress
+        database.commit()
+    publish_status("movie", movie_id)
@@ -0,0 +1,257 @@
+"""Reuse of metadata results for files that were already probed.
+
+Entries are keyed by the normalized path together with the size and
+modification time (ns) read right before processing, so an edited file never
+hits an old entry. The thumbnail is hard-linked (or copied) into
+``PROBE_CACHE_DIR`` when it is stored and back to ``THUMBNAIL_DIR/<movie>.webp``
+on a hit; thumbnails are always replaced, never rewritten in place, so the
+link keeps the content it was stored with.
+
+A file without an entry, e.g. a copy of a movie in another folder, can still
+reuse the result of a ready movie with the same content fingerprint. Only the
+latest version of each path is kept: storing a new key drops the older
+entries of that path together with their thumbnails.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from ..db import (
+    DATA_DIR,
+    PROBE_CACHE_DIR,
+    THUMBNAIL_DIR,
+    MovieFile,
+    MovieFingerprint,
+    ProbeCacheEntry,
+    SessionLocal,
+    utc_now,
+)
+from .keyframes import load_keyframes, pack_keyframes, unpack_keyframes
+
+
+# ``movie_files`` columns filled from the probe metadata.
+METADATA_FIELDS = ("duration_ms", "width", "height", "fps", "video_codec", "audio_codec")
+
+_stats_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+@dataclass(frozen=True)
+class ProbeKey:
+    normalized_path: str
+    size_bytes: int
+    modified_ns: int
+
+    @property
+    def digest(self) -> str:
+        return hashlib.blake2b(
+            f"{self.normalized_path}\0{self.size_bytes}\0{self.modified_ns}".encode("utf-8"),
+            digest_size=16,
+        ).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedProbe:
+    metadata: dict
+    keyframes: list[int] | None
+    thumbnail_path: str
+    fingerprint: str | None = None
+    # Movie whose trickplay sheet may be reused: the same movie for an
+    # unchanged file, or the ready copy for a fingerprint match.
+    source_movie_id: int | None = None
+
+
+def probe_key(normalized_path: str, source_path: str) -> ProbeKey | None:
+    try:
+        stat = os.stat(source_path)
+    except OSError:
+        return None
+    return ProbeKey(normalized_path, stat.st_size, stat.st_mtime_ns)
+
+
+def lookup_probe(
+    key: ProbeKey,
+    movie_id: int,
+    fingerprint: Callable[[], str | None] | None = None,
+) -> CachedProbe | None:
+    """Return the cached result and restore the movie's thumbnail from it.
+
+    Without an entry for ``key``, a ready movie with the same content
+    fingerprint elsewhere in the library is reused instead. ``fingerprint``
+    is only called then, so a hit on ``key`` does not read the file.
+    """
+    cached = _lookup_entry(key, movie_id)
+    if cached is None and fingerprint is not None:
+        content = fingerprint()
+        if content is not None:
+            cached = _lookup_duplicate(content, movie_id)
+    _record_lookup(cached is not None)
+    return cached
+
+
+def store_probe(
+    key: ProbeKey,
+    metadata: dict,
+    keyframes: list[int] | None,
+    thumbnail_path: str,
+    fingerprint: str | None = None,
+) -> None:
+    """Remember a successful inspection; the thumbnail must exist under ``DATA_DIR``.
+
+    Entries for older versions of the same path are dropped.
+    """
+    PROBE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cached_thumbnail = PROBE_CACHE_DIR / f"{key.digest}.webp"
+    try:
+        _link(DATA_DIR / thumbnail_path, cached_thumbnail)
+    except OSError:
+        return
+    values = {
+        "metadata_json": metadata,
+        "keyframes": pack_keyframes(keyframes) if keyframes else None,
+        "thumbnail_path": cached_thumbnail.relative_to(DATA_DIR).as_posix(),
+        "fingerprint": fingerprint,
+        "created_at": utc_now(),
+    }
+    with SessionLocal() as database:
+        stale_thumbnails = database.scalars(
+            delete(ProbeCacheEntry)
+            .where(
+                ProbeCacheEntry.normalized_path == key.normalized_path,
+                (ProbeCacheEntry.size_bytes != key.size_bytes)
+                | (ProbeCacheEntry.modified_ns != key.modified_ns),
+            )
+            .returning(ProbeCacheEntry.thumbnail_path)
+        ).all()
+        database.execute(
+            insert(ProbeCacheEntry)
+            .values(
+                normalized_path=key.normalized_path,
+                size_bytes=key.size_bytes,
+                modified_ns=key.modified_ns,
+                **values,
+            )
+            .on_conflict_do_update(
+                index_elements=["normalized_path", "size_bytes", "modified_ns"],
+                set_=values,
+            )
+        )
+        database.commit()
+    for stale_thumbnail in stale_thumbnails:
+        (DATA_DIR / stale_thumbnail).unlink(missing_ok=True)
+
+
+def probe_cache_stats() -> dict:
+    with _stats_lock:
+        hits, misses = _hits, _misses
+    with SessionLocal() as database:
+        entries = database.scalar(select(func.count(ProbeCacheEntry.id)))
+    lookups = hits + misses
+    return {
+        "entries": entries,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def _lookup_entry(key: ProbeKey, movie_id: int) -> CachedProbe | None:
+    with SessionLocal() as database:
+        entry = database.scalar(
+            select(ProbeCacheEntry).where(
+                ProbeCacheEntry.normalized_path == key.normalized_path,
+                ProbeCacheEntry.size_bytes == key.size_bytes,
+                ProbeCacheEntry.modified_ns == key.modified_ns,
+            )
+        )
+        if entry is None:
+            return None
+        thumbnail_path = _restore_thumbnail(DATA_DIR / entry.thumbnail_path, movie_id)
+        if thumbnail_path is None:
+            return None
+        database.execute(
+            update(ProbeCacheEntry)
+            .where(ProbeCacheEntry.id == entry.id)
+            .values(hit_count=ProbeCacheEntry.hit_count + 1, last_hit_at=utc_now())
+        )
+        database.commit()
+        return CachedProbe(
+            metadata=dict(entry.metadata_json),
+            keyframes=unpack_keyframes(entry.keyframes) if entry.keyframes else None,
+            thumbnail_path=thumbnail_path,
+            fingerprint=entry.fingerprint,
+            source_movie_id=movie_id,
+        )
+
+
+def _lookup_duplicate(fingerprint: str, movie_id: int) -> CachedProbe | None:
+    with SessionLocal() as database:
+        source = database.scalar(
+            select(MovieFile)
+            .join(MovieFingerprint, MovieFingerprint.movie_file_id == MovieFile.id)
+            .where(
+                MovieFingerprint.fingerprint == fingerprint,
+                MovieFile.id != movie_id,
+                MovieFile.metadata_status == "ready",
+                MovieFile.thumbnail_path.is_not(None),
+            )
+            .order_by(MovieFile.id)
+            .limit(1)
+        )
+        if source is None:
+            return None
+        thumbnail_path = _restore_thumbnail(DATA_DIR / source.thumbnail_path, movie_id)
+        if thumbnail_path is None:
+            return None
+        return CachedProbe(
+            metadata={
+                field: getattr(source, field)
+                for field in METADATA_FIELDS
+                if getattr(source, field) is not None
+            },
+            keyframes=load_keyframes(database, source.id),
+            thumbnail_path=thumbnail_path,
+            fingerprint=fingerprint,
+            source_movie_id=source.id,
+        )
+
+
+def _restore_thumbnail(source: Path, movie_id: int) -> str | None:
+    THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+    final_path = THUMBNAIL_DIR / f"{movie_id}.webp"
+    temporary_path = THUMBNAIL_DIR / f"{movie_id}.tmp.webp"
+    try:
+        _link(source, temporary_path)
+        temporary_path.replace(final_path)
+    except OSError:
+        temporary_path.unlink(missing_ok=True)
+        return None
+    return final_path.relative_to(DATA_DIR).as_posix()
+
+
+def _link(source: Path, target: Path) -> None:
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _record_lookup(hit: bool) -> None:
+    global _hits, _misses
+    with _stats_lock:
+        if hit:
+            _hits += 1
+        else:
+            _misses += 1
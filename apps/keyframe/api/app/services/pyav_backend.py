@@ -0,0 +1,174 @@
+"""In-process media backend built on PyAV.
+
+Probing, keyframe indexing and frame encoding share one opened container, so
+a movie costs a single file open instead of one ffprobe/ffmpeg launch per
+step. Importing this module raises ``ImportError`` when PyAV is missing.
+"""
+
+from __future__ import annotations
+
+import bisect
+from fractions import Fraction
+from pathlib import Path
+
+import av
+
+from .media_processing import (
+    THUMBNAIL_QUALITY,
+    THUMBNAIL_WIDTH,
+    MovieInspection,
+    write_thumbnail,
+)
+
+
+class PyAvMediaBackend:
+    name = "pyav"
+
+    def inspect_movie(self, path: str, movie_id: int) -> MovieInspection:
+        try:
+            with av.open(path) as container:
+                stream = _video_stream(container)
+                metadata = _metadata(container, stream)
+                keyframes = _keyframes(container, stream) or None
+                try:
+                    thumbnail_path = write_thumbnail(
+                        movie_id,
+                        metadata["duration_ms"],
+                        keyframes,
+                        lambda timestamp_ms, target: _write_frame(
+                            container, stream, timestamp_ms, target,
+                            THUMBNAIL_WIDTH, THUMBNAIL_QUALITY, keyframes,
+                        ),
+                    )
+                except (OSError, RuntimeError) as error:
+                    return MovieInspection(
+                        metadata, keyframes, None, str(error) or error.__class__.__name__
+                    )
+        except av.FFmpegError as error:
+            raise RuntimeError(str(error)) from error
+        return MovieInspection(metadata, keyframes, thumbnail_path)
+
+    def write_frames(
+        self,
+        path: str,
+        frames: list[tuple[int, Path]],
+        *,
+        width: int,
+        quality: int,
+        keyframes: list[int] | None = None,
+        timeout: int | None = None,
+    ) -> None:
+        try:
+            with av.open(path) as container:
+                stream = _video_stream(container)
+                for timestamp_ms, target in sorted(frames):
+                    _write_frame(
+                        container, stream, timestamp_ms, target, width, quality, keyframes
+                    )
+        except av.FFmpegError as error:
+            raise RuntimeError(str(error)) from error
+
+
+def _video_stream(container):
+    if not container.streams.video:
+        raise RuntimeError("영상 스트림을 찾을 수 없습니다")
+    stream = container.streams.video[0]
+    stream.thread_type = "AUTO"
+    return stream
+
+
+def _metadata(container, stream) -> dict:
+    if container.duration:
+        duration_seconds = container.duration / av.time_base
+    elif stream.duration and stream.time_base:
+        duration_seconds = float(stream.duration * stream.time_base)
+    else:
+        duration_seconds = 0.0
+    rate = stream.average_rate or stream.guessed_rate
+    audio = container.streams.audio[0] if container.streams.audio else None
+    return {
+        "duration_ms": round(duration_seconds * 1000) if duration_seconds > 0 else None,
+        "width": stream.codec_context.width or None,
+        "height": stream.codec_context.height or None,
+        "fps": float(rate) if rate else None,
+        "video_codec": stream.codec_context.name,
+        "audio_codec": audio.codec_context.name if audio is not None else None,
+    }
+
+
+def _start_seconds(container, stream) -> float:
+    """Return the time ``-ss`` and the player count from, like ffmpeg's format start_time."""
+    if container.start_time is not None:
+        return container.start_time / av.time_base
+    if stream.start_time is not None and stream.time_base:
+        return float(stream.start_time * stream.time_base)
+    return 0.0
+
+
+def _keyframes(container, stream) -> list[int]:
+    # Same origin as the ffprobe index: relative to the file start time.
+    start_seconds = _start_seconds(container, stream)
+    keyframes: set[int] = set()
+    for packet in container.demux(stream):
+        if packet.is_keyframe and packet.pts is not None:
+            timestamp_ms = round((float(packet.pts * stream.time_base) - start_seconds) * 1000)
+            if timestamp_ms >= 0:
+                keyframes.add(timestamp_ms)
+    return sorted(keyframes)
+
+
+def _write_frame(
+    container,
+    stream,
+    timestamp_ms: int,
+    target: Path,
+    width: int,
+    quality: int,
+    keyframes: list[int] | None,
+) -> None:
+    frame = _decode_frame(container, stream, timestamp_ms, keyframes)
+    if frame is None:
+        raise RuntimeError("FFmpeg가 frame을 decode하지 못했습니다")
+    target.write_bytes(_encode_webp(frame, width, quality))
+
+
+def _decode_frame(container, stream, timestamp_ms: int, keyframes: list[int] | None):
+    index = bisect.bisect_left(keyframes, timestamp_ms) if keyframes else 0
+    keyframe_only = bool(keyframes) and index < len(keyframes) and keyframes[index] == timestamp_ms
+    # The keyframe index stores rounded times, so start 1 ms early for an exact hit.
+    # Stream timestamps are absolute; the requested time counts from the start.
+    target_seconds = (
+        _start_seconds(container, stream)
+        + max(timestamp_ms - 1 if keyframe_only else timestamp_ms, 0) / 1000
+    )
+    container.seek(
+        int(target_seconds / stream.time_base),
+        stream=stream,
+        backward=True,
+        any_frame=False,
+    )
+    stream.codec_context.skip_frame = "NONKEY" if keyframe_only else "DEFAULT"
+    last = None
+    try:
+        for frame in container.decode(stream):
+            if frame.time is not None and frame.time >= target_seconds:
+                return frame
+            last = frame
+    finally:
+        stream.codec_context.skip_frame = "DEFAULT"
+    return last
+
+
+def _encode_webp(frame, width: int, quality: int) -> bytes:
+    # Mirrors ffmpeg's scale=<width>:-2 so both backends produce the same size.
+    height = max(2, round(frame.height * width / frame.width / 2) * 2)
+    image = frame.reformat(width=width, height=height, format="yuv420p")
+    encoder = av.CodecContext.create("libwebp", "w")
+    encoder.width = width
+    encoder.height = height
+    encoder.pix_fmt = "yuv420p"
+    encoder.time_base = Fraction(1, 25)
+    encoder.options = {"quality": str(quality)}
+    image.pts = None
+    packets = [*encoder.encode(image), *encoder.encode(None)]
+    return b"".join(bytes(packet) for packet in packets)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from pathlib import Path
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from ..db import SceneAnalysisCache, SessionLocal, utc_now
+from .scene_models import CLIP_MODEL_NAME, WD14_MODEL_REPO, SceneAnalysis, analyze_scene_data
+
+
+_stats_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def snapshot_digest(image_data: bytes) -> str:
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def analyze_scene(image_path: Path) -> SceneAnalysis:
+    image_data = image_path.read_bytes()
+    digest = snapshot_digest(image_data)
+    cached = lookup_scene_analysis(digest)
+    _record_lookup(cached is not None)
+    if cached is not None:
+        return cached
+    analysis = analyze_scene_data(image_data)
+    store_scene_analysis(digest, analysis)
+    return analysis
+
+
+def lookup_scene_analysis(digest: str) -> SceneAnalysis | None:
+    with SessionLocal() as database:
+        entry = database.scalar(
+            select(SceneAnalysisCache).where(
+                SceneAnalysisCache.snapshot_sha256 == digest,
+                SceneAnalysisCache.embedding_model == CLIP_MODEL_NAME,
+                SceneAnalysisCache.prompt_model == WD14_MODEL_REPO,
+            )
+        )
+        if entry is None:
+            return None
+        analysis = SceneAnalysis(
+            embedding=entry.embedding,
+            prompt=entry.prompt,
+            keywords=list(entry.keywords),
+        )
+        database.execute(
+            update(SceneAnalysisCache)
+            .where(SceneAnalysisCache.id == entry.id)
+            .values(
+                hit_count=SceneAnalysisCache.hit_count + 1,
+                last_hit_at=utc_now(),
+            )
+        )
+        database.commit()
+        return analysis
+
+
+def store_scene_analysis(digest: str, analysis: SceneAnalysis) -> None:
+    with SessionLocal() as database:
+        database.execute(
+            insert(SceneAnalysisCache)
+            .values(
+                snapshot_sha256=digest,
+                embedding_model=CLIP_MODEL_NAME,
+                prompt_model=WD14_MODEL_REPO,
+                embedding=analysis.embedding,
+                prompt=analysis.prompt,
+                keywords=list(analysis.keywords),
+                hit_count=0,
+                created_at=utc_now(),
+            )
+            .on_conflict_do_nothing(
+                index_elements=["snapshot_sha256", "embedding_model", "prompt_model"]
+            )
+        )
+        database.commit()
+
+
+def scene_analysis_cache_stats() -> dict:
+    with _stats_lock:
+        hits, misses = _hits, _misses
+    with SessionLocal() as database:
+        entries = database.scalar(select(func.count(SceneAnalysisCache.id))) or 0
+        stored_hits = database.scalar(select(func.sum(SceneAnalysisCache.hit_count))) or 0
+    lookups = hits + misses
+    return {
+        "entries": entries,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else None,
+        "lifetime_hits": stored_hits,
+    }
+
+
+def _record_lookup(hit: bool) -> None:
+    global _hits, _misses
+    with _stats_lock:
+        if hit:
+            _hits += 1
+        else:
+            _misses += 1
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from sqlalchemy import exists, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from ..db import Job, MovieFile, Scene, SceneDetectionJob, SessionLocal, utc_now
+from .media_processing import stream_scene_scores
+from .movie_query import iso_utc
+
+
+ACTIVE_JOB_STATUSES = ("pending", "processing")
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+
+def create_detection_job(
+    movie_id: int,
+    threshold: float,
+    min_spacing_ms: int,
+    max_scenes: int,
+) -> dict:
+    with SessionLocal() as database:
+        movie = database.get(MovieFile, movie_id)
+        if movie is None:
+            raise LookupError("영상을 찾을 수 없습니다")
+        if not Path(movie.path).is_file():
+            raise FileNotFoundError("원본 영상 파일을 찾을 수 없습니다")
+        job = SceneDetectionJob(
+            movie_file_id=movie_id,
+            threshold=threshold,
+            min_spacing_ms=min_spacing_ms,
+            max_scenes=max_scenes,
+            status="pending",
+            progress=0.0,
+            scene_ids=[],
+        )
+        database.add(job)
+        database.commit()
+        return serialize_detection_job(job)
+
+
+def get_detection_job(job_id: int) -> dict:
+    with SessionLocal() as database:
+        job = database.get(SceneDetectionJob, job_id)
+        if job is None:
+            raise LookupError("Scene 자동 감지 작업을 찾을 수 없습니다")
+        return serialize_detection_job(job)
+
+
+def process_detection_job(
+    job_id: int,
+    on_scenes: Callable[[list[int]], None] | None = None,
+) -> None:
+    """Detect shot boundaries and create a pending Scene at each of them.
+
+    ``on_scenes`` receives the ids of the created scenes so their analysis can
+    be scheduled in one batch.
+    """
+    with SessionLocal() as database:
+        job = database.get(SceneDetectionJob, job_id)
+        if job is None or job.status not in ACTIVE_JOB_STATUSES:
+            return
+        movie = database.get(MovieFile, job.movie_file_id)
+        if movie is None:
+            return
+        job.status = "processing"
+        job.progress = 0.0
+        job.error = None
+        job.updated_at = utc_now()
+        source_path = movie.path
+        movie_id = movie.id
+        duration_ms = movie.duration_ms
+        threshold = job.threshold
+        min_spacing_ms = job.min_spacing_ms
+        max_scenes = job.max_scenes
+        database.commit()
+
+    error_message: str | None = None
+    boundaries: list[int] = []
+    scene_ids: list[int] = []
+    try:
+        if not Path(source_path).is_file():
+            raise FileNotFoundError("원본 영상 파일을 찾을 수 없습니다")
+        scores = _report_progress(job_id, stream_scene_scores(source_path), duration_ms)
+        boundaries = select_shot_boundaries(scores, threshold, min_spacing_ms, max_scenes)
+        scene_ids = _create_scenes(movie_id, boundaries, min_spacing_ms)
+    except Exception as error:
+        error_message = str(error) or error.__class__.__name__
+
+    with SessionLocal() as database:
+        job = database.get(SceneDetectionJob, job_id)
+        if job is not None:
+            if error_message:
+                job.status = "failed"
+                job.error = error_message[-2000:]
+            else:
+                job.status = "ready"
+                job.progress = 1.0
+                job.boundary_count = len(boundaries)
+                job.scene_ids = scene_ids
+                job.error = None
+            job.updated_at = utc_now()
+            database.commit()
+    if scene_ids and on_scenes is not None:
+        on_scenes(scene_ids)
+
+
+def select_shot_boundaries(
+    scores: Iterable[tuple[int, float]],
+    threshold: float,
+    min_spacing_ms: int,
+    max_scenes: int,
+) -> list[int]:
+    """Pick shot boundaries from a stream of ``(timestamp_ms, score)`` frames.
+
+    Within ``min_spacing_ms`` only the strongest cut is kept, and at most
+    ``max_scenes`` of the strongest cuts are returned in time order. Weak
+    candidates are pruned while streaming, so memory stays bounded by
+    ``max_scenes``.
+    """
+    candidates: list[tuple[int, float]] = []
+    for timestamp_ms, score in scores:
+        if score < threshold:
+            continue
+        if candidates and timestamp_ms - candidates[-1][0] < min_spacing_ms:
+            if score > candidates[-1][1]:
+                candidates[-1] = (timestamp_ms, score)
+            continue
+        candidates.append((timestamp_ms, score))
+        if len(candidates) >= max_scenes * 4:
+            candidates = _strongest(candidates, max_scenes)
+    return [timestamp_ms for timestamp_ms, _score in _strongest(candidates, max_scenes)]
+
+
+def fail_detection_job(job_id: int, error_message: str) -> None:
+    """Mark an active detection job failed when it cannot finish."""
+    with SessionLocal() as database:
+        database.execute(
+            update(SceneDetectionJob)
+            .where(
+                SceneDetectionJob.id == job_id,
+                SceneDetectionJob.status.in_(ACTIVE_JOB_STATUSES),
+            )
+            .values(status="failed", error=error_message[-2000:], updated_at=utc_now())
+        )
+        database.commit()
+
+
+def reset_detection_jobs() -> list[int]:
+    """Return active detection jobs that have no row in the jobs table."""
+    orphaned = ~exists().where(
+        Job.job_type == "detection",
+        Job.item_id == SceneDetectionJob.id,
+    )
+    with SessionLocal() as database:
+        ids = database.scalars(
+            update(SceneDetectionJob)
+            .where(SceneDetectionJob.status.in_(ACTIVE_JOB_STATUSES), orphaned)
+            .values(status="pending", progress=0.0, updated_at=utc_now())
+            .returning(SceneDetectionJob.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        database.commit()
+        return sorted(ids)
+
+
+def serialize_detection_job(job: SceneDetectionJob) -> dict:
+    return {
+        "id": job.id,
+        "movie_id": job.movie_file_id,
+        "threshold": job.threshold,
+        "min_spacing_ms": job.min_spacing_ms,
+        "max_scenes": job.max_scenes,
+        "status": job.status,
+        "progress": round(job.progress, 4),
+        "boundary_count": job.boundary_count,
+        "scene_ids": list(job.scene_ids),
+        "error": job.error,
+        "created_at": iso_utc(job.created_at),
+        "updated_at": iso_utc(job.updated_at),
+    }
+
+
+def _strongest(candidates: list[tuple[int, float]], limit: int) -> list[tuple[int, float]]:
+    if len(candidates) <= limit:
+        return candidates
+    kept = sorted(candidates, key=lambda candidate: candidate[1], reverse=True)[:limit]
+    return sorted(kept)
+
+
+def _report_progress(
+    job_id: int,
+    scores: Iterable[tuple[int, float]],
+    duration_ms: int | None,
+) -> Iterable[tuple[int, float]]:
+    reported_at = time.monotonic()
+    for timestamp_ms, score in scores:
+        yield timestamp_ms, score
+        now = time.monotonic()
+        if duration_ms and now - reported_at >= PROGRESS_INTERVAL_SECONDS:
+            reported_at = now
+            _set_progress(job_id, min(timestamp_ms / duration_ms, 0.99))
+
+
+def _set_progress(job_id: int, progress: float) -> None:
+    with SessionLocal() as database:
+        job = database.get(SceneDetectionJob, job_id)
+        if job is None:
+            return
+        job.progress = progress
+        job.updated_at = utc_now()
+        database.commit()
+
+
+def _create_scenes(movie_id: int, boundaries: list[int], min_spacing_ms: int) -> list[int]:
+    """Insert pending scenes, skipping boundaries next to an existing scene."""
+    with SessionLocal() as database:
+        existing = database.scalars(
+            select(Scene.timestamp_ms).where(Scene.movie_file_id == movie_id)
+        ).all()
+        timestamps = [
+            timestamp_ms
+            for timestamp_ms in boundaries
+            if all(abs(timestamp_ms - other) >= min_spacing_ms for other in existing)
+        ]
+        if not timestamps:
+            return []
+        now = utc_now()
+        scene_ids = database.scalars(
+            insert(Scene)
+            .values(
+                [
+                    {
+                        "movie_file_id": movie_id,
+                        "timestamp_ms": timestamp_ms,
+                        "analysis_status": "pending",
+                        "play_count": 0,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for timestamp_ms in timestamps
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["movie_file_id", "timestamp_ms"])
+            .returning(Scene.id)
+        ).all()
+        database.commit()
+        return sorted(scene_ids)
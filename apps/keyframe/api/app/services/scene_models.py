@@ -5,12 +5,13 @@ import concurrent.futures
 import math
 import struct
 import threading
+import time
 from collections.abc import Callable
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Literal, Protocol
 
-from gpstation_master import GpStationClient, RequestAttachment
+from gpstation_master import AnswerMode, GpStationClient, RequestAttachment
 from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
 
 from ..settings import KeyframeSettings
@@ -138,6 +139,10 @@ class ImageGenerationAnalysis:
     images: list[GeneratedImageAnalysis]
 
 
+GenerationStageHook = Callable[[str], None]
+GeneratedImageHook = Callable[[str, GeneratedImageAnalysis], None]
+
+
 class _JobSession(Protocol):
     async def call(
         self,
@@ -162,14 +167,24 @@ class GpStationAiRuntime:
         *,
         client_factory: Callable[..., GpStationClient] | None = None,
         bridge_timeout_seconds: float | None = None,
+        answer_mode: AnswerMode = "poll",
+        sdxl_models_ttl_seconds: float = 300.0,
+        job_slots: int = 1,
     ) -> None:
         if job_timeout_seconds <= 0:
             raise ValueError("job_timeout_seconds must be greater than zero")
         if bridge_timeout_seconds is not None and bridge_timeout_seconds <= 0:
             raise ValueError("bridge_timeout_seconds must be greater than zero")
+        if sdxl_models_ttl_seconds < 0:
+            raise ValueError("sdxl_models_ttl_seconds must not be negative")
+        if job_slots < 1:
+            raise ValueError("job_slots must be at least one")
         self._api_base_url = api_base_url
         self._client_token = client_token
         self._job_timeout_seconds = job_timeout_seconds
+        self._answer_mode = answer_mode
+        self._sdxl_models_ttl_seconds = sdxl_models_ttl_seconds
+        self._job_slots = job_slots
         self._client_factory = client_factory or GpStationClient
         self._bridge_timeout_seconds = (
             bridge_timeout_seconds
@@ -182,9 +197,13 @@ class GpStationAiRuntime:
         self._loop: asyncio.AbstractEventLoop | None = None
         self._stop_event: asyncio.Event | None = None
         self._client: GpStationClient | None = None
-        self._request_lock: asyncio.Lock | None = None
+        self._request_slots: asyncio.Semaphore | None = None
         self._startup_error: BaseException | None = None
         self._runtime_error: BaseException | None = None
+        # Catalogue cache state is only touched from the runtime loop.
+        self._sdxl_models: SdxlModelsPayload | None = None
+        self._sdxl_models_fetched_at = 0.0
+        self._sdxl_models_refresh: asyncio.Task[SdxlModelsPayload] | None = None
 
     def start(self) -> None:
         with self._state_lock:
@@ -220,10 +239,14 @@ class GpStationAiRuntime:
             self._loop = None
             self._stop_event = None
             self._client = None
-            self._request_lock = None
+            self._request_slots = None
+            self._sdxl_models = None
+            self._sdxl_models_refresh = None
 
     def analyze_image(self, image_path: Path) -> SceneAnalysis:
-        image_data = image_path.read_bytes()
+        return self.analyze_image_data(image_path.read_bytes())
+
+    def analyze_image_data(self, image_data: bytes) -> SceneAnalysis:
         if not image_data:
             raise ValueError("Scene snapshot이 비어 있습니다")
         if len(image_data) > MAX_SNAPSHOT_BYTES:
@@ -236,25 +259,39 @@ class GpStationAiRuntime:
         return self._submit(self._embed_text(text), "CLIP 텍스트 분석")
 
     def list_sdxl_models(self) -> SdxlModelsPayload:
-        return self._submit(self._list_sdxl_models(), "SDXL 모델 조회")
+        return self._submit(self._cached_sdxl_models(), "SDXL 모델 조회")
 
     def generate_images(
         self,
         image_path: Path,
         settings: SdxlGenerationSettings,
+        *,
+        on_stage: GenerationStageHook | None = None,
+        on_image: GeneratedImageHook | None = None,
     ) -> ImageGenerationAnalysis:
-        image_data = image_path.read_bytes()
-        if not image_data:
-            raise ValueError("이미지 생성 snapshot이 비어 있습니다")
-        if len(image_data) > MAX_SNAPSHOT_BYTES:
-            raise ValueError("이미지 생성 snapshot은 20 MiB를 초과할 수 없습니다")
-        bridge_timeout = self._job_timeout_seconds * (settings.count + 2) + 30
+        image_data = _validate_generation_snapshot(image_path.read_bytes())
         return self._submit(
-            self._generate_images(image_data, settings),
+            self._generate_images(image_data, settings, on_stage, on_image),
             "SDXL 이미지 생성",
-            bridge_timeout_seconds=bridge_timeout,
+            bridge_timeout_seconds=self._generation_bridge_timeout(settings),
         )
 
+    async def embed_text_async(self, text: str) -> bytes:
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError("CLIP 검색어가 비어 있습니다")
+        return await self._submit_async(self._embed_text(text), "CLIP 텍스트 분석")
+
+    async def list_sdxl_models_async(self) -> SdxlModelsPayload:
+        return await self._submit_async(self._cached_sdxl_models(), "SDXL 모델 조회")
+
+    async def refresh_sdxl_models_async(self) -> SdxlModelsPayload:
+        return await self._submit_async(
+            self._cached_sdxl_models(force=True), "SDXL 모델 조회"
+        )
+
+    def _generation_bridge_timeout(self, settings: SdxlGenerationSettings) -> float:
+        return self._job_timeout_seconds * (settings.count + 2) + 30
+
     def _thread_main(self) -> None:
         try:
             asyncio.run(self._serve())
@@ -272,17 +309,18 @@ class GpStationAiRuntime:
             self._client_token,
             auth_mode="bearer",
             job_api_prefix="/v1/jobs",
+            answer_mode=self._answer_mode,
         )
         try:
             loop = asyncio.get_running_loop()
             stop_event = asyncio.Event()
-            request_lock = asyncio.Lock()
+            request_slots = asyncio.Semaphore(self._job_slots)
             await client.list_launchers()
             with self._state_lock:
                 self._loop = loop
                 self._stop_event = stop_event
                 self._client = client
-                self._request_lock = request_lock
+                self._request_slots = request_slots
             self._ready.set()
             await stop_event.wait()
         finally:
@@ -295,6 +333,33 @@ class GpStationAiRuntime:
         *,
         bridge_timeout_seconds: float | None = None,
     ):
+        future = self._schedule(coroutine)
+        try:
+            return future.result(
+                timeout=bridge_timeout_seconds or self._bridge_timeout_seconds
+            )
+        except concurrent.futures.TimeoutError as error:
+            future.cancel()
+            raise TimeoutError(f"{operation} 시간이 초과되었습니다") from error
+
+    async def _submit_async(
+        self,
+        coroutine,
+        operation: str,
+        *,
+        bridge_timeout_seconds: float | None = None,
+    ):
+        future = self._schedule(coroutine)
+        try:
+            async with asyncio.timeout(
+                bridge_timeout_seconds or self._bridge_timeout_seconds
+            ):
+                return await asyncio.wrap_future(future)
+        except TimeoutError as error:
+            future.cancel()
+            raise TimeoutError(f"{operation} 시간이 초과되었습니다") from error
+
+    def _schedule(self, coroutine) -> concurrent.futures.Future:
         with self._state_lock:
             loop = self._loop
             thread = self._thread
@@ -307,20 +372,12 @@ class GpStationAiRuntime:
         if loop is None or thread is None or not thread.is_alive():
             coroutine.close()
             raise RuntimeError("GP Station AI runtime이 시작되지 않았습니다")
-
-        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
-        try:
-            return future.result(
-                timeout=bridge_timeout_seconds or self._bridge_timeout_seconds
-            )
-        except concurrent.futures.TimeoutError as error:
-            future.cancel()
-            raise TimeoutError(f"{operation} 시간이 초과되었습니다") from error
+        return asyncio.run_coroutine_threadsafe(coroutine, loop)
 
     async def _analyze_image(self, image_data: bytes) -> SceneAnalysis:
         client = self._client
-        request_lock = self._request_lock
-        if client is None or request_lock is None:
+        request_slots = self._request_slots
+        if client is None or request_slots is None:
             raise RuntimeError("GP Station AI runtime이 준비되지 않았습니다")
 
         attachment = RequestAttachment(
@@ -329,7 +386,7 @@ class GpStationAiRuntime:
             name="scene.webp",
             mime_type="image/webp",
         )
-        async with request_lock:
+        async with request_slots:
             session: _JobSession | None = None
             try:
                 clip_result = await client.run_job(
@@ -390,11 +447,11 @@ class GpStationAiRuntime:
 
     async def _embed_text(self, text: str) -> bytes:
         client = self._client
-        request_lock = self._request_lock
-        if client is None or request_lock is None:
+        request_slots = self._request_slots
+        if client is None or request_slots is None:
             raise RuntimeError("GP Station AI runtime이 준비되지 않았습니다")
 
-        async with request_lock:
+        async with request_slots:
             result = await client.run_job(
                 "ai.clip.text",
                 {"text": text},
@@ -414,13 +471,42 @@ class GpStationAiRuntime:
                 ) from error
             return struct.pack(f"<{CLIP_DIMENSIONS}f", *payload.embedding)
 
+    async def _cached_sdxl_models(self, *, force: bool = False) -> SdxlModelsPayload:
+        cached = self._sdxl_models
+        if cached is not None and not force and self._sdxl_models_ttl_seconds:
+            age = time.monotonic() - self._sdxl_models_fetched_at
+            if age >= self._sdxl_models_ttl_seconds:
+                self._start_sdxl_models_refresh()
+            return cached
+        # Shield the shared refresh so one caller's bridge timeout does not
+        # cancel the fetch other callers are waiting on.
+        return await asyncio.shield(self._start_sdxl_models_refresh())
+
+    def _start_sdxl_models_refresh(self) -> asyncio.Task[SdxlModelsPayload]:
+        task = self._sdxl_models_refresh
+        if task is None or task.done():
+            task = asyncio.create_task(self._fetch_sdxl_models())
+            # Background refresh failures keep the stale catalogue; retrieve
+            # the exception so it is not reported as never awaited.
+            task.add_done_callback(
+                lambda done: done.cancelled() or done.exception()
+            )
+            self._sdxl_models_refresh = task
+        return task
+
+    async def _fetch_sdxl_models(self) -> SdxlModelsPayload:
+        payload = await self._list_sdxl_models()
+        self._sdxl_models = payload
+        self._sdxl_models_fetched_at = time.monotonic()
+        return payload
+
     async def _list_sdxl_models(self) -> SdxlModelsPayload:
         client = self._client
-        request_lock = self._request_lock
-        if client is None or request_lock is None:
+        request_slots = self._request_slots
+        if client is None or request_slots is None:
             raise RuntimeError("GP Station AI runtime이 준비되지 않았습니다")
 
-        async with request_lock:
+        async with request_slots:
             result = await client.run_job(
                 "ai.sdxl.models",
                 {},
@@ -443,10 +529,17 @@ class GpStationAiRuntime:
         self,
         image_data: bytes,
         settings: SdxlGenerationSettings,
+        on_stage: GenerationStageHook | None = None,
+        on_image: GeneratedImageHook | None = None,
     ) -> ImageGenerationAnalysis:
+        # Hooks persist progress and results, so they run off the runtime loop.
+        async def report_stage(stage: str) -> None:
+            if on_stage is not None:
+                await asyncio.to_thread(on_stage, stage)
+
         client = self._client
-        request_lock = self._request_lock
-        if client is None or request_lock is None:
+        request_slots = self._request_slots
+        if client is None or request_slots is None:
             raise RuntimeError("GP Station AI runtime이 준비되지 않았습니다")
 
         snapshot_attachment = RequestAttachment(
@@ -455,9 +548,10 @@ class GpStationAiRuntime:
             name="snapshot.webp",
             mime_type="image/webp",
         )
-        async with request_lock:
+        async with request_slots:
             session: _JobSession | None = None
             try:
+                await report_stage("tagging")
                 wd14_result = await client.run_job(
                     "ai.wd14.tags",
                     {},
@@ -504,6 +598,7 @@ class GpStationAiRuntime:
                 if settings.seeds is not None:
                     sdxl_input["seeds"] = settings.seeds
 
+                await report_stage("rendering")
                 sdxl_result = await session.call(
                     "ai.sdxl.i2i",
                     sdxl_input,
@@ -536,6 +631,7 @@ class GpStationAiRuntime:
                         "ai.sdxl.i2i 응답 attachment가 payload와 일치하지 않습니다"
                     )
 
+                await report_stage("embedding")
                 generated: list[GeneratedImageAnalysis] = []
                 for metadata in sdxl_payload.images:
                     file = files_by_id[metadata.attachment_id]
@@ -578,17 +674,18 @@ class GpStationAiRuntime:
                         raise RuntimeError(
                             f"ai.clip.image 응답 payload가 올바르지 않습니다: {details}"
                         ) from error
-                    generated.append(
-                        GeneratedImageAnalysis(
-                            data=file.data,
-                            format=metadata.format,
-                            mime_type=metadata.mime_type,
-                            seed=metadata.seed,
-                            embedding=struct.pack(
-                                f"<{CLIP_DIMENSIONS}f", *clip_payload.embedding
-                            ),
-                        )
+                    image = GeneratedImageAnalysis(
+                        data=file.data,
+                        format=metadata.format,
+                        mime_type=metadata.mime_type,
+                        seed=metadata.seed,
+                        embedding=struct.pack(
+                            f"<{CLIP_DIMENSIONS}f", *clip_payload.embedding
+                        ),
                     )
+                    if on_image is not None:
+                        await asyncio.to_thread(on_image, prompt, image)
+                    generated.append(image)
 
                 await session.finish(timeout_seconds=self._job_timeout_seconds)
                 session = None
@@ -616,6 +713,9 @@ def start_scene_model_runtime(settings: KeyframeSettings) -> None:
         str(settings.gpstation_api_base_url),
         settings.gpstation_client_token.get_secret_value(),
         settings.gpstation_job_timeout_seconds,
+        answer_mode=settings.gpstation_answer_mode,
+        sdxl_models_ttl_seconds=settings.gpstation_sdxl_models_ttl_seconds,
+        job_slots=settings.gpstation_job_slots,
     )
     runtime.start()
     with _runtime_lock:
@@ -634,36 +734,45 @@ def stop_scene_model_runtime() -> None:
         runtime.stop()
 
 
-def analyze_scene(image_path: Path) -> SceneAnalysis:
-    with _runtime_lock:
-        runtime = _runtime
-    if runtime is None:
-        raise RuntimeError("GP Station AI runtime이 시작되지 않았습니다")
-    return runtime.analyze_image(image_path)
+def analyze_scene_data(image_data: bytes) -> SceneAnalysis:
+    return _require_runtime().analyze_image_data(image_data)
 
 
-def extract_clip_text_embedding(text: str) -> bytes:
-    with _runtime_lock:
-        runtime = _runtime
-    if runtime is None:
-        raise RuntimeError("GP Station AI runtime이 시작되지 않았습니다")
-    return runtime.embed_text(text)
+async def extract_clip_text_embedding_async(text: str) -> bytes:
+    return await _require_runtime().embed_text_async(text)
 
 
-def get_sdxl_models() -> SdxlModelsPayload:
-    with _runtime_lock:
-        runtime = _runtime
-    if runtime is None:
-        raise RuntimeError("GP Station AI runtime이 시작되지 않았습니다")
-    return runtime.list_sdxl_models()
+async def get_sdxl_models_async() -> SdxlModelsPayload:
+    return await _require_runtime().list_sdxl_models_async()
+
+
+async def refresh_sdxl_models_async() -> SdxlModelsPayload:
+    return await _require_runtime().refresh_sdxl_models_async()
 
 
 def generate_images_from_snapshot(
     image_path: Path,
     settings: SdxlGenerationSettings,
+    *,
+    on_stage: GenerationStageHook | None = None,
+    on_image: GeneratedImageHook | None = None,
 ) -> ImageGenerationAnalysis:
+    return _require_runtime().generate_images(
+        image_path, settings, on_stage=on_stage, on_image=on_image
+    )
+
+
+def _require_runtime() -> GpStationAiRuntime:
     with _runtime_lock:
         runtime = _runtime
     if runtime is None:
         raise RuntimeError("GP Station AI runtime이 시작되지 않았습니다")
-    return runtime.generate_images(image_path, settings)
+    return runtime
+
+
+def _validate_generation_snapshot(image_data: bytes) -> bytes:
+    if not image_data:
+        raise ValueError("이미지 생성 snapshot이 비어 있습니다")
+    if len(image_data) > MAX_SNAPSHOT_BYTES:
+        raise ValueError("이미지 생성 snapshot은 20 MiB를 초과할 수 없습니다")
+    return image_data
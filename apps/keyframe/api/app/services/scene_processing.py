@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import threading
 from pathlib import Path
 
-from sqlalchemy import select
+from sqlalchemy import exists, select, update
 
-from ..db import DATA_DIR, SCENE_DIR, MovieFile, Scene, SessionLocal, utc_now
-from .media_processing import _run_command
-from .scene_models import CLIP_MODEL_NAME, WD14_MODEL_REPO, analyze_scene
+from ..db import DATA_DIR, SCENE_DIR, Job, MovieFile, Scene, SessionLocal, utc_now
+from .frame_cache import write_cached_frames
+from .keyframes import load_keyframes
+from .media_processing import SNAPSHOT_QUALITY, SNAPSHOT_WIDTH
+from .scene_analysis_cache import analyze_scene
+from .scene_models import CLIP_MODEL_NAME, WD14_MODEL_REPO
+from .status_events import publish_status
 
 
 ACTIVE_SCENE_STATUSES = ("pending", "processing")
+SNAPSHOT_BATCH_SIZE = 16
+
+# Striped per-movie locks so concurrent workers on one movie share a batch.
+_snapshot_locks = [threading.Lock() for _ in range(64)]
 
 
 def process_scene(scene_id: int) -> None:
@@ -28,25 +37,16 @@ def process_scene(scene_id: int) -> None:
         timestamp_ms = scene.timestamp_ms
         snapshot_path = scene.snapshot_path
         database.commit()
+    publish_status("scene", scene_id)
 
     error_message: str | None = None
     snapshot: Path | None = None
     try:
-        snapshot = (DATA_DIR / snapshot_path).resolve() if snapshot_path else None
-        if (
-            snapshot is None
-            or not snapshot.is_relative_to(DATA_DIR.resolve())
-            or not snapshot.is_file()
-        ):
-            snapshot = create_scene_snapshot(source_path, movie_id, scene_id, timestamp_ms)
-            with SessionLocal() as database:
-                scene = database.get(Scene, scene_id)
-                if scene is None:
-                    snapshot.unlink(missing_ok=True)
-                    return
-                scene.snapshot_path = snapshot.relative_to(DATA_DIR).as_posix()
-                scene.updated_at = utc_now()
-                database.commit()
+        snapshot = _stored_snapshot(snapshot_path)
+        if snapshot is None:
+            snapshot = _extract_movie_snapshots(source_path, movie_id, scene_id, timestamp_ms)
+            if snapshot is None:
+                return
 
         analysis = analyze_scene(snapshot)
     except Exception as error:
@@ -71,51 +71,157 @@ def process_scene(scene_id: int) -> None:
             scene.analysis_error = None
         scene.updated_at = utc_now()
         database.commit()
+    publish_status("scene", scene_id)
 
 
-def create_scene_snapshot(
+def create_scene_snapshots(
     source_path: str,
     movie_id: int,
-    scene_id: int,
-    timestamp_ms: int,
-) -> Path:
+    scenes: list[tuple[int, int]],
+    keyframes: list[int] | None = None,
+) -> dict[int, Path]:
+    """Write ``SCENE_DIR/<movie>/<scene>.webp`` for ``(scene_id, timestamp_ms)`` pairs.
+
+    Frames already in the frame cache are linked; the rest are one media
+    backend call, i.e. one ffmpeg process or one opened container. Scenes
+    whose output came out empty are missing from the result.
+    """
     directory = SCENE_DIR / str(movie_id)
     directory.mkdir(parents=True, exist_ok=True)
-    final_path = directory / f"{scene_id}.webp"
-    temporary_path = directory / f"{scene_id}.tmp.webp"
-    temporary_path.unlink(missing_ok=True)
+    temporary_paths: dict[int, Path] = {}
+    for scene_id, _timestamp_ms in scenes:
+        temporary_path = directory / f"{scene_id}.tmp.webp"
+        temporary_path.unlink(missing_ok=True)
+        temporary_paths[scene_id] = temporary_path
+    snapshots: dict[int, Path] = {}
     try:
-        _run_command(
-            [
-                "ffmpeg", "-hide_banner", "-loglevel", "error", "-ss",
-                f"{timestamp_ms / 1000:.3f}", "-i", source_path, "-map", "0:v:0",
-                "-frames:v", "1", "-vf",
-                "scale=1280:-2:force_original_aspect_ratio=decrease",
-                "-c:v", "libwebp", "-q:v", "90", "-y", str(temporary_path),
-            ],
-            timeout=180,
+        write_cached_frames(
+            source_path,
+            movie_id,
+            [(timestamp_ms, temporary_paths[scene_id]) for scene_id, timestamp_ms in scenes],
+            width=SNAPSHOT_WIDTH,
+            quality=SNAPSHOT_QUALITY,
+            keyframes=keyframes,
         )
-        if not temporary_path.is_file() or temporary_path.stat().st_size == 0:
-            raise RuntimeError("FFmpeg가 Scene snapshot을 만들지 못했습니다")
-        temporary_path.replace(final_path)
-        return final_path
-    except Exception:
-        temporary_path.unlink(missing_ok=True)
-        raise
+        for scene_id, temporary_path in temporary_paths.items():
+            if not temporary_path.is_file() or temporary_path.stat().st_size == 0:
+                continue
+            final_path = directory / f"{scene_id}.webp"
+            temporary_path.replace(final_path)
+            snapshots[scene_id] = final_path
+        return snapshots
+    finally:
+        for temporary_path in temporary_paths.values():
+            temporary_path.unlink(missing_ok=True)
 
 
-def reset_scene_jobs() -> list[int]:
+def _extract_movie_snapshots(
+    source_path: str,
+    movie_id: int,
+    scene_id: int,
+    timestamp_ms: int,
+) -> Path | None:
+    """Create the scene's snapshot together with other queued scenes of its movie.
+
+    Returns ``None`` when the scene was deleted in the meantime.
+    """
+    with _snapshot_locks[movie_id % len(_snapshot_locks)]:
+        with SessionLocal() as database:
+            scene = database.get(Scene, scene_id)
+            if scene is None:
+                return None
+            # Another worker's batch may have covered this scene while we waited.
+            existing = _stored_snapshot(scene.snapshot_path)
+            if existing is not None:
+                return existing
+            siblings = database.execute(
+                select(Scene.id, Scene.timestamp_ms, Scene.snapshot_path)
+                .where(
+                    Scene.movie_file_id == movie_id,
+                    Scene.id != scene_id,
+                    Scene.analysis_status.in_(ACTIVE_SCENE_STATUSES),
+                )
+                .order_by(Scene.timestamp_ms)
+            ).all()
+            keyframes = load_keyframes(database, movie_id)
+        batch = [(scene_id, timestamp_ms)] + [
+            (sibling.id, sibling.timestamp_ms)
+            for sibling in siblings
+            if _stored_snapshot(sibling.snapshot_path) is None
+        ][:SNAPSHOT_BATCH_SIZE - 1]
+        try:
+            snapshots = create_scene_snapshots(source_path, movie_id, batch, keyframes)
+        except Exception:
+            if len(batch) == 1:
+                raise
+            # One unreadable timestamp fails the whole command; retry alone so
+            # only that scene reports the error when its own job runs.
+            snapshots = create_scene_snapshots(source_path, movie_id, batch[:1], keyframes)
+        stored = _store_snapshot_paths(snapshots)
+    if scene_id not in snapshots:
+        raise RuntimeError("FFmpeg가 Scene snapshot을 만들지 못했습니다")
+    return snapshots[scene_id] if scene_id in stored else None
+
+
+def _stored_snapshot(snapshot_path: str | None) -> Path | None:
+    if not snapshot_path:
+        return None
+    snapshot = (DATA_DIR / snapshot_path).resolve()
+    if not snapshot.is_relative_to(DATA_DIR.resolve()) or not snapshot.is_file():
+        return None
+    return snapshot
+
+
+def _store_snapshot_paths(snapshots: dict[int, Path]) -> set[int]:
+    """Record snapshot paths and delete files of scenes removed meanwhile."""
     with SessionLocal() as database:
-        processing = database.scalars(
-            select(Scene).where(Scene.analysis_status == "processing")
-        ).all()
-        for scene in processing:
-            scene.analysis_status = "pending"
-            scene.analysis_error = None
+        scenes = {
+            scene.id: scene
+            for scene in database.scalars(
+                select(Scene).where(Scene.id.in_(snapshots))
+            ).all()
+        }
+        for scene_id, snapshot in snapshots.items():
+            scene = scenes.get(scene_id)
+            if scene is None:
+                snapshot.unlink(missing_ok=True)
+                continue
+            scene.snapshot_path = snapshot.relative_to(DATA_DIR).as_posix()
             scene.updated_at = utc_now()
-        database.flush()
+        database.commit()
+    return set(scenes)
+
+
+def fail_scene(scene_id: int, error_message: str) -> None:
+    """Mark an active scene failed when its analysis job cannot finish."""
+    with SessionLocal() as database:
+        database.execute(
+            update(Scene)
+            .where(Scene.id == scene_id, Scene.analysis_status.in_(ACTIVE_SCENE_STATUSES))
+            .values(
+                analysis_status="failed",
+                analysis_error=error_message[-2000:],
+                updated_at=utc_now(),
+            )
+        )
+        database.commit()
+    publish_status("scene", scene_id)
+
+
+def reset_scene_jobs() -> list[int]:
+    """Return active scenes that have no row in the jobs table."""
+    orphaned = ~exists().where(Job.job_type == "scene", Job.item_id == Scene.id)
+    with SessionLocal() as database:
+        database.execute(
+            update(Scene)
+            .where(Scene.analysis_status == "processing", orphaned)
+            .values(analysis_status="pending", analysis_error=None, updated_at=utc_now())
+            .execution_options(synchronize_session=False)
+        )
         ids = list(database.scalars(
-            select(Scene.id).where(Scene.analysis_status == "pending").order_by(Scene.id)
+            select(Scene.id)
+            .where(Scene.analysis_status == "pending", orphaned)
+            .order_by(Scene.movie_file_id, Scene.timestamp_ms)
         ).all())
         database.commit()
         return ids
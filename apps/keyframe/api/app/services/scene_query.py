@@ -3,12 +3,16 @@ from __future__ import annotations
 import struct
 from pathlib import Path
 
-from sqlalchemy import func, select
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 
 from ..db import DATA_DIR, SCENE_DIR, MovieFile, Scene, SessionLocal, utc_now
+from .counters import counter_value
+from .keyframes import load_keyframes, nearest_keyframe
+from .media_cache import versioned_url
 from .movie_query import iso_utc
-from .scene_models import CLIP_MODEL_NAME, extract_clip_text_embedding
+from .scene_models import CLIP_MODEL_NAME, extract_clip_text_embedding_async
 
 
 def serialize_scene(scene: Scene) -> dict:
@@ -22,9 +26,7 @@ def serialize_scene(scene: Scene) -> dict:
         "prompt_model": scene.prompt_model,
         "analysis_status": scene.analysis_status,
         "analysis_error": scene.analysis_error,
-        "snapshot_url": (
-            f"/api/scenes/{scene.id}/snapshot" if scene.snapshot_path else None
-        ),
+        "snapshot_url": versioned_url(f"/api/scenes/{scene.id}/snapshot", scene.snapshot_path),
         "created_at": iso_utc(scene.created_at),
         "updated_at": iso_utc(scene.updated_at),
     }
@@ -54,18 +56,22 @@ def _rank_scenes_by_embedding(reference_embedding: bytes, rows) -> list[tuple]:
     return ranked
 
 
-def get_scene_page(query: str | None, offset: int, limit: int) -> dict:
+async def search_scene_page(query: str | None, offset: int, limit: int) -> dict:
     search_query = query.strip() if query else ""
     query_embedding = (
-        extract_clip_text_embedding(search_query) if search_query else None
+        await extract_clip_text_embedding_async(search_query) if search_query else None
     )
+    return await run_in_threadpool(get_scene_page, query_embedding, offset, limit)
+
+
+def get_scene_page(query_embedding: bytes | None, offset: int, limit: int) -> dict:
     if query_embedding is not None and (
         len(query_embedding) == 0 or len(query_embedding) % 4
     ):
         raise RuntimeError("CLIP 텍스트 임베딩 형식이 올바르지 않습니다")
 
     with SessionLocal() as database:
-        if not search_query:
+        if query_embedding is None:
             rows = database.execute(
                 select(Scene, MovieFile.title)
                 .join(MovieFile, MovieFile.id == Scene.movie_file_id)
@@ -73,9 +79,8 @@ def get_scene_page(query: str | None, offset: int, limit: int) -> dict:
                 .offset(offset)
                 .limit(limit)
             ).all()
-            total = database.scalar(select(func.count(Scene.id))) or 0
+            total = counter_value(database, "scenes")
         else:
-            assert query_embedding is not None
             candidates = database.execute(
                 select(Scene, MovieFile.title)
                 .join(MovieFile, MovieFile.id == Scene.movie_file_id)
@@ -176,13 +181,34 @@ def list_scenes(movie_id: int) -> list[dict] | None:
         return [serialize_scene(scene) for scene in scenes]
 
 
-def create_scene(movie_id: int, timestamp_ms: int) -> dict:
+def get_scene_changes(ids: list[int]) -> list[dict]:
+    """Current state of changed scenes for the status event stream."""
+    with SessionLocal() as database:
+        scenes = []
+        for start in range(0, len(ids), 500):
+            scenes.extend(
+                database.scalars(select(Scene).where(Scene.id.in_(ids[start : start + 500])))
+            )
+        return [serialize_scene(scene) for scene in scenes]
+
+
+def create_scene(movie_id: int, timestamp_ms: int, snap_to_keyframe: bool = False) -> dict:
     with SessionLocal() as database:
         movie = database.get(MovieFile, movie_id)
         if movie is None:
             raise LookupError("영상을 찾을 수 없습니다")
         if movie.duration_ms is not None and timestamp_ms > movie.duration_ms:
             raise ValueError("영상 길이를 벗어난 timestamp입니다")
+        if snap_to_keyframe:
+            # Without an index the requested timestamp is kept as is.
+            keyframes = load_keyframes(database, movie_id)
+            snapped = (
+                nearest_keyframe(keyframes, timestamp_ms, movie.duration_ms)
+                if keyframes
+                else None
+            )
+            if snapped is not None:
+                timestamp_ms = snapped
         scene = Scene(
             movie_file_id=movie_id,
             timestamp_ms=timestamp_ms,
@@ -0,0 +1,78 @@
+"""In-process log of movie and scene status changes behind ``GET /api/events``.
+
+Workers call :func:`publish_status` after committing a status change. Only
+the kind and id are recorded; the stream loads the current rows when it sends
+them, so a burst of changes to one item costs one serialization. Event ids are
+``<run>-<sequence>``: the last ``HISTORY_SIZE`` changes are kept for clients
+resuming with ``Last-Event-ID``, and an id from an earlier run or one that has
+left the history tells the client to reload instead.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from uuid import uuid4
+
+
+HISTORY_SIZE = 4096
+STATUS_KINDS = ("movie", "scene")
+
+
+class StatusEventLog:
+    def __init__(self, history_size: int = HISTORY_SIZE) -> None:
+        self.run_id = uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._events: deque[tuple[int, str, int]] = deque(maxlen=history_size)
+        self._sequence = 0
+
+    def publish(self, kind: str, item_ids: list[int]) -> None:
+        if kind not in STATUS_KINDS:
+            raise ValueError(f"unknown status kind: {kind}")
+        with self._lock:
+            for item_id in item_ids:
+                self._sequence += 1
+                self._events.append((self._sequence, kind, item_id))
+
+    def latest_id(self) -> str:
+        with self._lock:
+            return self._event_id(self._sequence)
+
+    def changes_after(self, last_event_id: str) -> tuple[str, dict[str, list[int]]] | None:
+        """Return the newest id and the changed ids per kind after ``last_event_id``.
+
+        ``None`` means the id cannot be resumed from and the client must reload.
+        """
+        run_id, _, sequence_text = last_event_id.partition("-")
+        if run_id != self.run_id or not sequence_text.isdigit():
+            return None
+        after = int(sequence_text)
+        with self._lock:
+            oldest = self._events[0][0] if self._events else self._sequence + 1
+            if after > self._sequence or after < oldest - 1:
+                return None
+            changed: dict[str, dict[int, None]] = {kind: {} for kind in STATUS_KINDS}
+            for sequence, kind, item_id in reversed(self._events):
+                if sequence <= after:
+                    break
+                changed[kind][item_id] = None
+            latest = self._event_id(self._sequence)
+        return latest, {kind: sorted(ids) for kind, ids in changed.items() if ids}
+
+    def _event_id(self, sequence: int) -> str:
+        return f"{self.run_id}-{sequence}"
+
+
+_log = StatusEventLog()
+
+
+def publish_status(kind: str, *item_ids: int) -> None:
+    _log.publish(kind, list(item_ids))
+
+
+def latest_event_id() -> str:
+    return _log.latest_id()
+
+
+def status_changes_after(last_event_id: str) -> tuple[str, dict[str, list[int]]] | None:
+    return _log.changes_after(last_event_id)
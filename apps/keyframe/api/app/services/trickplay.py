@@ -0,0 +1,202 @@
+"""Sprite sheets of downscaled frames for timeline hover previews.
+
+Each movie gets one WebP sheet, ``TRICKPLAY_DIR/<movie>-<version>.webp``,
+with a tile every ``interval_ms``, and a WebVTT file whose cues point into the
+sheet with ``#xywh=`` fragments. Every generation writes new files under its
+own version, so the bytes behind a published ``?v=`` URL never change and
+clients may cache them for good.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy.dialects.sqlite import insert
+
+from ..db import TRICKPLAY_DIR, MovieTrickplay, SessionLocal, utc_now
+
+
+TILE_WIDTH = 160
+COLUMNS = 10
+# libwebp rejects images taller than this.
+MAX_SPRITE_HEIGHT = 16_383
+
+_interval_ms: int | None = None
+
+
+@dataclass(frozen=True)
+class TrickplayLayout:
+    interval_ms: int
+    columns: int
+    rows: int
+    tile_width: int
+    tile_height: int
+    tile_count: int
+
+
+def configure_trickplay(interval_seconds: float | None) -> None:
+    """Enable sprite generation at ``interval_seconds``; ``None`` disables it."""
+    global _interval_ms
+    _interval_ms = round(interval_seconds * 1000) if interval_seconds else None
+
+
+def trickplay_interval_ms() -> int | None:
+    return _interval_ms
+
+
+def trickplay_layout(
+    duration_ms: int,
+    width: int,
+    height: int,
+    interval_ms: int,
+) -> TrickplayLayout:
+    """Fit the movie into one sheet, widening the interval for long movies."""
+    tile_height = max(2, round(TILE_WIDTH * height / width / 2) * 2)
+    max_tiles = COLUMNS * (MAX_SPRITE_HEIGHT // tile_height)
+    if math.ceil(duration_ms / interval_ms) > max_tiles:
+        interval_ms = math.ceil(duration_ms / max_tiles / 1000) * 1000
+    tile_count = max(1, math.ceil(duration_ms / interval_ms))
+    return TrickplayLayout(
+        interval_ms=interval_ms,
+        columns=COLUMNS,
+        rows=math.ceil(tile_count / COLUMNS),
+        tile_width=TILE_WIDTH,
+        tile_height=tile_height,
+        tile_count=tile_count,
+    )
+
+
+def new_trickplay_version() -> int:
+    """Epoch milliseconds naming the files of the next generation."""
+    return time.time_ns() // 1_000_000
+
+
+def sprite_path(movie_id: int, version: int) -> Path:
+    return TRICKPLAY_DIR / f"{movie_id}-{version}.webp"
+
+
+def vtt_path(movie_id: int, version: int) -> Path:
+    return TRICKPLAY_DIR / f"{movie_id}-{version}.vtt"
+
+
+def trickplay_url(movie_id: int, trickplay: MovieTrickplay | None) -> str | None:
+    if trickplay is None:
+        return None
+    return f"/api/movies/{movie_id}/trickplay.vtt?v={trickplay.version}"
+
+
+def trickplay_file(movie_id: int, suffix: str) -> tuple[Path, str]:
+    """Return the current ``.webp`` sheet or ``.vtt`` index and its version."""
+    with SessionLocal() as database:
+        trickplay = database.get(MovieTrickplay, movie_id)
+    if trickplay is None:
+        raise FileNotFoundError("미리보기 이미지를 찾을 수 없습니다")
+    path = (sprite_path if suffix == ".webp" else vtt_path)(movie_id, trickplay.version)
+    if not path.is_file():
+        raise FileNotFoundError("미리보기 이미지를 찾을 수 없습니다")
+    return path, str(trickplay.version)
+
+
+def reuse_trickplay(
+    source_movie_id: int,
+    movie_id: int,
+    layout: TrickplayLayout,
+    version: int,
+) -> int | None:
+    """Return the version of an existing sheet that matches ``layout``, or ``None``.
+
+    The movie's own sheet is kept under its current version; a copy's sheet
+    is linked (or copied) under ``version``. Either way no frame is decoded.
+    """
+    with SessionLocal() as database:
+        existing = database.get(MovieTrickplay, source_movie_id)
+    if existing is None or _stored_layout(existing) != layout:
+        return None
+    source = sprite_path(source_movie_id, existing.version)
+    if not source.is_file():
+        return None
+    if source_movie_id == movie_id:
+        return existing.version
+    target = sprite_path(movie_id, version)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+    except OSError:
+        target.unlink(missing_ok=True)
+        return None
+    return version
+
+
+def store_trickplay(database, movie_id: int, layout: TrickplayLayout, version: int) -> None:
+    """Write the WebVTT index next to the sheet and record the layout (no commit)."""
+    _write_vtt(movie_id, layout, version)
+    values = {
+        "interval_ms": layout.interval_ms,
+        "columns": layout.columns,
+        "tile_width": layout.tile_width,
+        "tile_height": layout.tile_height,
+        "tile_count": layout.tile_count,
+        "version": version,
+        "created_at": utc_now(),
+    }
+    database.execute(
+        insert(MovieTrickplay)
+        .values(movie_file_id=movie_id, **values)
+        .on_conflict_do_update(index_elements=["movie_file_id"], set_=values)
+    )
+
+
+def render_vtt(movie_id: int, layout: TrickplayLayout, version: int) -> str:
+    sprite_url = f"/api/movies/{movie_id}/trickplay.webp?v={version}"
+    cues = ["WEBVTT", ""]
+    for index in range(layout.tile_count):
+        start_ms = index * layout.interval_ms
+        x = index % layout.columns * layout.tile_width
+        y = index // layout.columns * layout.tile_height
+        cues += [
+            f"{_vtt_time(start_ms)} --> {_vtt_time(start_ms + layout.interval_ms)}",
+            f"{sprite_url}#xywh={x},{y},{layout.tile_width},{layout.tile_height}",
+            "",
+        ]
+    return "\n".join(cues)
+
+
+def remove_stale_trickplay(movie_id: int, version: int) -> None:
+    """Delete the files of every generation except ``version``."""
+    current = {sprite_path(movie_id, version), vtt_path(movie_id, version)}
+    for path in TRICKPLAY_DIR.glob(f"{movie_id}-*"):
+        if path not in current:
+            path.unlink(missing_ok=True)
+
+
+def _stored_layout(trickplay: MovieTrickplay) -> TrickplayLayout:
+    return TrickplayLayout(
+        interval_ms=trickplay.interval_ms,
+        columns=trickplay.columns,
+        rows=math.ceil(trickplay.tile_count / trickplay.columns),
+        tile_width=trickplay.tile_width,
+        tile_height=trickplay.tile_height,
+        tile_count=trickplay.tile_count,
+    )
+
+
+def _write_vtt(movie_id: int, layout: TrickplayLayout, version: int) -> None:
+    target = vtt_path(movie_id, version)
+    temporary_path = target.with_name(f"{movie_id}-{version}.tmp.vtt")
+    temporary_path.write_text(render_vtt(movie_id, layout, version), encoding="utf-8")
+    os.replace(temporary_path, target)
+
+
+def _vtt_time(milliseconds: int) -> str:
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
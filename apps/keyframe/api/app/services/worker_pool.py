@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections.abc import Callable
+
+from .job_queue import (
+    MAX_JOB_ATTEMPTS,
+    ClaimedJob,
+    claim_jobs,
+    enqueue_jobs,
+    finish_job,
+    job_counts,
+    jobs_ahead,
+    renew_leases,
+)
+
+
+INTERACTIVE_PRIORITY = 0
+BACKGROUND_PRIORITY = 1
+DURATION_SMOOTHING = 0.2
+POLL_SECONDS = 2.0
+DROPPED_JOB_ERROR = f"작업이 {MAX_JOB_ATTEMPTS}번 중단되어 더 이상 시도하지 않습니다"
+
+
+class JobWorkerPool:
+    """Fixed worker threads that drain one job type from the ``jobs`` table.
+
+    Each job is ranked by its enqueue time plus ``priority * aging_seconds``,
+    so background work waiting longer than ``aging_seconds`` overtakes newer
+    interactive work instead of starving behind it. A dispatcher thread claims
+    as many jobs as there are idle workers in one statement, renews the leases
+    of running jobs, and polls for work enqueued by other processes.
+
+    ``on_failure(item_id, error)`` stores the error on the item when the
+    processor raises or when a job interrupted ``MAX_JOB_ATTEMPTS`` times is
+    dropped, so the item is not picked up again as orphaned on the next start.
+    """
+
+    def __init__(
+        self,
+        job_type: str,
+        processor: Callable[[int], None],
+        workers: int,
+        aging_seconds: float,
+        *,
+        owner: str,
+        lease_seconds: float,
+        poll_seconds: float = POLL_SECONDS,
+        clock: Callable[[], float] = time.time,
+        on_failure: Callable[[int, str], None] | None = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be at least one")
+        if aging_seconds <= 0:
+            raise ValueError("aging_seconds must be greater than zero")
+        if lease_seconds <= 0:
+            raise ValueError("lease_seconds must be greater than zero")
+        self.job_type = job_type
+        self.workers = workers
+        self._processor = processor
+        self._on_failure = on_failure
+        self._aging_seconds = aging_seconds
+        self._owner = owner
+        self._lease_seconds = lease_seconds
+        self._poll_seconds = min(poll_seconds, lease_seconds / 3)
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._wake = threading.Event()
+        self._claimed: queue.SimpleQueue[ClaimedJob | None] = queue.SimpleQueue()
+        self._idle = workers
+        self._running: dict[int, float] = {}
+        self._average_seconds: float | None = None
+        self._closed = False
+        self._threads = [
+            threading.Thread(
+                target=self._dispatch,
+                name=f"keyframe-{job_type}-dispatch",
+                daemon=True,
+            ),
+            *(
+                threading.Thread(
+                    target=self._work,
+                    name=f"keyframe-{job_type}-{index}",
+                    daemon=True,
+                )
+                for index in range(workers)
+            ),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, item_ids: list[int], priority: int) -> None:
+        """Enqueue items; items already queued only move ahead."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("worker pool가 종료되었습니다")
+        enqueue_jobs(
+            self.job_type,
+            item_ids,
+            priority,
+            self._aging_seconds,
+            now=self._clock(),
+        )
+        self._wake.set()
+
+    def positions(self, item_ids: list[int]) -> dict[int, dict]:
+        now = self._clock()
+        ahead = jobs_ahead(self.job_type, item_ids, now=now)
+        if not ahead:
+            return {}
+        running = job_counts(self.job_type, now=now)["running"]
+        with self._condition:
+            average = self._average_seconds
+        result: dict[int, dict] = {}
+        for item_id, waiting_ahead in ahead.items():
+            if waiting_ahead is None:
+                result[item_id] = {
+                    "state": "running",
+                    "position": 0,
+                    "estimated_wait_seconds": 0.0,
+                }
+                continue
+            # Items ahead of this one plus those already running are drained
+            # by every worker in parallel.
+            rounds = (waiting_ahead + running) // self.workers
+            result[item_id] = {
+                "state": "queued",
+                "position": waiting_ahead + 1,
+                "estimated_wait_seconds": (
+                    round(rounds * average, 1) if average is not None else None
+                ),
+            }
+        return result
+
+    def stats(self) -> dict:
+        counts = job_counts(self.job_type, now=self._clock())
+        with self._condition:
+            average = self._average_seconds
+        return {
+            "workers": self.workers,
+            "queued": counts["queued"],
+            "running": counts["running"],
+            "average_seconds": round(average, 2) if average is not None else None,
+        }
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Stop claiming work; queued jobs stay in the table for the next start."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._wake.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _dispatch(self) -> None:
+        renewed_at = self._clock()
+        while True:
+            with self._condition:
+                if self._closed:
+                    break
+                idle = self._idle
+                running_ids = list(self._running)
+            claimed: list[ClaimedJob] = []
+            try:
+                now = self._clock()
+                if running_ids and now - renewed_at >= self._lease_seconds / 3:
+                    renew_leases(self._owner, running_ids, self._lease_seconds, now=now)
+                    renewed_at = now
+                if idle:
+                    claimed = claim_jobs(
+                        self.job_type,
+                        self._owner,
+                        idle,
+                        self._lease_seconds,
+                        now=now,
+                    )
+            except Exception:
+                # The database may be busy; the next poll tries again.
+                claimed = []
+            if claimed:
+                with self._condition:
+                    self._idle -= len(claimed)
+                    for job in claimed:
+                        self._running[job.id] = self._clock()
+                for job in claimed:
+                    self._claimed.put(job)
+                continue
+            self._wake.wait(self._poll_seconds)
+            self._wake.clear()
+        for _ in range(self.workers):
+            self._claimed.put(None)
+
+    def _work(self) -> None:
+        while True:
+            job = self._claimed.get()
+            if job is None:
+                return
+            finished = False
+            try:
+                finished = self._run(job)
+            finally:
+                if finished:
+                    try:
+                        finish_job(job.id, self._owner)
+                    except Exception:
+                        # The lease expires and the job is claimed again.
+                        pass
+                with self._condition:
+                    started_at = self._running.pop(job.id, None)
+                    self._idle += 1
+                    if started_at is not None and job.attempts <= MAX_JOB_ATTEMPTS:
+                        elapsed = self._clock() - started_at
+                        self._average_seconds = (
+                            elapsed
+                            if self._average_seconds is None
+                            else self._average_seconds
+                            + DURATION_SMOOTHING * (elapsed - self._average_seconds)
+                        )
+                self._wake.set()
+
+    def _run(self, job: ClaimedJob) -> bool:
+        """Process the item; ``False`` leaves the job to be claimed again."""
+        if job.attempts > MAX_JOB_ATTEMPTS:
+            error_message = DROPPED_JOB_ERROR
+        else:
+            try:
+                self._processor(job.item_id)
+                return True
+            except Exception as error:
+                error_message = str(error) or error.__class__.__name__
+        if self._on_failure is None:
+            return True
+        try:
+            self._on_failure(job.item_id, error_message)
+        except Exception:
+            return False
+        return True
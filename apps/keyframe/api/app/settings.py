@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic import AnyHttpUrl, Field, SecretStr, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -17,6 +18,17 @@ class KeyframeSettings(BaseSettings):
     gpstation_api_base_url: AnyHttpUrl
     gpstation_client_token: SecretStr
     gpstation_job_timeout_seconds: float = Field(default=600.0, gt=0)
+    gpstation_answer_mode: Literal["poll", "inline", "stream"] = "poll"
+    gpstation_sdxl_models_ttl_seconds: float = Field(default=300.0, ge=0)
+    gpstation_job_slots: int = Field(default=1, ge=1, le=32)
+    media_metadata_workers: int | None = Field(default=None, ge=1, le=32)
+    media_queue_aging_seconds: float = Field(default=300.0, gt=0)
+    media_job_lease_seconds: float = Field(default=60.0, ge=5)
+    media_backend: Literal["auto", "ffmpeg", "pyav"] = "auto"
+    frame_cache_max_mb: int = Field(default=1024, ge=0)
+    trickplay_interval_seconds: float | None = Field(default=None, ge=1)
+    playback_workers: int = Field(default=1, ge=1, le=8)
+    library_sync_interval_seconds: float = Field(default=900.0, ge=0)
 
     @field_validator("gpstation_client_token", mode="before")
     @classmethod
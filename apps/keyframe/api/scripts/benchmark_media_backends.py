@@ -0,0 +1,76 @@
+"""Compare per-movie processing time of the media backends.
+
+Usage (from ``apps/keyframe/api``)::
+
+    poetry run python -m scripts.benchmark_media_backends movie.mp4 [...] [--repeat 3]
+
+Each backend probes, indexes keyframes and writes the thumbnail of every movie
+into a temporary directory, so the real data directory is left untouched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.services import media_processing
+from app.services.media_processing import MediaBackend, SubprocessMediaBackend
+
+
+def _backends() -> list[MediaBackend]:
+    backends: list[MediaBackend] = [SubprocessMediaBackend()]
+    try:
+        from app.services.pyav_backend import PyAvMediaBackend
+    except ImportError:
+        print("PyAV(av) 패키지가 없어 ffmpeg backend만 측정합니다")
+    else:
+        backends.append(PyAvMediaBackend())
+    return backends
+
+
+def _measure(backend: MediaBackend, path: Path, repeat: int) -> float | None:
+    durations = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        try:
+            backend.inspect_movie(str(path), 1)
+        except RuntimeError as error:
+            print(f"{backend.name}: {path.name}: {error}")
+            return None
+        durations.append(time.perf_counter() - started_at)
+    return statistics.median(durations)
+
+
+def _format(seconds: float | None) -> str:
+    return f"{seconds:9.3f}s" if seconds is not None else "failed".rjust(10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("movies", nargs="+", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    backends = _backends()
+    with tempfile.TemporaryDirectory() as directory:
+        media_processing.DATA_DIR = Path(directory)
+        media_processing.THUMBNAIL_DIR = Path(directory) / "thumbnails"
+        print("movie".ljust(40), *(backend.name.rjust(10) for backend in backends))
+        results: list[list[float | None]] = [[] for _ in backends]
+        for movie in arguments.movies:
+            row = [_measure(backend, movie, arguments.repeat) for backend in backends]
+            for column, seconds in zip(results, row):
+                column.append(seconds)
+            print(movie.name[:40].ljust(40), *(_format(seconds) for seconds in row))
+        averages = [
+            statistics.mean(measured) if (measured := [s for s in column if s is not None]) else None
+            for column in results
+        ]
+        print("average".ljust(40), *(_format(seconds) for seconds in averages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Time the startup normalization steps on a synthetic large library.
+
+Usage (from ``apps/keyframe/api``)::
+
+    poetry run python -m scripts.benchmark_startup [--movies 20000] [--scenes 500000] [--repeat 3]
+
+A ``keyframe.sqlite3`` with the requested number of movies and scenes is
+generated in a temporary directory, with a small share of rows left in the
+states an interrupted run leaves behind. Every repetition runs on a fresh copy,
+so the real data directory is left untouched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, Job, MovieFile, Scene
+from app.services import (
+    image_generation,
+    media_processing,
+    playback,
+    scene_detection,
+    scene_processing,
+)
+
+
+STEPS: list[tuple[str, Callable[[], object]]] = [
+    ("normalize_playback_states", playback.normalize_playback_states),
+    ("reset_scene_jobs", scene_processing.reset_scene_jobs),
+    ("reset_interrupted_jobs", media_processing.reset_interrupted_jobs),
+    ("reset_image_jobs", image_generation.reset_image_jobs),
+    ("reset_detection_jobs", scene_detection.reset_detection_jobs),
+    ("reset_playback_jobs", playback.reset_playback_jobs),
+]
+MODULES = (image_generation, media_processing, playback, scene_detection, scene_processing)
+BATCH_SIZE = 10_000
+
+
+def _engine(path: Path):
+    engine = create_engine(f"sqlite:///{path.as_posix()}")
+
+    @event.listens_for(engine, "connect")
+    def configure_sqlite(connection, _record) -> None:
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    return engine
+
+
+def _movie(number: int, now: datetime) -> dict:
+    # Every 100th movie is mid-metadata, every 50th is an HEVC file marked
+    # failed by an older version, the rest are direct-playback MP4s.
+    hevc = number % 50 == 0
+    return {
+        "id": number,
+        "title": f"movie-{number}",
+        "path": f"/library/movie-{number}.mp4",
+        "normalized_path": f"/library/movie-{number}.mp4",
+        "ext": ".mp4",
+        "size_bytes": 1_000_000,
+        "file_modified_at": now,
+        "duration_ms": 3_600_000,
+        "metadata_status": "processing" if number % 100 == 0 else "ready",
+        "video_codec": "hevc" if hevc else "h264",
+        "audio_codec": "aac",
+        "playback_status": "failed" if hevc else "direct",
+        "playback_error": playback.UNSUPPORTED_CODEC_ERROR if hevc else None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _scene(number: int, movies: int, now: datetime) -> dict:
+    status = "processing" if number % 1_000 == 0 else "pending" if number % 200 == 0 else "ready"
+    return {
+        "id": number,
+        "movie_file_id": number % movies + 1,
+        "timestamp_ms": number,
+        "analysis_status": status,
+        "play_count": 0,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def build_library(path: Path, movies: int, scenes: int) -> None:
+    engine = _engine(path)
+    Base.metadata.create_all(engine)
+    now = datetime(2026, 1, 1)
+    with engine.begin() as connection:
+        for start in range(1, movies + 1, BATCH_SIZE):
+            stop = min(start + BATCH_SIZE, movies + 1)
+            connection.execute(insert(MovieFile), [_movie(number, now) for number in range(start, stop)])
+        for start in range(1, scenes + 1, BATCH_SIZE):
+            stop = min(start + BATCH_SIZE, scenes + 1)
+            connection.execute(
+                insert(Scene), [_scene(number, movies, now) for number in range(start, stop)]
+            )
+        # Half of the pending scenes still have their job row.
+        connection.execute(
+            insert(Job),
+            [
+                {
+                    "job_type": "scene",
+                    "item_id": number,
+                    "priority": 1,
+                    "rank": 0.0,
+                    "attempts": 0,
+                    "created_at": now,
+                }
+                for number in range(400, scenes + 1, 400)
+            ],
+        )
+    engine.dispose()
+
+
+def run_steps(path: Path) -> dict[str, float]:
+    engine = _engine(path)
+    factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    for module in MODULES:
+        module.SessionLocal = factory
+    durations = {}
+    try:
+        for name, step in STEPS:
+            started_at = time.perf_counter()
+            step()
+            durations[name] = time.perf_counter() - started_at
+    finally:
+        engine.dispose()
+    return durations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", type=int, default=20_000)
+    parser.add_argument("--scenes", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / "keyframe.sqlite3"
+        started_at = time.perf_counter()
+        build_library(source, arguments.movies, arguments.scenes)
+        print(
+            f"{arguments.movies:,} movies, {arguments.scenes:,} scenes "
+            f"generated in {time.perf_counter() - started_at:.1f}s"
+        )
+        runs: list[dict[str, float]] = []
+        for repetition in range(arguments.repeat):
+            working_copy = Path(directory) / f"run-{repetition}.sqlite3"
+            shutil.copyfile(source, working_copy)
+            runs.append(run_steps(working_copy))
+        for name, _step in STEPS:
+            print(name.ljust(28), f"{statistics.median(run[name] for run in runs):9.3f}s")
+        print("total".ljust(28), f"{statistics.median(sum(run.values()) for run in runs):9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
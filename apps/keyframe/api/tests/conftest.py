@@ -15,16 +15,24 @@ if str(API_ROOT) not in sys.path:
 from app import main  # noqa: E402
 from app.db import Base  # noqa: E402
 from app.routers import health, images, movies  # noqa: E402
+from app.settings import KeyframeSettings  # noqa: E402
 from app.services import (  # noqa: E402
+    frame_cache,
     image_generation,
     image_query,
+    job_queue,
+    library_sync,
     media_processing,
     media_queue,
     movie_import,
     movie_query,
     playback,
+    probe_cache,
+    scene_analysis_cache,
+    scene_detection,
     scene_processing,
     scene_query,
+    trickplay,
 )
 
 
@@ -44,15 +52,26 @@ def session_factory(tmp_path, monkeypatch):
 
     Base.metadata.create_all(engine)
     factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(frame_cache, "FRAME_CACHE_DIR", tmp_path / "frames")
+    monkeypatch.setattr(trickplay, "TRICKPLAY_DIR", tmp_path / "trickplay")
+    monkeypatch.setattr(playback, "PLAYBACK_DIR", tmp_path / "prepared")
+    monkeypatch.setattr(probe_cache, "PROBE_CACHE_DIR", tmp_path / "probe_cache")
     for module in (
+        frame_cache,
         movie_import,
         movie_query,
         image_generation,
         image_query,
+        job_queue,
+        library_sync,
         media_processing,
         playback,
+        probe_cache,
+        scene_analysis_cache,
+        scene_detection,
         scene_processing,
         scene_query,
+        trickplay,
         health,
         movies,
     ):
@@ -66,12 +85,22 @@ def api_client(session_factory, monkeypatch):
     from fastapi.testclient import TestClient
 
     monkeypatch.setattr(main, "init_db", lambda: None)
-    monkeypatch.setattr(main, "KeyframeSettings", lambda: object())
+    monkeypatch.setattr(main, "KeyframeSettings", KeyframeSettings.model_construct)
     monkeypatch.setattr(main, "start_scene_model_runtime", lambda _settings: None)
     monkeypatch.setattr(main, "stop_scene_model_runtime", lambda: None)
+    # start_media_queue swaps module-wide media settings; restore them.
+    monkeypatch.setattr(media_processing, "_media_backend", media_processing._media_backend)
+    monkeypatch.setattr(frame_cache, "_budget_bytes", frame_cache._budget_bytes)
+    monkeypatch.setattr(trickplay, "_interval_ms", trickplay._interval_ms)
     monkeypatch.setattr(media_queue, "reset_interrupted_jobs", lambda: [])
     monkeypatch.setattr(media_queue, "reset_scene_jobs", lambda: [])
     monkeypatch.setattr(media_queue, "process_movie_metadata", lambda _movie_id: None)
     monkeypatch.setattr(media_queue, "process_scene", lambda _scene_id: None)
+    monkeypatch.setattr(media_queue, "reset_image_jobs", lambda: [])
+    monkeypatch.setattr(media_queue, "process_image_job", lambda _job_id: None)
+    monkeypatch.setattr(media_queue, "reset_detection_jobs", lambda: [])
+    monkeypatch.setattr(media_queue, "process_detection_job", lambda _job_id, **_kwargs: None)
+    monkeypatch.setattr(media_queue, "reset_playback_jobs", lambda: [])
+    monkeypatch.setattr(media_queue, "process_playback", lambda _movie_id: None)
     with TestClient(main.app) as client:
         yield client
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+from fastapi import FastAPI
+
+from app.routers import events
+from app.services import media_processing, status_events
+from app.services.status_events import StatusEventLog
+from tests.test_models import make_movie
+
+
+class DisconnectingRequest:
+    """Stays connected for ``rounds`` checks of the stream loop."""
+
+    def __init__(self, app, rounds):
+        self.app = app
+        self.rounds = rounds
+
+    async def is_disconnected(self):
+        self.rounds -= 1
+        return self.rounds < 0
+
+
+def _collect(request, last_event_id=None):
+    async def run():
+        return [chunk async for chunk in events._status_event_stream(request, last_event_id)]
+
+    return asyncio.run(run())
+
+
+def _parse(chunk):
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if ": " in line)
+    return fields.get("id"), fields.get("event"), json.loads(fields.get("data", "null"))
+
+
+def test_stream_pushes_status_changes_and_resumes(session_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(status_events, "_log", StatusEventLog())
+    monkeypatch.setattr(events, "STATUS_EVENT_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(events, "attach_queue_status", lambda _app, _type, items: items)
+    with session_factory() as database:
+        movie = make_movie(str(tmp_path / "movie.mp4"), "pending")
+        database.add(movie)
+        database.commit()
+        movie_id = movie.id
+    app = FastAPI()
+    ready_id, ready_event, _ = _parse(_collect(DisconnectingRequest(app, 0))[0])
+    assert ready_event == "ready"
+
+    def fail_probe(_path, _movie_id):
+        raise RuntimeError("codec error")
+
+    monkeypatch.setattr(media_processing.media_backend(), "inspect_movie", fail_probe)
+    media_processing.process_movie_metadata(movie_id)
+
+    chunks = _collect(DisconnectingRequest(app, 1), ready_id)
+    # A resumed stream does not ask the client to reload what it already has.
+    assert _parse(chunks[0])[1] == "resumed"
+    event_id, event, data = _parse(chunks[-1])
+    assert event == "movies"
+    assert [(item["id"], item["metadata_status"]) for item in data["items"]] == [(movie_id, "failed")]
+    assert data["processing_count"] == 0
+    assert event_id == status_events.latest_event_id()
+
+    # Nothing is replayed after the last delivered id; an unknown id resets.
+    assert len(_collect(DisconnectingRequest(app, 1), event_id)) == 1
+    assert _parse(_collect(DisconnectingRequest(app, 0), "stale-1")[0])[1] == "reset"
@@ -1,4 +1,12 @@
+import itertools
+import json
+
+from sqlalchemy import event, select
+
+from app.db import MovieFile
 from app.routers import movies
+from app.services import library_sync, media_cache
+from app.services.fingerprint import store_fingerprint
 from tests.test_models import make_movie
 
 
@@ -14,7 +22,94 @@ def test_movies_api_uses_stable_id_cursor(api_client, session_factory, tmp_path)
     assert not ({item["id"] for item in first["items"]} & {item["id"] for item in second["items"]})
 
 
-def test_movie_thumbnail_is_served_with_revalidation_cache_policy(
+def _sortable_library(session_factory, tmp_path):
+    with session_factory() as database:
+        for number in range(23):
+            ready = number % 4 != 0
+            movie = make_movie(
+                str(tmp_path / f"{'bcab'[number % 4]}-{number:02d}.mp4"),
+                status="ready" if ready else "pending",
+                duration_ms=(number % 6) * 1000 if ready else None,
+                width=[1280, 1920][number % 2] if ready else None,
+                height=[720, 1080][number % 3 % 2] if ready else None,
+                video_codec=["h264", "hevc"][number % 2] if ready else None,
+            )
+            movie.size_bytes = 1000 + number % 5
+            database.add(movie)
+        database.commit()
+
+
+def _walk_pages(api_client, **params):
+    items, before_id = [], None
+    while True:
+        page = api_client.get(
+            "/api/movies", params={"limit": 5, **params, **({"before_id": before_id} if before_id else {})}
+        ).json()
+        items.extend(page["items"])
+        if not page["has_more"]:
+            return page["total"], [item["id"] for item in items]
+        before_id = page["next_cursor"]
+
+
+def test_movies_api_sorts_and_filters_with_keyset_pages(api_client, session_factory, tmp_path):
+    _sortable_library(session_factory, tmp_path)
+    with session_factory() as database:
+        movies = database.scalars(select(MovieFile)).all()
+    keys = {
+        "id": lambda movie: (),
+        "title": lambda movie: (movie.title,),
+        "duration": lambda movie: (movie.duration_ms,),
+        "resolution": lambda movie: (movie.height, movie.width),
+        "size": lambda movie: (movie.size_bytes,),
+        "codec": lambda movie: (movie.video_codec,),
+    }
+    for (sort, key), order, status in itertools.product(
+        keys.items(), ("asc", "desc"), (None, "ready", "pending")
+    ):
+        selected = [movie for movie in movies if status is None or movie.metadata_status == status]
+        valued = [movie for movie in selected if None not in key(movie)]
+        missing = [movie for movie in selected if None in key(movie)]
+        descending = order == "desc"
+        expected = [
+            movie.id
+            for movie in sorted(valued, key=lambda movie: (*key(movie), movie.id), reverse=descending)
+        ] + sorted((movie.id for movie in missing), reverse=descending)
+        params = {"sort": sort, "order": order, **({"status": status} if status else {})}
+        assert _walk_pages(api_client, **params) == (len(selected), expected), params
+
+
+def test_movie_sorts_page_in_index_order(api_client, session_factory, tmp_path):
+    _sortable_library(session_factory, tmp_path)
+    engine = session_factory.kw["bind"]
+    statements = []
+
+    def capture(_connection, _cursor, statement, parameters, _context, _executemany):
+        if statement.lstrip().startswith("SELECT movie_files.id"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        for sort, status in itertools.product(
+            ("id", "title", "duration", "resolution", "size", "codec"), (None, "ready")
+        ):
+            params = {"sort": sort, "limit": 5, **({"status": status} if status else {})}
+            first = api_client.get("/api/movies", params=params).json()
+            api_client.get("/api/movies", params={**params, "before_id": first["next_cursor"]})
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert statements
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = " ".join(
+                row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            )
+            # ORDER BY id alone walks the rowid table, which is in id order too.
+            assert "TEMP B-TREE" not in plan, (statement, plan)
+            assert "USING" in plan or plan == "SCAN movie_files", (statement, plan)
+
+
+def test_movie_thumbnail_url_is_versioned_and_cached_immutably(
     api_client, session_factory, tmp_path, monkeypatch
 ):
     data_dir = tmp_path / "data"
@@ -22,6 +117,7 @@ def test_movie_thumbnail_is_served_with_revalidation_cache_policy(
     thumbnail.parent.mkdir(parents=True)
     thumbnail.write_bytes(b"thumbnail")
     monkeypatch.setattr(movies, "DATA_DIR", data_dir)
+    monkeypatch.setattr(media_cache, "DATA_DIR", data_dir)
 
     with session_factory() as database:
         movie = make_movie(
@@ -32,11 +128,23 @@ def test_movie_thumbnail_is_served_with_revalidation_cache_policy(
         database.commit()
         movie_id = movie.id
 
-    response = api_client.get(f"/api/movies/{movie_id}/thumbnail")
+    thumbnail_url = api_client.get(f"/api/movies/{movie_id}").json()["thumbnail_url"]
+    version = media_cache.file_version(thumbnail)
+    assert thumbnail_url == f"/api/movies/{movie_id}/thumbnail?v={version}"
+    response = api_client.get(thumbnail_url)
 
     assert response.content == b"thumbnail"
     assert response.headers["content-type"] == "image/webp"
-    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    etag = response.headers["etag"]
+    assert etag == f'"thumbnail-{movie_id}-{version}"'
+
+    # Revalidation is answered from the URL alone, even once the file is gone.
+    thumbnail.unlink()
+    cached = api_client.get(thumbnail_url, headers={"If-None-Match": etag})
+    assert (cached.status_code, cached.content) == (304, b"")
+    assert api_client.get(thumbnail_url).status_code == 404
+    assert api_client.get(f"/api/movies/{movie_id}").json()["thumbnail_url"] is None
 
 
 def test_file_import_cancel_and_status_response(api_client, tmp_path, monkeypatch):
@@ -64,3 +172,81 @@ def test_folder_endpoint_registers_nested_videos(api_client, tmp_path, monkeypat
     assert response.status_code == 200
     assert response.json()["added_count"] == 1
     assert scheduled == response.json()["added_ids"]
+
+
+def test_folder_stream_reports_scan_progress_then_result(api_client, tmp_path, monkeypatch):
+    folder = tmp_path / "library"
+    for name in ("a", "b"):
+        (folder / name).mkdir(parents=True)
+        (folder / name / f"{name}.mp4").write_bytes(b"video")
+    monkeypatch.setattr(movies, "choose_video_folder", lambda: str(folder))
+    scheduled = []
+    monkeypatch.setattr(movies, "schedule_movies", lambda _app, ids: scheduled.extend(ids))
+
+    response = api_client.post("/api/movies/import/folder/stream")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[-2] == {"type": "progress", "directories": 3, "videos": 2}
+    assert events[-1]["type"] == "result"
+    assert events[-1]["added_count"] == 2
+    assert sorted(scheduled) == sorted(events[-1]["added_ids"])
+
+    monkeypatch.setattr(movies, "choose_video_folder", lambda: None)
+    cancelled = api_client.post("/api/movies/import/folder/stream")
+    assert json.loads(cancelled.text)["cancelled"] is True
+
+
+def test_folder_import_remembers_root_for_library_sync(api_client, tmp_path, monkeypatch):
+    folder = tmp_path / "library"
+    folder.mkdir()
+    (folder / "clip.mp4").write_bytes(b"video")
+    monkeypatch.setattr(movies, "choose_video_folder", lambda: str(folder))
+    scheduled = []
+    monkeypatch.setattr(movies, "schedule_movies", lambda _app, ids: scheduled.extend(ids))
+    api_client.post("/api/movies/import/folder")
+    assert [item["path"] for item in api_client.get("/api/movies/library/folders").json()["items"]] == [
+        str(folder.resolve())
+    ]
+
+    (folder / "new.mp4").write_bytes(b"video")
+    synced = api_client.post("/api/movies/library/sync").json()
+    assert len(synced["added_ids"]) == 1
+    assert scheduled[-1:] == synced["added_ids"]
+
+
+def test_library_folders_report_the_last_sync_error(api_client, tmp_path, monkeypatch):
+    folder = tmp_path / "library"
+    folder.mkdir()
+    library_sync.remember_library_folder(folder)
+
+    def broken_scan(_path):
+        raise OSError("NAS 연결이 끊어졌습니다")
+
+    scan_video_folder = library_sync.scan_video_folder
+    monkeypatch.setattr(library_sync, "scan_video_folder", broken_scan)
+    failed = api_client.post("/api/movies/library/sync")
+    assert failed.status_code == 503
+    last_sync = api_client.get("/api/movies/library/folders").json()["last_sync"]
+    assert last_sync["error"] == "NAS 연결이 끊어졌습니다" and last_sync["finished_at"]
+
+    monkeypatch.setattr(library_sync, "scan_video_folder", scan_video_folder)
+    monkeypatch.setattr(movies, "schedule_movies", lambda _app, _ids: None)
+    assert api_client.post("/api/movies/library/sync").status_code == 200
+    assert api_client.get("/api/movies/library/folders").json()["last_sync"]["error"] is None
+
+
+def test_duplicates_are_listed_in_detail_and_groups(api_client, session_factory, tmp_path):
+    with session_factory() as database:
+        first, second, other = (make_movie(str(tmp_path / f"{name}.mp4")) for name in "abc")
+        database.add_all([first, second, other])
+        database.flush()
+        for movie, fingerprint in ((first, "same"), (second, "same"), (other, "other")):
+            store_fingerprint(database, movie.id, fingerprint)
+        database.commit()
+        first_id, second_id, other_id = first.id, second.id, other.id
+
+    detail = api_client.get(f"/api/movies/{first_id}").json()
+    assert [movie["id"] for movie in detail["duplicates"]] == [second_id]
+    assert api_client.get(f"/api/movies/{other_id}").json()["duplicates"] == []
+    groups = api_client.get("/api/movies/duplicates").json()["items"]
+    assert [[movie["id"] for movie in group["movies"]] for group in groups] == [[first_id, second_id]]
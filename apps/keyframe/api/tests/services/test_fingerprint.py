@@ -0,0 +1,93 @@
+import io
+import shutil
+
+from app.db import MovieFile
+from app.services import fingerprint, media_processing, probe_cache
+from app.services.fingerprint import content_fingerprint, duplicate_movies, store_fingerprint
+from tests.test_models import make_movie
+
+
+def test_fingerprint_samples_head_middle_and_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(fingerprint, "SAMPLE_BYTES", 4)
+    original = tmp_path / "original.mp4"
+    original.write_bytes(b"head" + b"-" * 8 + b"midl" + b"-" * 8 + b"tail")
+    copy = tmp_path / "copy" / "renamed.mp4"
+    copy.parent.mkdir()
+    shutil.copyfile(original, copy)
+    assert content_fingerprint(copy) == content_fingerprint(original)
+
+    # Bytes between the samples are not read; the samples and the size are.
+    unsampled = tmp_path / "unsampled.mp4"
+    unsampled.write_bytes(b"head" + b"+" * 8 + b"midl" + b"-" * 8 + b"tail")
+    middle = tmp_path / "middle.mp4"
+    middle.write_bytes(b"head" + b"-" * 8 + b"MIDL" + b"-" * 8 + b"tail")
+    longer = tmp_path / "longer.mp4"
+    longer.write_bytes(original.read_bytes() + b"!")
+    assert content_fingerprint(unsampled) == content_fingerprint(original)
+    assert content_fingerprint(middle) != content_fingerprint(original)
+    assert content_fingerprint(longer) != content_fingerprint(original)
+
+    small = tmp_path / "small.mp4"
+    small.write_bytes(b"0123456789")
+    changed = tmp_path / "changed.mp4"
+    changed.write_bytes(b"0123X56789")
+    assert content_fingerprint(small) != content_fingerprint(changed)
+
+
+class ShortReadFile(io.FileIO):
+    """Returns at most 3 bytes per read, like a slow network share."""
+
+    def readinto(self, buffer):
+        return super().readinto(memoryview(buffer)[:3])
+
+
+def test_fingerprint_does_not_depend_on_short_reads(tmp_path, monkeypatch):
+    monkeypatch.setattr(fingerprint, "SAMPLE_BYTES", 8)
+    movie = tmp_path / "movie.mp4"
+    movie.write_bytes(bytes(range(40)))
+    expected = content_fingerprint(movie)
+    monkeypatch.setattr(
+        fingerprint, "open", lambda path, _mode, buffering: ShortReadFile(path), raising=False
+    )
+    assert content_fingerprint(movie) == expected
+
+
+def test_copy_in_another_folder_reuses_ready_movie(session_factory, tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    thumbnail = data_dir / "thumbnails" / "original.webp"
+    thumbnail.parent.mkdir(parents=True)
+    thumbnail.write_bytes(b"thumbnail")
+    for module in (media_processing, probe_cache):
+        monkeypatch.setattr(module, "DATA_DIR", data_dir)
+        monkeypatch.setattr(module, "THUMBNAIL_DIR", data_dir / "thumbnails")
+
+    def fail_inspection(*_args):
+        raise AssertionError("a copy of a ready movie must not be probed")
+
+    monkeypatch.setattr(media_processing.media_backend(), "inspect_movie", fail_inspection)
+    original = tmp_path / "a" / "movie.mp4"
+    copy = tmp_path / "b" / "movie copy.mp4"
+    for path in (original, copy):
+        path.parent.mkdir()
+        path.write_bytes(b"same content")
+    with session_factory() as database:
+        ready = make_movie(
+            str(original), duration_ms=90_000, width=1920, height=1080,
+            video_codec="h264", thumbnail_path="thumbnails/original.webp",
+        )
+        pending = make_movie(str(copy), "pending")
+        database.add_all([ready, pending])
+        database.flush()
+        store_fingerprint(database, ready.id, content_fingerprint(original))
+        database.commit()
+        ready_id, copy_id = ready.id, pending.id
+
+    media_processing.process_movie_metadata(copy_id)
+
+    with session_factory() as database:
+        movie = database.get(MovieFile, copy_id)
+        assert (movie.metadata_status, movie.duration_ms, movie.video_codec) == ("ready", 90_000, "h264")
+        assert (data_dir / movie.thumbnail_path).read_bytes() == b"thumbnail"
+        assert duplicate_movies(database, copy_id) == [
+            {"id": ready_id, "title": "movie", "path": str(original)}
+        ]
@@ -0,0 +1,99 @@
+import os
+
+from sqlalchemy import select
+
+from app.db import FrameCacheEntry
+from app.services import frame_cache, image_generation, media_processing, scene_processing
+from tests.test_models import make_movie
+
+
+class CountingBackend:
+    name = "counting"
+
+    def __init__(self):
+        self.calls = []
+
+    def inspect_movie(self, path, movie_id):
+        raise AssertionError("not used")
+
+    def write_frames(self, path, frames, *, width, quality, keyframes=None, timeout=None):
+        self.calls.append([timestamp for timestamp, _target in frames])
+        for timestamp, target in frames:
+            target.write_bytes(f"{timestamp}-{width}".encode().ljust(10, b"."))
+
+
+def _prepare(session_factory, tmp_path, monkeypatch):
+    backend = CountingBackend()
+    monkeypatch.setattr(media_processing, "_media_backend", backend)
+    source = tmp_path / "movie.mp4"
+    source.write_bytes(b"video")
+    with session_factory() as database:
+        movie = make_movie(str(source))
+        database.add(movie)
+        database.commit()
+        return backend, source, movie.id
+
+
+def test_repeated_frames_are_linked_from_the_cache(session_factory, tmp_path, monkeypatch):
+    backend, source, movie_id = _prepare(session_factory, tmp_path, monkeypatch)
+    first = [(1_000, tmp_path / "a.webp"), (2_000, tmp_path / "b.webp")]
+    frame_cache.write_cached_frames(str(source), movie_id, first, width=1280, quality=90)
+    second = [(2_000, tmp_path / "c.webp"), (3_000, tmp_path / "d.webp")]
+    frame_cache.write_cached_frames(str(source), movie_id, second, width=1280, quality=90)
+    frame_cache.write_cached_frames(
+        str(source), movie_id, [(2_000, tmp_path / "e.webp")], width=640, quality=90
+    )
+
+    assert backend.calls == [[1_000, 2_000], [3_000], [2_000]]
+    assert (tmp_path / "c.webp").read_bytes() == b"2000-1280."
+    assert frame_cache.frame_cache_stats()["entries"] == 4
+
+    # A modified source file invalidates its cached frames.
+    source.write_bytes(b"re-encoded video")
+    frame_cache.write_cached_frames(
+        str(source), movie_id, [(1_000, tmp_path / "f.webp")], width=1280, quality=90
+    )
+    assert backend.calls[-1] == [1_000]
+
+
+def test_least_recently_used_frames_are_evicted_over_budget(
+    session_factory, tmp_path, monkeypatch
+):
+    backend, source, movie_id = _prepare(session_factory, tmp_path, monkeypatch)
+    monkeypatch.setattr(frame_cache, "_budget_bytes", 25)
+
+    def write(timestamp_ms):
+        target = tmp_path / f"{timestamp_ms}.webp"
+        frame_cache.write_cached_frames(
+            str(source), movie_id, [(timestamp_ms, target)], width=1280, quality=90
+        )
+
+    write(1)
+    write(2)
+    write(1)
+    write(3)
+
+    with session_factory() as database:
+        cached = database.scalars(
+            select(FrameCacheEntry.timestamp_ms).order_by(FrameCacheEntry.timestamp_ms)
+        ).all()
+    assert cached == [1, 3]
+    assert sorted(os.listdir(tmp_path / "frames" / str(movie_id))) == [
+        "1-1280-90.webp",
+        "3-1280-90.webp",
+    ]
+    assert backend.calls == [[1], [2], [3]]
+
+
+def test_image_generation_reuses_the_scene_snapshot_frame(
+    session_factory, tmp_path, monkeypatch
+):
+    backend, source, movie_id = _prepare(session_factory, tmp_path, monkeypatch)
+    monkeypatch.setattr(scene_processing, "SCENE_DIR", tmp_path / "scenes")
+
+    snapshots = scene_processing.create_scene_snapshots(str(source), movie_id, [(7, 5_500)])
+    snapshot = tmp_path / "generation.webp"
+    image_generation._extract_snapshot(source, movie_id, 5_500, snapshot)
+
+    assert backend.calls == [[5_500]]
+    assert snapshot.read_bytes() == snapshots[7].read_bytes()
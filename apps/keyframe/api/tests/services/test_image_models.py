@@ -96,6 +96,10 @@ class GenerationClient:
 
 def test_image_generation_reuses_one_session_for_wd14_sdxl_and_clip(tmp_path):
     GenerationClient.instances = []
+
+    def client_calls():
+        return GenerationClient.instances[0].calls
+
     snapshot = tmp_path / "snapshot.webp"
     snapshot.write_bytes(b"snapshot")
     settings = scene_models.SdxlGenerationSettings(
@@ -118,17 +122,33 @@ def test_image_generation_reuses_one_session_for_wd14_sdxl_and_clip(tmp_path):
     )
     runtime.start()
     try:
-        result = runtime.generate_images(snapshot, settings)
+        result = runtime.generate_images(
+            snapshot,
+            settings,
+            on_stage=lambda stage: client_calls().append(("stage", stage)),
+            on_image=lambda prompt, image: client_calls().append(
+                ("image", prompt, image.seed)
+            ),
+        )
     finally:
         runtime.stop()
 
     client = GenerationClient.instances[0]
-    handlers = [call[1] for call in client.calls if call[0] in {"run", "call"}]
-    assert handlers == [
+    progress = [
+        call[1] if call[0] in {"run", "call"} else call
+        for call in client.calls
+        if call[0] in {"run", "call", "stage", "image"}
+    ]
+    assert progress == [
+        ("stage", "tagging"),
         "ai.wd14.tags",
+        ("stage", "rendering"),
         "ai.sdxl.i2i",
+        ("stage", "embedding"),
         "ai.clip.image",
+        ("image", "blue sky, 1girl", 10),
         "ai.clip.image",
+        ("image", "blue sky, 1girl", 11),
     ]
     run = next(call for call in client.calls if call[0] == "run")
     calls = [call for call in client.calls if call[0] == "call"]
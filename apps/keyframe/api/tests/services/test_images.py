@@ -1,11 +1,12 @@
+import json
 from pathlib import Path
 
 import pytest
 from sqlalchemy import func, select
 
-from app.db import Image
+from app.db import Image, ImageGenerationJob
 from app.routers import images
-from app.services import image_generation, image_query, scene_models
+from app.services import image_generation, image_query, media_cache, media_processing, scene_models
 from tests.test_models import make_movie
 
 
@@ -16,6 +17,7 @@ def test_image_api_lists_latest_with_cursor_and_serves_safe_files(
     image_dir = data_dir / "images"
     image_dir.mkdir(parents=True)
     monkeypatch.setattr(image_query, "DATA_DIR", data_dir)
+    monkeypatch.setattr(media_cache, "DATA_DIR", data_dir)
     with session_factory() as database:
         for number in range(1, 4):
             path = image_dir / f"{number}.png"
@@ -29,10 +31,15 @@ def test_image_api_lists_latest_with_cursor_and_serves_safe_files(
 
     first = api_client.get("/api/images", params={"limit": 2}).json()
     assert [item["id"] for item in first["items"]] == [3, 2]
+    version = media_cache.file_version(image_dir / "3.png")
     assert first == {
         "items": [
-            {"id": 3, "prompt": "prompt 3", "image_url": "/api/images/3/file"},
-            {"id": 2, "prompt": "prompt 2", "image_url": "/api/images/2/file"},
+            {"id": 3, "prompt": "prompt 3", "image_url": f"/api/images/3/file?v={version}"},
+            {
+                "id": 2,
+                "prompt": "prompt 2",
+                "image_url": f"/api/images/2/file?v={media_cache.file_version(image_dir / '2.png')}",
+            },
         ],
         "total": 3,
         "next_cursor": 2,
@@ -42,10 +49,13 @@ def test_image_api_lists_latest_with_cursor_and_serves_safe_files(
         "/api/images", params={"limit": 2, "before_id": 2}
     ).json()
     assert [item["id"] for item in second["items"]] == [1]
-    response = api_client.get("/api/images/3/file")
+    response = api_client.get(first["items"][0]["image_url"])
     assert response.content == b"image-3"
     assert response.headers["content-type"] == "image/png"
-    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["etag"] == f'"image-3-{version}"'
+    # Unversioned or stale URLs are served but must be revalidated.
+    assert api_client.get("/api/images/3/file").headers["cache-control"] == "no-cache"
 
     outside = tmp_path / "outside.png"
     outside.write_bytes(b"outside")
@@ -56,16 +66,20 @@ def test_image_api_lists_latest_with_cursor_and_serves_safe_files(
     assert api_client.get(f"/api/images/{unsafe_id}/file").status_code == 404
 
 
-def test_image_generation_api_validates_settings_and_expands_seed(
+def test_image_generation_api_queues_job_and_expands_seed(
     api_client, monkeypatch
 ):
     captured = {}
+    scheduled = []
 
-    def generate(movie_id, timestamp_ms, settings):
+    def create_job(movie_id, timestamp_ms, settings):
         captured.update(movie_id=movie_id, timestamp_ms=timestamp_ms, settings=settings)
-        return [{"id": 9, "prompt": "tag", "image_url": "/api/images/9/file"}]
+        return {"id": 4, "status": "pending", "total_images": settings.count}
 
-    monkeypatch.setattr(images, "generate_movie_images", generate)
+    monkeypatch.setattr(images, "create_image_job", create_job)
+    monkeypatch.setattr(
+        images, "schedule_image_jobs", lambda _app, job_ids: scheduled.extend(job_ids)
+    )
     response = api_client.post(
         "/api/movies/7/images",
         json={
@@ -82,7 +96,11 @@ def test_image_generation_api_validates_settings_and_expands_seed(
             "format": "jpg",
         },
     )
-    assert response.status_code == 201
+    assert response.status_code == 202
+    assert response.json() == {
+        "id": 4, "status": "pending", "total_images": 3, "queue": None,
+    }
+    assert scheduled == [4]
     assert captured["movie_id"] == 7
     assert captured["timestamp_ms"] == 12_345
     assert captured["settings"].model == "main-sdxl"
@@ -100,9 +118,14 @@ def test_image_generation_api_validates_settings_and_expands_seed(
     ).status_code == 422
 
 
-def test_image_generation_saves_snapshot_outputs_and_embeddings_atomically(
-    session_factory, tmp_path, monkeypatch
-):
+def _generation_settings(count=2):
+    return scene_models.SdxlGenerationSettings(
+        model="main-sdxl", count=count, negative_prompt="", seeds=None,
+        step=30, cfg=7.0, strength=0.8, width=1024, height=1024, format="png",
+    )
+
+
+def _prepare_generation(session_factory, tmp_path, monkeypatch, duration_ms=20_000):
     data_dir = tmp_path / "data"
     image_dir = data_dir / "images"
     source = tmp_path / "movie.mp4"
@@ -114,80 +137,96 @@ def test_image_generation_saves_snapshot_outputs_and_embeddings_atomically(
         assert timeout == 180
         Path(command[-1]).write_bytes(b"snapshot")
 
-    observed_snapshot = []
-    monkeypatch.setattr(image_generation, "_run_command", run_command)
-    monkeypatch.setattr(
-        image_generation,
-        "generate_images_from_snapshot",
-        lambda path, _settings: (
-            observed_snapshot.append(path.read_bytes())
-            or scene_models.ImageGenerationAnalysis(
-                model="main-sdxl",
-                prompt="blue sky",
-                images=[
-                    scene_models.GeneratedImageAnalysis(
-                        data=b"first", format="png", mime_type="image/png",
-                        seed=1, embedding=b"embedding-1",
-                    ),
-                    scene_models.GeneratedImageAnalysis(
-                        data=b"second", format="jpg", mime_type="image/jpeg",
-                        seed=2, embedding=b"embedding-2",
-                    ),
-                ],
-            )
-        ),
-    )
+    monkeypatch.setattr(media_processing, "_run_command", run_command)
     with session_factory() as database:
-        movie = make_movie(str(source), duration_ms=20_000)
+        movie = make_movie(str(source), duration_ms=duration_ms)
         database.add(movie)
         database.commit()
-        movie_id = movie.id
+        return movie.id, data_dir, image_dir
 
-    settings = scene_models.SdxlGenerationSettings(
-        model="main-sdxl", count=2, negative_prompt="", seeds=None,
-        step=30, cfg=7.0, strength=0.8, width=1024, height=1024, format="png",
+
+def test_image_job_validates_movie_before_queueing(session_factory, tmp_path, monkeypatch):
+    movie_id, _data_dir, _image_dir = _prepare_generation(
+        session_factory, tmp_path, monkeypatch, duration_ms=10_000
+    )
+    with pytest.raises(LookupError):
+        image_generation.create_image_job(movie_id + 1, 0, _generation_settings())
+    with pytest.raises(ValueError):
+        image_generation.create_image_job(movie_id, 10_001, _generation_settings())
+    with session_factory() as database:
+        assert database.scalar(select(func.count(ImageGenerationJob.id))) == 0
+
+
+def test_image_job_persists_each_image_as_soon_as_it_is_embedded(
+    session_factory, tmp_path, monkeypatch
+):
+    movie_id, data_dir, image_dir = _prepare_generation(
+        session_factory, tmp_path, monkeypatch
     )
-    items = image_generation.generate_movie_images(movie_id, 5_000, settings)
-    assert observed_snapshot == [b"snapshot"]
-    assert [item["id"] for item in items] == [2, 1]
+    observed = []
+
+    def generate_images(path, settings, *, on_stage, on_image):
+        observed.append(("snapshot", path.read_bytes()))
+        for stage in ("tagging", "rendering", "embedding"):
+            on_stage(stage)
+            observed.append(("stage", image_generation.get_image_job(job_id)["stage"]))
+        generated = []
+        for number, image_format in ((1, "png"), (2, "jpg")):
+            image = scene_models.GeneratedImageAnalysis(
+                data=f"image-{number}".encode(), format=image_format,
+                mime_type="image/png" if image_format == "png" else "image/jpeg",
+                seed=number, embedding=f"embedding-{number}".encode(),
+            )
+            on_image("blue sky", image)
+            progress = image_generation.get_image_job(job_id)
+            observed.append(("stored", progress["completed_images"], len(list(image_dir.iterdir()))))
+            generated.append(image)
+        return scene_models.ImageGenerationAnalysis(
+            model=settings.model, prompt="blue sky", images=generated
+        )
+
+    monkeypatch.setattr(image_generation, "generate_images_from_snapshot", generate_images)
+    job = image_generation.create_image_job(movie_id, 5_000, _generation_settings())
+    job_id = job["id"]
+    assert job["status"] == "pending"
+    assert job["total_images"] == 2
+
+    image_generation.process_image_job(job_id)
+
+    assert observed == [
+        ("snapshot", b"snapshot"),
+        ("stage", "tagging"),
+        ("stage", "rendering"),
+        ("stage", "embedding"),
+        ("stored", 1, 1),
+        ("stored", 2, 2),
+    ]
+    finished = image_generation.get_image_job(job_id)
+    assert finished["status"] == "ready"
+    assert finished["stage"] is None
+    assert finished["prompt"] == "blue sky"
+    assert [item["id"] for item in finished["images"]] == [2, 1]
     with session_factory() as database:
         rows = list(database.scalars(select(Image).order_by(Image.id)).all())
-    assert [row.prompt for row in rows] == ["blue sky", "blue sky"]
     assert [row.embedding for row in rows] == [b"embedding-1", b"embedding-2"]
-    assert sorted(path.read_bytes() for path in image_dir.iterdir()) == [b"first", b"second"]
+    assert sorted(path.read_bytes() for path in image_dir.iterdir()) == [b"image-1", b"image-2"]
     assert not list(data_dir.glob("image-generation-*"))
 
 
-def test_image_generation_removes_all_new_files_when_batch_storage_fails(
+def test_image_job_keeps_stored_images_and_fails_when_later_storage_fails(
     session_factory, tmp_path, monkeypatch
 ):
-    data_dir = tmp_path / "data"
-    image_dir = data_dir / "images"
-    source = tmp_path / "movie.mp4"
-    source.write_bytes(b"video")
-    monkeypatch.setattr(image_generation, "DATA_DIR", data_dir)
-    monkeypatch.setattr(image_generation, "IMAGE_DIR", image_dir)
-    monkeypatch.setattr(
-        image_generation,
-        "_run_command",
-        lambda command, timeout: Path(command[-1]).write_bytes(b"snapshot"),
+    movie_id, _data_dir, image_dir = _prepare_generation(
+        session_factory, tmp_path, monkeypatch
     )
     generated = scene_models.GeneratedImageAnalysis(
         data=b"image", format="png", mime_type="image/png",
         seed=1, embedding=b"embedding",
     )
-    monkeypatch.setattr(
-        image_generation,
-        "generate_images_from_snapshot",
-        lambda _path, _settings: scene_models.ImageGenerationAnalysis(
-            model="main-sdxl", prompt="prompt", images=[generated, generated]
-        ),
-    )
-    with session_factory() as database:
-        movie = make_movie(str(source), duration_ms=10_000)
-        database.add(movie)
-        database.commit()
-        movie_id = movie.id
+
+    def generate_images(_path, _settings, *, on_stage, on_image):
+        on_image("prompt", generated)
+        on_image("prompt", generated)
 
     original_replace = Path.replace
     replace_count = 0
@@ -199,25 +238,71 @@ def test_image_generation_removes_all_new_files_when_batch_storage_fails(
             raise OSError("disk full")
         return original_replace(path, target)
 
+    monkeypatch.setattr(image_generation, "generate_images_from_snapshot", generate_images)
     monkeypatch.setattr(Path, "replace", fail_second_replace)
-    settings = scene_models.SdxlGenerationSettings(
-        model="main-sdxl", count=2, negative_prompt="", seeds=None,
-        step=30, cfg=7.0, strength=0.8, width=1024, height=1024, format="png",
+    job_id = image_generation.create_image_job(movie_id, 1_000, _generation_settings())["id"]
+    image_generation.process_image_job(job_id)
+
+    job = image_generation.get_image_job(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "disk full"
+    assert job["completed_images"] == 1
+    assert [path.read_bytes() for path in image_dir.iterdir()] == [b"image"]
+    with session_factory() as database:
+        assert database.scalar(select(func.count(Image.id))) == 1
+
+
+def test_reset_image_jobs_fails_interrupted_and_requeues_pending(
+    session_factory, tmp_path, monkeypatch
+):
+    movie_id, _data_dir, _image_dir = _prepare_generation(
+        session_factory, tmp_path, monkeypatch
+    )
+    first = image_generation.create_image_job(movie_id, 0, _generation_settings())
+    second = image_generation.create_image_job(movie_id, 0, _generation_settings())
+    with session_factory() as database:
+        database.get(ImageGenerationJob, first["id"]).status = "processing"
+        database.commit()
+
+    assert image_generation.reset_image_jobs() == [second["id"]]
+    interrupted = image_generation.get_image_job(first["id"])
+    assert interrupted["status"] == "failed"
+    assert interrupted["error"] == "서버가 재시작되어 이미지 생성이 중단되었습니다"
+
+
+def test_image_job_api_reports_progress_by_polling_and_events(
+    api_client, session_factory, tmp_path, monkeypatch
+):
+    movie_id, _data_dir, _image_dir = _prepare_generation(
+        session_factory, tmp_path, monkeypatch
     )
-    with pytest.raises(OSError, match="disk full"):
-        image_generation.generate_movie_images(movie_id, 1_000, settings)
-    assert list(image_dir.iterdir()) == []
+    job_id = image_generation.create_image_job(movie_id, 0, _generation_settings())["id"]
+    assert api_client.get("/api/images/jobs/999").status_code == 404
+    assert api_client.get("/api/images/jobs/999/events").status_code == 404
+    polled = api_client.get(f"/api/images/jobs/{job_id}").json()
+    assert polled["status"] == "pending"
+    assert polled["completed_images"] == 0
+
     with session_factory() as database:
-        assert database.scalar(select(func.count(Image.id))) == 0
+        job = database.get(ImageGenerationJob, job_id)
+        job.status = "failed"
+        job.error = "station offline"
+        database.commit()
+    response = api_client.get(f"/api/images/jobs/{job_id}/events")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block for block in response.text.split("\n\n") if block]
+    assert len(events) == 1
+    assert events[0].startswith("id: 1\nevent: job\ndata: ")
+    payload = json.loads(events[0].split("data: ", 1)[1])
+    assert payload["status"] == "failed"
+    assert payload["error"] == "station offline"
 
 
 def test_sdxl_models_api_returns_only_public_generation_defaults(
     api_client, monkeypatch
 ):
-    monkeypatch.setattr(
-        images,
-        "get_sdxl_models",
-        lambda: scene_models.SdxlModelsPayload(
+    async def get_models():
+        return scene_models.SdxlModelsPayload(
             default_model="main",
             models=[
                 scene_models.SdxlModelInfo(
@@ -225,8 +310,9 @@ def test_sdxl_models_api_returns_only_public_generation_defaults(
                     strength=0.75, format="jpeg",
                 )
             ],
-        ),
-    )
+        )
+
+    monkeypatch.setattr(images, "get_sdxl_models_async", get_models)
     assert api_client.get("/api/images/models").json() == {
         "default_model": "main",
         "models": [
@@ -237,3 +323,66 @@ def test_sdxl_models_api_returns_only_public_generation_defaults(
             }
         ],
     }
+
+
+def test_sdxl_models_api_revalidates_with_etag_and_refreshes(api_client, monkeypatch):
+    catalogs = {
+        "cached": scene_models.SdxlModelsPayload(
+            default_model="main",
+            models=[
+                scene_models.SdxlModelInfo(
+                    name="main", step=24, cfg=6.5, height=1024, width=768,
+                    strength=0.75, format="png",
+                )
+            ],
+        ),
+        "refreshed": scene_models.SdxlModelsPayload(
+            default_model="next",
+            models=[
+                scene_models.SdxlModelInfo(
+                    name="next", step=30, cfg=7.0, height=1024, width=1024,
+                    strength=0.8, format="png",
+                )
+            ],
+        ),
+    }
+    current = {"name": "cached"}
+
+    async def get_models():
+        return catalogs[current["name"]]
+
+    async def refresh_models():
+        current["name"] = "refreshed"
+        return catalogs["refreshed"]
+
+    monkeypatch.setattr(images, "get_sdxl_models_async", get_models)
+    monkeypatch.setattr(images, "refresh_sdxl_models_async", refresh_models)
+
+    first = api_client.get("/api/images/models")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+    revalidated = api_client.get(
+        "/api/images/models", headers={"If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    refreshed = api_client.post("/api/images/models/refresh")
+    assert refreshed.status_code == 200
+    assert refreshed.json()["default_model"] == "next"
+    assert refreshed.headers["etag"] != etag
+    changed = api_client.get("/api/images/models", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] == refreshed.headers["etag"]
+
+
+def test_sdxl_models_refresh_reports_station_errors(api_client, monkeypatch):
+    async def fail():
+        raise RuntimeError("station offline")
+
+    monkeypatch.setattr(images, "refresh_sdxl_models_async", fail)
+    response = api_client.post("/api/images/models/refresh")
+    assert response.status_code == 503
+    assert response.json()["detail"] == (
+        "SDXL 모델 목록을 불러오지 못했습니다: station offline"
+    )
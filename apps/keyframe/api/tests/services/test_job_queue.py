@@ -0,0 +1,46 @@
+from sqlalchemy import select
+
+from app.db import Job
+from app.services import job_queue
+
+
+def test_enqueue_deduplicates_and_only_promotes_to_a_lower_priority(session_factory):
+    job_queue.enqueue_jobs("scene", [1, 1, 2], 1, 60, now=100)
+    job_queue.enqueue_jobs("scene", [2], 0, 60, now=150)
+    job_queue.enqueue_jobs("scene", [2], 1, 60, now=200)
+    job_queue.enqueue_jobs("metadata", [1], 1, 60, now=100)
+
+    with session_factory() as database:
+        jobs = database.scalars(select(Job).order_by(Job.job_type, Job.item_id)).all()
+    assert [(job.job_type, job.item_id, job.priority, job.rank) for job in jobs] == [
+        ("metadata", 1, 1, 160),
+        ("scene", 1, 1, 160),
+        ("scene", 2, 0, 100),
+    ]
+
+
+def test_claims_are_batched_in_rank_order_and_exclusive_per_owner(session_factory):
+    job_queue.enqueue_jobs("scene", [1, 2, 3], 1, 60, now=100)
+    job_queue.enqueue_jobs("scene", [4], 0, 60, now=110)
+
+    first = job_queue.claim_jobs("scene", "process-a", 2, 30, now=120)
+    second = job_queue.claim_jobs("scene", "process-b", 5, 30, now=120)
+    assert [job.item_id for job in first] == [4, 1]
+    assert [job.item_id for job in second] == [2, 3]
+    assert job_queue.claim_jobs("scene", "process-c", 5, 30, now=125) == []
+    assert job_queue.job_counts("scene", now=125) == {"queued": 0, "running": 4}
+    assert job_queue.jobs_ahead("scene", [1], now=125) == {1: None}
+
+
+def test_expired_leases_are_reclaimed_and_finishing_requires_the_lease(session_factory):
+    job_queue.enqueue_jobs("image", [7, 8], 0, 60, now=100)
+    claimed = job_queue.claim_jobs("image", "crashed", 2, 30, now=100)
+    job_queue.renew_leases("crashed", [claimed[1].id], 30, now=120)
+
+    reclaimed = job_queue.claim_jobs("image", "survivor", 2, 30, now=140)
+    assert [(job.item_id, job.attempts) for job in reclaimed] == [(7, 2)]
+
+    job_queue.finish_job(reclaimed[0].id, "crashed")
+    assert job_queue.job_counts("image", now=140)["running"] == 2
+    job_queue.finish_job(reclaimed[0].id, "survivor")
+    assert job_queue.jobs_ahead("image", [7, 8], now=140) == {8: None}
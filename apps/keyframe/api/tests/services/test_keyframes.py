@@ -0,0 +1,51 @@
+import subprocess
+
+from app.services import media_processing
+from app.services.keyframes import (
+    is_keyframe,
+    nearest_keyframe,
+    pack_keyframes,
+    seek_start_ms,
+    unpack_keyframes,
+)
+
+
+def test_probe_keyframes_reads_sorted_key_packets(monkeypatch):
+    output = "0.000000,K__\n0.041708,___\n4.004000,K_\nN/A,K__\n2.002000,K__\n-0.083,K__\n4.004,K__\n"
+    monkeypatch.setattr(
+        media_processing,
+        "_run_command",
+        lambda command, timeout: subprocess.CompletedProcess(command, 0, output, ""),
+    )
+    assert media_processing.probe_keyframes("movie.mp4") == [0, 2_002, 4_004]
+
+
+def test_probe_keyframes_are_relative_to_the_start_time(monkeypatch):
+    # MPEG-TS files usually start at 1.4 s; -ss and currentTime count from there.
+    output = "1.400000,K__\n1.441708,___\n3.402000,K__\n1.400000\n"
+    monkeypatch.setattr(
+        media_processing,
+        "_run_command",
+        lambda command, timeout: subprocess.CompletedProcess(command, 0, output, ""),
+    )
+    assert media_processing.probe_keyframes("movie.ts") == [0, 2_002]
+
+
+def test_keyframe_index_round_trips_and_finds_nearest_within_duration():
+    keyframes = [0, 2_002, 4_004, 10_010]
+    assert unpack_keyframes(pack_keyframes(keyframes)) == keyframes
+    assert nearest_keyframe(keyframes, 2_900) == 2_002
+    assert nearest_keyframe(keyframes, 3_100) == 4_004
+    assert nearest_keyframe(keyframes, 50_000) == 10_010
+    assert nearest_keyframe(keyframes, 9_000, limit_ms=9_500) == 4_004
+    assert nearest_keyframe([], 1_000) is None
+
+
+def test_seek_lands_on_the_preceding_keyframe():
+    assert seek_start_ms([0, 2_002], 2_002) == 2_001
+    assert seek_start_ms([0, 2_002], 2_500) == 2_001
+    assert seek_start_ms([1_000, 2_002], 500) == 500
+    assert seek_start_ms(None, 2_500) == 2_500
+    assert is_keyframe([0, 2_002], 2_002)
+    assert not is_keyframe([0, 2_002], 2_500)
+    assert not is_keyframe(None, 0)
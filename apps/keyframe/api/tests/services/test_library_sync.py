@@ -0,0 +1,78 @@
+import os
+
+from sqlalchemy import select
+
+from app.db import LibraryFolder, MovieFile
+from app.services.library_sync import (
+    list_library_folders,
+    remember_library_folder,
+    sync_library,
+)
+from app.services.movie_import import MISSING_FILE_ERROR, register_movie_paths, scan_video_folder
+
+
+def test_remember_keeps_only_outermost_roots(session_factory, tmp_path):
+    nested = tmp_path / "library" / "series"
+    nested.mkdir(parents=True)
+    remember_library_folder(nested)
+    remember_library_folder(tmp_path / "library")
+    remember_library_folder(nested)
+    assert [folder["path"] for folder in list_library_folders()] == [
+        str((tmp_path / "library").resolve())
+    ]
+
+
+def test_sync_detects_new_changed_and_missing_files(session_factory, tmp_path):
+    library = tmp_path / "library"
+    library.mkdir()
+    kept, changed, deleted = (library / name for name in ("kept.mp4", "changed.mp4", "deleted.mp4"))
+    for video in (kept, changed, deleted):
+        video.write_bytes(b"video")
+    imported = register_movie_paths(scan_video_folder(library)[0])
+    remember_library_folder(library)
+    # Scanned videos are registered in path order.
+    paths = sorted(str(video.resolve()) for video in (kept, changed, deleted))
+    ids = dict(zip(paths, imported["added_ids"]))
+
+    changed.write_bytes(b"re-encoded video")
+    os.utime(changed, ns=(1_800_000_000_000_000_000, 1_800_000_000_000_000_000))
+    deleted.unlink()
+    (library / "new.mp4").write_bytes(b"video")
+    result = sync_library()
+
+    assert result["updated_ids"] == [ids[str(changed.resolve())]]
+    assert result["missing_ids"] == [ids[str(deleted.resolve())]]
+    assert len(result["added_ids"]) == 1
+    with session_factory() as database:
+        missing = database.get(MovieFile, ids[str(deleted.resolve())])
+        assert (missing.metadata_status, missing.metadata_error) == ("failed", MISSING_FILE_ERROR)
+        assert database.scalar(select(LibraryFolder.last_synced_at)) is not None
+
+    # A second sync has nothing to do; a returning file is queued again.
+    assert sync_library() | {"folder_count": 0} == {
+        "folder_count": 0,
+        "added_ids": [],
+        "updated_ids": [],
+        "missing_ids": [],
+        "failures": [],
+    }
+    deleted.write_bytes(b"video")
+    assert sync_library()["updated_ids"] == [ids[str(deleted.resolve())]]
+    with session_factory() as database:
+        restored = database.get(MovieFile, ids[str(deleted.resolve())])
+        assert (restored.metadata_status, restored.metadata_error) == ("pending", None)
+
+
+def test_unreachable_root_does_not_mark_movies_missing(session_factory, tmp_path):
+    library = tmp_path / "share"
+    library.mkdir()
+    (library / "clip.mp4").write_bytes(b"video")
+    added = register_movie_paths(scan_video_folder(library)[0])["added_ids"]
+    remember_library_folder(library)
+    (library / "clip.mp4").rename(tmp_path / "clip.mp4")
+    library.rmdir()
+
+    result = sync_library()
+    assert result["missing_ids"] == [] and len(result["failures"]) == 1
+    with session_factory() as database:
+        assert database.get(MovieFile, added[0]).metadata_error is None
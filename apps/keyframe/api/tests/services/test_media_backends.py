@@ -0,0 +1,134 @@
+from fractions import Fraction
+
+import pytest
+
+from app.services import media_processing
+from app.services.media_processing import (
+    FallbackMediaBackend,
+    MovieInspection,
+    SubprocessMediaBackend,
+    create_media_backend,
+)
+
+
+def _write_clip(path, seconds=4, rate=25, start_seconds=0):
+    av = pytest.importorskip("av")
+    with av.open(str(path), "w") as container:
+        stream = container.add_stream(
+            "mpeg4", rate=rate, options={"g": str(rate), "sc_threshold": "1000000000"}
+        )
+        stream.width, stream.height, stream.pix_fmt = 160, 120, "yuv420p"
+        for index in range(seconds * rate):
+            frame = av.VideoFrame(160, 120, "yuv420p")
+            for plane in frame.planes:
+                plane.update(bytes([100 + index % 4]) * plane.buffer_size)
+            frame.pts, frame.time_base = index + start_seconds * rate, Fraction(1, rate)
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+
+@pytest.fixture
+def clip(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    monkeypatch.setattr(media_processing, "DATA_DIR", data_dir)
+    monkeypatch.setattr(media_processing, "THUMBNAIL_DIR", data_dir / "thumbnails")
+    path = tmp_path / "clip.mp4"
+    _write_clip(path)
+    return path
+
+
+def test_pyav_backend_probes_indexes_and_thumbnails_in_one_open(clip, tmp_path):
+    from app.services.pyav_backend import PyAvMediaBackend
+
+    inspection = PyAvMediaBackend().inspect_movie(str(clip), 5)
+
+    assert inspection.thumbnail_error is None
+    assert inspection.metadata["width"] == 160
+    assert inspection.metadata["fps"] == 25
+    assert inspection.metadata["video_codec"] == "mpeg4"
+    assert inspection.metadata["duration_ms"] == pytest.approx(4_000, abs=100)
+    assert inspection.keyframes == [0, 1_000, 2_000, 3_000]
+    assert inspection.thumbnail_path == "thumbnails/5.webp"
+    thumbnail = (tmp_path / "data" / inspection.thumbnail_path).read_bytes()
+    assert thumbnail[:4] == b"RIFF" and thumbnail[8:12] == b"WEBP"
+
+
+def test_pyav_backend_writes_every_requested_frame(clip, tmp_path):
+    from app.services.pyav_backend import PyAvMediaBackend
+
+    targets = [tmp_path / "late.webp", tmp_path / "keyframe.webp"]
+    PyAvMediaBackend().write_frames(
+        str(clip),
+        [(2_500, targets[0]), (1_000, targets[1])],
+        width=320,
+        quality=90,
+        keyframes=[0, 1_000, 2_000, 3_000],
+    )
+    assert all(target.read_bytes()[8:12] == b"WEBP" for target in targets)
+
+
+def test_pyav_backend_counts_from_the_file_start_time(tmp_path):
+    from app.services import pyav_backend
+
+    path = tmp_path / "clip.ts"
+    _write_clip(path, start_seconds=2)
+    with pyav_backend.av.open(str(path)) as container:
+        stream = pyav_backend._video_stream(container)
+        keyframes = pyav_backend._keyframes(container, stream)
+        assert keyframes == [0, 1_000, 2_000, 3_000]
+        frame = pyav_backend._decode_frame(container, stream, 2_520, keyframes)
+        assert frame.time == pytest.approx(4.52)
+        frame = pyav_backend._decode_frame(container, stream, 1_000, keyframes)
+        assert frame.time == pytest.approx(3.0)
+
+
+class RecordingBackend:
+    name = "recording"
+
+    def __init__(self, fail=False, write=True):
+        self.fail = fail
+        self.write = write
+        self.calls = []
+
+    def inspect_movie(self, path, movie_id):
+        self.calls.append(("inspect", movie_id))
+        if self.fail:
+            raise RuntimeError("broken")
+        return MovieInspection({"duration_ms": 1}, None, "thumbnails/1.webp")
+
+    def write_frames(self, path, frames, *, width, quality, keyframes=None, timeout=None):
+        self.calls.append(("frames", [timestamp for timestamp, _target in frames]))
+        if self.fail:
+            raise RuntimeError("broken")
+        for timestamp, target in frames:
+            if self.write and timestamp != 666:
+                target.write_bytes(b"webp")
+
+
+def test_fallback_backend_retries_failed_calls_and_missing_frames(tmp_path):
+    primary, fallback = RecordingBackend(fail=True), RecordingBackend()
+    backend = FallbackMediaBackend(primary, fallback)
+    assert backend.name == "recording"
+    assert backend.inspect_movie("movie.mp4", 1).thumbnail_path == "thumbnails/1.webp"
+    assert fallback.calls == [("inspect", 1)]
+
+    primary = RecordingBackend()
+    fallback = RecordingBackend()
+    backend = FallbackMediaBackend(primary, fallback)
+    backend.write_frames(
+        "movie.mp4",
+        [(1, tmp_path / "a.webp"), (666, tmp_path / "b.webp")],
+        width=1280,
+        quality=90,
+    )
+    assert fallback.calls == [("frames", [666])]
+
+
+def test_backend_selection_keeps_subprocess_as_fallback():
+    assert isinstance(create_media_backend("ffmpeg"), SubprocessMediaBackend)
+    pytest.importorskip("av")
+    backend = create_media_backend("auto")
+    assert isinstance(backend, FallbackMediaBackend)
+    assert backend.name == "pyav"
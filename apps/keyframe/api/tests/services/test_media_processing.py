@@ -1,7 +1,8 @@
 from sqlalchemy import select
 
 from app.db import MovieFile
-from app.services import media_processing
+from app.services import job_queue, media_processing
+from app.services.keyframes import load_keyframes
 from tests.test_models import make_movie
 
 
@@ -19,6 +20,20 @@ def test_interrupted_processing_is_returned_to_pending(session_factory, tmp_path
         assert [movie.metadata_status for movie in pending] == ["pending", "pending"]
 
 
+def test_reset_leaves_movies_that_still_have_a_queued_job(session_factory, tmp_path):
+    with session_factory() as database:
+        queued = make_movie(str(tmp_path / "queued.mp4"), "processing")
+        orphaned = make_movie(str(tmp_path / "orphaned.mp4"), "processing")
+        database.add_all([queued, orphaned])
+        database.commit()
+        queued_id, orphaned_id = queued.id, orphaned.id
+    job_queue.enqueue_jobs("metadata", [queued_id], 1, 60, now=100)
+
+    assert media_processing.reset_interrupted_jobs() == [orphaned_id]
+    with session_factory() as database:
+        assert database.get(MovieFile, queued_id).metadata_status == "processing"
+
+
 def test_metadata_worker_keeps_success_and_failure_states(session_factory, tmp_path, monkeypatch):
     with session_factory() as database:
         success = make_movie(str(tmp_path / "success.mp4"), "pending")
@@ -28,7 +43,8 @@ def test_metadata_worker_keeps_success_and_failure_states(session_factory, tmp_p
         success_id, failure_id = success.id, failure.id
 
     monkeypatch.setattr(media_processing, "probe_video", lambda _path: {"duration_ms": 120_000, "width": 1920, "height": 1080, "fps": 30.0})
-    monkeypatch.setattr(media_processing, "create_thumbnail", lambda _path, movie_id, _duration: f"thumbnails/{movie_id}.webp")
+    monkeypatch.setattr(media_processing, "create_thumbnail", lambda _path, movie_id, _duration, _keyframes: f"thumbnails/{movie_id}.webp")
+    monkeypatch.setattr(media_processing, "probe_keyframes", lambda _path: [0, 2_000, 4_000])
     media_processing.process_movie_metadata(success_id)
 
     def fail_probe(_path):
@@ -41,5 +57,7 @@ def test_metadata_worker_keeps_success_and_failure_states(session_factory, tmp_p
         failure = database.get(MovieFile, failure_id)
         assert success.metadata_status == "ready"
         assert success.duration_ms == 120_000
+        assert load_keyframes(database, success_id) == [0, 2_000, 4_000]
+        assert load_keyframes(database, failure_id) is None
         assert failure.metadata_status == "failed"
         assert failure.metadata_error == "codec error"
@@ -1,26 +1,39 @@
-import threading
 from types import SimpleNamespace
 
 from app.services import media_queue
+from app.services.worker_pool import BACKGROUND_PRIORITY, INTERACTIVE_PRIORITY
+from app.settings import KeyframeSettings
 
 
-def test_queue_deduplicates_each_task_key_but_allows_other_task_types():
-    submitted = []
+class RecordingPool:
+    def __init__(self):
+        self.submitted = []
 
-    class Executor:
-        def submit(self, callback):
-            submitted.append(callback)
+    def submit(self, item_ids, priority):
+        self.submitted.append((list(item_ids), priority))
 
-    app = SimpleNamespace(
-        state=SimpleNamespace(
-            media_executor=Executor(),
-            queue_lock=threading.Lock(),
-            queued_tasks=set(),
-        )
-    )
-    media_queue.schedule_movies(app, [3, 3])
-    media_queue.schedule_movies(app, [3])
-    media_queue.schedule_scenes(app, [3, 3])
 
-    assert app.state.queued_tasks == {("metadata", 3), ("scene", 3)}
-    assert len(submitted) == 2
+def _queue_app(**pools):
+    return SimpleNamespace(state=SimpleNamespace(media_pools=pools))
+
+
+def test_schedulers_submit_to_their_pool_with_default_priorities():
+    metadata, scene, image = RecordingPool(), RecordingPool(), RecordingPool()
+    app = _queue_app(metadata=metadata, scene=scene, image=image)
+    media_queue.schedule_movies(app, [3, 4])
+    media_queue.schedule_scenes(app, [3], INTERACTIVE_PRIORITY)
+    media_queue.schedule_image_jobs(app, [5])
+
+    assert metadata.submitted == [([3, 4], BACKGROUND_PRIORITY)]
+    assert scene.submitted == [([3], INTERACTIVE_PRIORITY)]
+    assert image.submitted == [([5], INTERACTIVE_PRIORITY)]
+
+
+def test_media_workers_scale_metadata_with_cores_and_scenes_with_job_slots(monkeypatch):
+    monkeypatch.setattr(media_queue.os, "cpu_count", lambda: 12)
+    settings = KeyframeSettings.model_construct(gpstation_job_slots=3)
+    assert media_queue.media_worker_counts(settings) == {
+        "metadata": 12, "scene": 3, "image": 1, "detection": 1, "playback": 1,
+    }
+    settings = KeyframeSettings.model_construct(media_metadata_workers=2)
+    assert media_queue.media_worker_counts(settings)["metadata"] == 2
@@ -1,8 +1,11 @@
+import os
 from pathlib import Path
 
+import pytest
 from sqlalchemy import func, select
 
 from app.db import MovieFile
+from app.services import movie_import
 from app.services.movie_import import normalize_path, register_movie_paths, scan_video_folder
 
 
@@ -65,3 +68,83 @@ def test_rejects_old_non_playable_extensions(session_factory, tmp_path):
     result = register_movie_paths(paths)
     assert result["added_count"] == 0
     assert result["failed_count"] == 5
+
+
+def test_scan_reuses_entry_stats_and_skips_directory_links(session_factory, tmp_path, monkeypatch):
+    library = tmp_path / "library"
+    (library / "season 1").mkdir(parents=True)
+    (library / "season 1" / "episode.mp4").write_bytes(b"episode")
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "linked.mp4").write_bytes(b"linked")
+    try:
+        (library / "link").symlink_to(outside, target_is_directory=True)
+    except OSError:
+        pytest.skip("symlinks are not available")
+    progress = []
+
+    videos, failures = scan_video_folder(
+        library, on_progress=lambda *counts: progress.append(counts), workers=2
+    )
+
+    assert failures == []
+    assert [Path(video.path).name for video in videos] == ["episode.mp4"]
+    assert videos[0].size_bytes == len(b"episode")
+    assert progress[-1] == (2, 1)
+
+    def fail_resolve(*_args, **_kwargs):
+        raise AssertionError("scanned videos must not be resolved again")
+
+    monkeypatch.setattr(movie_import.Path, "resolve", fail_resolve)
+    assert register_movie_paths(videos)["added_count"] == 1
+
+
+def test_rescan_skips_unchanged_files_and_requeues_changed_ones(session_factory, tmp_path):
+    unchanged = tmp_path / "unchanged.mp4"
+    changed = tmp_path / "changed.mp4"
+    unchanged.write_bytes(b"video")
+    changed.write_bytes(b"video")
+    first = register_movie_paths(scan_video_folder(tmp_path)[0])
+    with session_factory() as database:
+        database.query(MovieFile).update(
+            {"metadata_status": "ready", "video_codec": "h264", "playback_status": "direct"}
+        )
+        database.commit()
+
+    changed.write_bytes(b"re-encoded video")
+    os.utime(changed, ns=(1_800_000_000_000_000_000, 1_800_000_000_000_000_000))
+    second = register_movie_paths(scan_video_folder(tmp_path)[0])
+
+    assert (second["added_count"], second["duplicate_count"], second["updated_count"]) == (0, 1, 1)
+    with session_factory() as database:
+        movie = database.get(MovieFile, second["updated_ids"][0])
+        assert movie.path == str(changed.resolve())
+        assert movie.id in first["added_ids"]
+        assert (movie.size_bytes, movie.metadata_status) == (16, "pending")
+        assert (movie.video_codec, movie.playback_status) == (None, "unprepared")
+
+
+def test_chunked_insert_detects_duplicates_from_conflicts(session_factory, tmp_path, monkeypatch):
+    videos = [tmp_path / f"clip-{number}.mp4" for number in range(5)]
+    for video in videos:
+        video.write_bytes(b"video")
+    first = register_movie_paths(videos[1:4:2])
+
+    monkeypatch.setattr(movie_import, "IMPORT_CHUNK_SIZE", 2)
+    inserts = []
+    original = movie_import._register_chunk
+    monkeypatch.setattr(
+        movie_import,
+        "_register_chunk",
+        lambda database, rows: inserts.append(len(rows)) or original(database, rows),
+    )
+    result = register_movie_paths(videos)
+
+    assert inserts == [2, 2, 1]
+    assert (result["added_count"], result["duplicate_count"], result["updated_count"]) == (3, 2, 0)
+    with session_factory() as database:
+        paths = dict(database.execute(select(MovieFile.id, MovieFile.path)).all())
+    assert [paths[movie_id] for movie_id in result["added_ids"]] == [
+        str(videos[number].resolve()) for number in (0, 2, 4)
+    ]
+    assert not set(first["added_ids"]) & set(result["added_ids"])
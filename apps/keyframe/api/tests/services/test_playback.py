@@ -1,5 +1,9 @@
-from app.db import MovieFile
-from app.services import playback
+import io
+from pathlib import Path
+
+from app.db import MovieFile, PlaybackPreparation
+from app.routers import movies
+from app.services import media_processing, playback
 from tests.test_models import make_movie
 
 
@@ -9,9 +13,46 @@ def test_direct_playback_compatibility_rules():
     assert playback.is_direct_playback(".webm", "vp9", "opus") is True
     assert playback.is_direct_playback(".mkv", "h264", "aac") is False
     assert playback.is_direct_playback(".mp4", "hevc", "aac") is False
+    assert playback.preparation_mode("h264", "aac") == "remux"
+    assert playback.preparation_mode("h264", "ac3") == "audio"
+    assert playback.preparation_mode("hevc", "aac") == "transcode"
+
+
+def test_transcode_arguments_write_fragmented_h264_aac(tmp_path):
+    arguments = playback.playback_arguments("in.mkv", "transcode", tmp_path / "out.mp4")
+    assert arguments[arguments.index("-c:v") + 1] == "libx264"
+    assert arguments[arguments.index("-c:a") + 1] == "aac"
+    assert "+frag_keyframe+empty_moov" in arguments[arguments.index("-movflags") + 1]
+    remux = playback.playback_arguments("in.mkv", "remux", tmp_path / "out.mp4")
+    assert remux[remux.index("-c:v") + 1] == remux[remux.index("-c:a") + 1] == "copy"
+
+
+class ProgressProcess:
+    def __init__(self, command, stdout, stderr, **_options):
+        self.stdout = io.StringIO(
+            "out_time_us=N/A\nprogress=continue\n"
+            "out_time_us=1500000\nprogress=continue\n"
+            "out_time_us=3000000\nprogress=end\n"
+        )
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self):
+        self.returncode = 0
+        return 0
+
+    def kill(self):
+        self.returncode = -9
+
+
+def test_ffmpeg_progress_is_streamed_in_milliseconds(monkeypatch):
+    monkeypatch.setattr(media_processing.subprocess, "Popen", ProgressProcess)
+    assert list(media_processing.stream_ffmpeg_progress(["-i", "movie.mkv"])) == [1_500, 3_000]
 
 
-def test_prepare_marks_direct_and_blocks_unsupported_files(
+def test_prepare_marks_direct_and_queues_other_files(
     session_factory, tmp_path
 ):
     direct_path = tmp_path / "direct.mp4"
@@ -33,20 +74,18 @@ def test_prepare_marks_direct_and_blocks_unsupported_files(
         database.commit()
         ids = direct.id, hevc.id, legacy.id
 
-    for movie_id in ids:
-        assert playback.prepare_playback(movie_id) is None
+    assert [playback.prepare_playback(movie_id) for movie_id in ids] == [False, True, True]
 
     with session_factory() as database:
         direct, hevc, legacy = [database.get(MovieFile, movie_id) for movie_id in ids]
         assert direct.playback_status == "direct"
-        assert hevc.playback_status == "failed"
-        assert hevc.playback_error == playback.UNSUPPORTED_CODEC_ERROR
-        assert legacy.playback_status == "failed"
-        assert legacy.playback_error == playback.UNSUPPORTED_EXTENSION_ERROR
+        assert hevc.playback_status == "pending"
+        # A proxy from an older version is not trusted; the movie is prepared again.
+        assert legacy.playback_status == "pending"
         assert legacy.playback_path == "playback/legacy.mp4"
 
 
-def test_stream_endpoint_supports_ranges_only_for_direct_original(
+def test_stream_endpoint_supports_ranges_for_direct_original(
     api_client, session_factory, tmp_path
 ):
     direct_path = tmp_path / "range.mp4"
@@ -78,11 +117,12 @@ def test_stream_endpoint_supports_ranges_only_for_direct_original(
     assert response.content == b"2345"
     assert response.headers["content-range"] == "bytes 2-5/10"
     assert response.headers["accept-ranges"] == "bytes"
-    assert api_client.get(f"/api/movies/{blocked_id}/stream").status_code == 409
+    # Proxies of older versions are not served.
+    assert api_client.get(f"/api/movies/{blocked_id}/stream").status_code == 404
 
 
-def test_prepare_endpoint_blocks_incompatible_codec_without_queue(
-    api_client, session_factory, tmp_path
+def test_prepare_endpoint_queues_incompatible_codec(
+    api_client, session_factory, tmp_path, monkeypatch
 ):
     source = tmp_path / "movie.mp4"
     source.write_bytes(b"video")
@@ -91,11 +131,80 @@ def test_prepare_endpoint_blocks_incompatible_codec_without_queue(
         database.add(movie)
         database.commit()
         movie_id = movie.id
+    scheduled = []
+    monkeypatch.setattr(movies, "schedule_playback", lambda _app, ids: scheduled.extend(ids))
 
     response = api_client.post(f"/api/movies/{movie_id}/playback/prepare")
     assert response.status_code == 200
-    assert response.json()["playback_status"] == "failed"
+    assert response.json()["playback_status"] == "pending"
+    assert response.json()["playback_progress"] == 0.0
     assert response.json()["stream_url"] is None
+    assert scheduled == [movie_id]
+
+
+def test_prepared_movie_is_transcoded_with_progress_and_streamed(
+    api_client, session_factory, tmp_path, monkeypatch
+):
+    source = tmp_path / "movie.mkv"
+    source.write_bytes(b"video")
+    with session_factory() as database:
+        movie = make_movie(
+            str(source),
+            video_codec="hevc",
+            audio_codec="ac3",
+            duration_ms=10_000,
+            playback_status="pending",
+        )
+        database.add(movie)
+        database.commit()
+        movie_id = movie.id
+    monkeypatch.setattr(playback, "PROGRESS_INTERVAL_SECONDS", 0)
+    progress = []
+
+    def stream_ffmpeg_progress(arguments):
+        assert arguments[arguments.index("-c:v") + 1] == "libx264"
+        for position_ms in (2_500, 5_000):
+            yield position_ms
+            with session_factory() as database:
+                progress.append(database.get(PlaybackPreparation, movie_id).progress)
+        Path(arguments[-1]).write_bytes(b"0123456789")
+
+    monkeypatch.setattr(playback, "stream_ffmpeg_progress", stream_ffmpeg_progress)
+    playback.process_playback(movie_id)
+
+    assert progress == [0.25, 0.5]
+    detail = api_client.get(f"/api/movies/{movie_id}").json()
+    assert detail["playback_status"] == "ready"
+    assert detail["playback_progress"] is None
+    response = api_client.get(detail["stream_url"], headers={"Range": "bytes=0-3"})
+    assert response.status_code == 206
+    assert response.content == b"0123"
+    assert response.headers["content-type"] == "video/mp4"
+    assert sorted(path.name for path in (tmp_path / "prepared").iterdir()) == [f"{movie_id}.mp4"]
+
+
+def test_failed_preparation_keeps_no_partial_output(session_factory, tmp_path, monkeypatch):
+    source = tmp_path / "movie.avi"
+    source.write_bytes(b"video")
+    with session_factory() as database:
+        movie = make_movie(str(source), video_codec="mpeg4", playback_status="pending")
+        database.add(movie)
+        database.commit()
+        movie_id = movie.id
+
+    def stream_ffmpeg_progress(arguments):
+        Path(arguments[-1]).write_bytes(b"partial")
+        raise RuntimeError("Invalid data found when processing input")
+        yield
+
+    monkeypatch.setattr(playback, "stream_ffmpeg_progress", stream_ffmpeg_progress)
+    playback.process_playback(movie_id)
+
+    with session_factory() as database:
+        movie = database.get(MovieFile, movie_id)
+        assert movie.playback_status == "failed"
+        assert movie.playback_error == "Invalid data found when processing input"
+    assert list((tmp_path / "prepared").iterdir()) == []
 
 
 def test_startup_normalizes_states_without_deleting_rows_or_legacy_proxy(
@@ -122,6 +231,17 @@ def test_startup_normalizes_states_without_deleting_rows_or_legacy_proxy(
                 str(tmp_path / "unknown.mp4"),
                 playback_status="processing",
             ),
+            make_movie(
+                str(tmp_path / "unprobed.mp4"),
+                playback_status="direct",
+            ),
+            make_movie(
+                str(tmp_path / "blocked.mkv"),
+                video_codec="h264",
+                audio_codec="aac",
+                playback_status="failed",
+                playback_error=playback.UNSUPPORTED_EXTENSION_ERROR,
+            ),
             make_movie(
                 str(tmp_path / "direct.webm"),
                 video_codec="vp9",
@@ -138,8 +258,8 @@ def test_startup_normalizes_states_without_deleting_rows_or_legacy_proxy(
     with session_factory() as database:
         movies = [database.get(MovieFile, movie_id) for movie_id in ids]
         assert [movie.playback_status for movie in movies] == [
-            "failed", "failed", "unprepared", "direct"
+            "unprepared", "unprepared", "processing", "unprepared", "unprepared", "direct"
         ]
         assert movies[0].playback_path == str(legacy_proxy)
-        assert database.query(MovieFile).count() == 4
+        assert database.query(MovieFile).count() == 6
     assert legacy_proxy.read_bytes() == b"keep me"
@@ -0,0 +1,128 @@
+import os
+
+from app.db import MovieFile
+from app.services import media_processing, probe_cache, trickplay
+from app.services.keyframes import load_keyframes
+from app.services.media_processing import MovieInspection
+from tests.test_models import make_movie
+
+
+class CountingBackend:
+    name = "test"
+
+    def __init__(self):
+        self.calls = []
+
+    def inspect_movie(self, path, movie_id):
+        self.calls.append(movie_id)
+        # Like write_thumbnail, replace the file instead of rewriting it.
+        temporary = media_processing.THUMBNAIL_DIR / f"{movie_id}.tmp.webp"
+        temporary.parent.mkdir(parents=True, exist_ok=True)
+        temporary.write_bytes(f"thumbnail-{len(self.calls)}".encode())
+        temporary.replace(media_processing.THUMBNAIL_DIR / f"{movie_id}.webp")
+        return MovieInspection(
+            {"duration_ms": 60_000, "width": 1280, "height": 720, "video_codec": "h264"},
+            [0, 2_000],
+            f"thumbnails/{movie_id}.webp",
+        )
+
+
+def _movie(session_factory, path):
+    with session_factory() as database:
+        movie = make_movie(str(path), "pending")
+        database.add(movie)
+        database.commit()
+        return movie.id
+
+
+def test_unchanged_file_reuses_probe_and_thumbnail(session_factory, tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    for module in (media_processing, probe_cache):
+        monkeypatch.setattr(module, "DATA_DIR", data_dir)
+        monkeypatch.setattr(module, "THUMBNAIL_DIR", data_dir / "thumbnails")
+    monkeypatch.setattr(probe_cache, "PROBE_CACHE_DIR", data_dir / "probe_cache")
+    backend = CountingBackend()
+    monkeypatch.setattr(media_processing, "_media_backend", backend)
+    video = tmp_path / "movie.mp4"
+    video.write_bytes(b"video")
+
+    before = probe_cache.probe_cache_stats()
+    first_id = _movie(session_factory, video)
+    media_processing.process_movie_metadata(first_id)
+    # The library is imported again, e.g. into a fresh database.
+    with session_factory() as database:
+        database.delete(database.get(MovieFile, first_id))
+        database.commit()
+    second_id = _movie(session_factory, video)
+    media_processing.process_movie_metadata(second_id)
+
+    assert backend.calls == [first_id]
+    with session_factory() as database:
+        movie = database.get(MovieFile, second_id)
+        assert (movie.metadata_status, movie.duration_ms, movie.video_codec) == ("ready", 60_000, "h264")
+        assert movie.thumbnail_path == f"thumbnails/{second_id}.webp"
+        assert load_keyframes(database, second_id) == [0, 2_000]
+    assert (data_dir / "thumbnails" / f"{second_id}.webp").read_bytes() == b"thumbnail-1"
+    stats = probe_cache.probe_cache_stats()
+    assert stats["entries"] == 1
+    assert (stats["hits"] - before["hits"], stats["misses"] - before["misses"]) == (1, 1)
+
+    # A changed file is probed again.
+    os.utime(video, ns=(1_800_000_000_000_000_000, 1_800_000_000_000_000_000))
+    with session_factory() as database:
+        database.get(MovieFile, second_id).metadata_status = "pending"
+        database.commit()
+    media_processing.process_movie_metadata(second_id)
+    assert backend.calls == [first_id, second_id]
+    assert (data_dir / "thumbnails" / f"{second_id}.webp").read_bytes() == b"thumbnail-2"
+    # Only the latest version of a path is kept, with its own thumbnail.
+    assert probe_cache.probe_cache_stats()["entries"] == 1
+    assert len(list((data_dir / "probe_cache").iterdir())) == 1
+
+
+def test_cache_hits_skip_the_fingerprint_read_and_the_sprite(
+    session_factory, tmp_path, monkeypatch
+):
+    data_dir = tmp_path / "data"
+    for module in (media_processing, probe_cache):
+        monkeypatch.setattr(module, "DATA_DIR", data_dir)
+        monkeypatch.setattr(module, "THUMBNAIL_DIR", data_dir / "thumbnails")
+    monkeypatch.setattr(probe_cache, "PROBE_CACHE_DIR", data_dir / "probe_cache")
+    backend = CountingBackend()
+    monkeypatch.setattr(media_processing, "_media_backend", backend)
+    fingerprint_reads = []
+
+    def content_fingerprint(path):
+        fingerprint_reads.append(path)
+        return "same-content"
+
+    monkeypatch.setattr(media_processing, "content_fingerprint", content_fingerprint)
+    sprites = []
+
+    def run_command(command, timeout):
+        sprites.append(command[-1])
+        media_processing.Path(command[-1]).write_bytes(b"sprite")
+
+    monkeypatch.setattr(media_processing, "_run_command", run_command)
+    monkeypatch.setattr(trickplay, "_interval_ms", 10_000)
+    video = tmp_path / "movie.mp4"
+    video.write_bytes(b"video")
+    copy = tmp_path / "copy.mp4"
+    copy.write_bytes(b"video")
+
+    movie_id = _movie(session_factory, video)
+    media_processing.process_movie_metadata(movie_id)
+    with session_factory() as database:
+        database.get(MovieFile, movie_id).metadata_status = "pending"
+        database.commit()
+    media_processing.process_movie_metadata(movie_id)
+    copy_id = _movie(session_factory, copy)
+    media_processing.process_movie_metadata(copy_id)
+
+    assert backend.calls == [movie_id]
+    assert len(sprites) == 1
+    # Read once for the first probe and once for the copy, never for the key hit.
+    assert fingerprint_reads == [str(video), str(copy)]
+    for current_id in (movie_id, copy_id):
+        path, _version = trickplay.trickplay_file(current_id, ".webp")
+        assert path.read_bytes() == b"sprite"
@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import select
+
+from app.db import SceneAnalysisCache
+from app.services import scene_analysis_cache, scene_models
+
+
+def _analysis(prompt="blue sky"):
+    return scene_models.SceneAnalysis(
+        embedding=b"\x00" * (768 * 4),
+        prompt=prompt,
+        keywords=["blue sky"],
+    )
+
+
+def test_identical_snapshot_bytes_bypass_remote_analysis(
+    session_factory, tmp_path, monkeypatch
+):
+    remote_calls = []
+    monkeypatch.setattr(
+        scene_analysis_cache,
+        "analyze_scene_data",
+        lambda data: remote_calls.append(data) or _analysis(),
+    )
+    first = tmp_path / "first.webp"
+    duplicate = tmp_path / "duplicate.webp"
+    other = tmp_path / "other.webp"
+    first.write_bytes(b"frame")
+    duplicate.write_bytes(b"frame")
+    other.write_bytes(b"other frame")
+    before = scene_analysis_cache.scene_analysis_cache_stats()
+
+    assert scene_analysis_cache.analyze_scene(first).prompt == "blue sky"
+    cached = scene_analysis_cache.analyze_scene(duplicate)
+    scene_analysis_cache.analyze_scene(other)
+
+    assert remote_calls == [b"frame", b"other frame"]
+    assert cached == _analysis()
+    stats = scene_analysis_cache.scene_analysis_cache_stats()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["misses"] - before["misses"] == 2
+    assert stats["entries"] == 2
+    assert stats["lifetime_hits"] == 1
+    with session_factory() as database:
+        entry = database.scalar(
+            select(SceneAnalysisCache).where(
+                SceneAnalysisCache.snapshot_sha256
+                == scene_analysis_cache.snapshot_digest(b"frame")
+            )
+        )
+        assert (entry.embedding_model, entry.prompt_model) == (
+            scene_models.CLIP_MODEL_NAME,
+            scene_models.WD14_MODEL_REPO,
+        )
+        assert entry.hit_count == 1
+
+
+def test_failed_remote_analysis_is_not_cached(session_factory, tmp_path, monkeypatch):
+    snapshot = tmp_path / "snapshot.webp"
+    snapshot.write_bytes(b"frame")
+
+    def fail(_data):
+        raise RuntimeError("model failure")
+
+    monkeypatch.setattr(scene_analysis_cache, "analyze_scene_data", fail)
+    with pytest.raises(RuntimeError, match="model failure"):
+        scene_analysis_cache.analyze_scene(snapshot)
+    with session_factory() as database:
+        assert database.scalar(select(SceneAnalysisCache)) is None
+
+    monkeypatch.setattr(scene_analysis_cache, "analyze_scene_data", lambda _data: _analysis())
+    assert scene_analysis_cache.analyze_scene(snapshot).prompt == "blue sky"
+    scene_analysis_cache.store_scene_analysis(
+        scene_analysis_cache.snapshot_digest(b"frame"), _analysis("replaced")
+    )
+    assert scene_analysis_cache.lookup_scene_analysis(
+        scene_analysis_cache.snapshot_digest(b"frame")
+    ).prompt == "blue sky"
@@ -0,0 +1,107 @@
+import io
+
+from sqlalchemy import select
+
+from app.db import Scene
+from app.routers import scenes
+from app.services import media_processing, scene_detection
+from tests.test_models import make_movie
+
+
+def test_boundaries_respect_threshold_spacing_and_count():
+    scores = [
+        (0, 0.0), (1_000, 0.5), (1_500, 0.9), (2_000, 0.1),
+        (6_000, 0.4), (9_000, 0.35), (12_000, 0.8), (20_000, 0.31),
+    ]
+    assert scene_detection.select_shot_boundaries(scores, 0.3, 2_000, 100) == [
+        1_500, 6_000, 9_000, 12_000, 20_000,
+    ]
+    assert scene_detection.select_shot_boundaries(scores, 0.3, 2_000, 3) == [
+        1_500, 6_000, 12_000,
+    ]
+    many = ((index * 10_000, 0.5 + index / 1_000) for index in range(200))
+    assert scene_detection.select_shot_boundaries(many, 0.3, 0, 2) == [1_980_000, 1_990_000]
+
+
+class FakeProcess:
+    def __init__(self, command, stdout, stderr, **_options):
+        self.command = command
+        self.stdout = io.StringIO(
+            "frame:0    pts:0       pts_time:0\n"
+            "lavfi.scene_score=0.000000\n"
+            "frame:1    pts:512     pts_time:0.04\n"
+            "lavfi.scene_score=0.712000\n"
+        )
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self):
+        self.returncode = 0
+        return 0
+
+    def kill(self):
+        self.returncode = -9
+
+
+def test_scene_scores_are_streamed_from_ffmpeg_metadata(monkeypatch):
+    processes = []
+    monkeypatch.setattr(
+        media_processing.subprocess,
+        "Popen",
+        lambda command, **options: processes.append(FakeProcess(command, **options)) or processes[-1],
+    )
+    assert list(media_processing.stream_scene_scores("movie.mp4")) == [(0, 0.0), (40, 0.712)]
+    # Timestamps stay relative to the start time only while ffmpeg rebases them.
+    assert "-copyts" not in processes[0].command
+
+
+def test_detection_creates_scenes_and_schedules_them_in_one_batch(
+    api_client, session_factory, tmp_path, monkeypatch
+):
+    source = tmp_path / "movie.mp4"
+    source.write_bytes(b"video")
+    with session_factory() as database:
+        movie = make_movie(str(source), duration_ms=30_000)
+        database.add(movie)
+        database.flush()
+        database.add(Scene(movie_file_id=movie.id, timestamp_ms=10_500, analysis_status="ready"))
+        database.commit()
+        movie_id = movie.id
+    monkeypatch.setattr(
+        scene_detection,
+        "stream_scene_scores",
+        lambda _path: iter([(4_000, 0.6), (10_000, 0.9), (20_000, 0.5), (25_000, 0.1)]),
+    )
+    scheduled = []
+    monkeypatch.setattr(scenes, "schedule_detection_jobs", lambda _app, ids: scheduled.extend(ids))
+
+    assert api_client.post(
+        f"/api/movies/{movie_id}/scene-detection", json={"threshold": 0}
+    ).status_code == 422
+    response = api_client.post(
+        f"/api/movies/{movie_id}/scene-detection",
+        json={"threshold": 0.4, "min_spacing_ms": 1_000},
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert (job["status"], scheduled) == ("pending", [job["id"]])
+
+    batches = []
+    scene_detection.process_detection_job(job["id"], on_scenes=batches.append)
+
+    finished = api_client.get(f"/api/scene-detection/{job['id']}").json()
+    assert finished["status"] == "ready"
+    assert finished["progress"] == 1.0
+    assert finished["boundary_count"] == 3
+    assert batches == [finished["scene_ids"]]
+    with session_factory() as database:
+        created = database.scalars(
+            select(Scene).where(Scene.id.in_(finished["scene_ids"])).order_by(Scene.timestamp_ms)
+        ).all()
+    assert [(scene.timestamp_ms, scene.analysis_status) for scene in created] == [
+        (4_000, "pending"),
+        (20_000, "pending"),
+    ]
+    assert api_client.get("/api/scene-detection/999").status_code == 404
@@ -58,6 +58,8 @@ class FakeGpStationClient:
     text_delay = 0.0
     block_text = False
     cancelled = threading.Event()
+    sdxl_models_payloads = []
+    sdxl_models_release = None
 
     def __init__(self, api_base_url, token, **kwargs):
         self.api_base_url = api_base_url
@@ -87,6 +89,13 @@ class FakeGpStationClient:
                 files=type(self).clip_files,
                 session=self.session,
             )
+        if handler_type == "ai.sdxl.models":
+            release = type(self).sdxl_models_release
+            if release is not None:
+                await asyncio.to_thread(release.wait)
+            return SimpleNamespace(
+                payload=type(self).sdxl_models_payloads.pop(0), files=[]
+            )
         if handler_type != "ai.clip.text":
             raise AssertionError(f"unexpected handler: {handler_type}")
         self.active += 1
@@ -129,6 +138,8 @@ def reset_fake_client():
     FakeGpStationClient.text_delay = 0.0
     FakeGpStationClient.block_text = False
     FakeGpStationClient.cancelled = threading.Event()
+    FakeGpStationClient.sdxl_models_payloads = []
+    FakeGpStationClient.sdxl_models_release = None
 
 
 def test_scene_uses_one_session_same_attachment_and_600_second_timeout(tmp_path):
@@ -148,7 +159,11 @@ def test_scene_uses_one_session_same_attachment_and_600_second_timeout(tmp_path)
     client = FakeGpStationClient.instances[0]
     assert client.api_base_url == "http://gpstation.test"
     assert client.token == "secret-token"
-    assert client.kwargs == {"auth_mode": "bearer", "job_api_prefix": "/v1/jobs"}
+    assert client.kwargs == {
+        "auth_mode": "bearer",
+        "job_api_prefix": "/v1/jobs",
+        "answer_mode": "poll",
+    }
     assert client.calls[0] == ("list-launchers",)
     run = next(call for call in client.calls if call[0] == "run")
     followup = next(call for call in client.calls if call[0] == "call")
@@ -177,6 +192,19 @@ def test_scene_uses_one_session_same_attachment_and_600_second_timeout(tmp_path)
     assert analysis.keywords == ["blue sky", "1girl"]
 
 
+def test_runtime_passes_configured_answer_mode_to_client():
+    runtime = scene_models.GpStationAiRuntime(
+        "http://gpstation.test",
+        "token",
+        client_factory=FakeGpStationClient,
+        answer_mode="inline",
+    )
+    runtime.start()
+    runtime.stop()
+
+    assert FakeGpStationClient.instances[0].kwargs["answer_mode"] == "inline"
+
+
 def test_text_handler_payload_and_binary_format_use_configured_timeout():
     runtime = scene_models.GpStationAiRuntime(
         "http://gpstation.test",
@@ -366,6 +394,28 @@ def test_remote_ai_requests_are_serialized_across_sync_threads():
     assert FakeGpStationClient.instances[0].max_active == 1
 
 
+def test_remote_ai_requests_use_configured_job_slots():
+    FakeGpStationClient.text_delay = 0.05
+    runtime = scene_models.GpStationAiRuntime(
+        "http://gpstation.test",
+        "token",
+        client_factory=FakeGpStationClient,
+        job_slots=2,
+    )
+    runtime.start()
+    threads = [
+        threading.Thread(target=runtime.embed_text, args=(f"query {index}",))
+        for index in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    runtime.stop()
+
+    assert FakeGpStationClient.instances[0].max_active == 2
+
+
 def test_bridge_timeout_cancels_inflight_coroutine():
     FakeGpStationClient.block_text = True
     runtime = scene_models.GpStationAiRuntime(
@@ -383,6 +433,132 @@ def test_bridge_timeout_cancels_inflight_coroutine():
         runtime.stop()
 
 
+def test_async_requests_share_runtime_without_blocking_caller_loop():
+    FakeGpStationClient.text_delay = 0.03
+    runtime = scene_models.GpStationAiRuntime(
+        "http://gpstation.test", "token", client_factory=FakeGpStationClient
+    )
+    runtime.start()
+
+    async def invoke():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticker = asyncio.create_task(tick())
+        try:
+            embeddings = await asyncio.gather(
+                *(runtime.embed_text_async(f"query {index}") for index in range(3))
+            )
+        finally:
+            ticker.cancel()
+        return embeddings, ticks
+
+    try:
+        embeddings, ticks = asyncio.run(invoke())
+    finally:
+        runtime.stop()
+
+    assert [len(embedding) for embedding in embeddings] == [768 * 4] * 3
+    assert ticks > 3
+    assert FakeGpStationClient.instances[0].max_active == 1
+
+
+def test_async_bridge_timeout_cancels_inflight_coroutine():
+    FakeGpStationClient.block_text = True
+    runtime = scene_models.GpStationAiRuntime(
+        "http://gpstation.test",
+        "token",
+        client_factory=FakeGpStationClient,
+        bridge_timeout_seconds=0.02,
+    )
+    runtime.start()
+    try:
+        with pytest.raises(TimeoutError, match="시간이 초과"):
+            asyncio.run(runtime.embed_text_async("blue sky"))
+        assert FakeGpStationClient.cancelled.wait(1)
+    finally:
+        runtime.stop()
+
+
+def _sdxl_catalog(name):
+    return {
+        "default_model": name,
+        "models": [
+            {
+                "name": name, "step": 30, "cfg": 7.0, "height": 1024,
+                "width": 1024, "strength": 0.8, "format": "png",
+            }
+        ],
+    }
+
+
+def _sdxl_model_calls(client):
+    return [call for call in client.calls if call[:2] == ("run", "ai.sdxl.models")]
+
+
+def test_sdxl_models_are_cached_and_revalidated_in_background():
+    FakeGpStationClient.sdxl_models_payloads = [
+        _sdxl_catalog("first"), _sdxl_catalog("second"), _sdxl_catalog("third"),
+    ]
+    runtime = scene_models.GpStationAiRuntime(
+        "http://gpstation.test",
+        "token",
+        client_factory=FakeGpStationClient,
+        sdxl_models_ttl_seconds=60,
+    )
+    runtime.start()
+    try:
+        assert runtime.list_sdxl_models().default_model == "first"
+        runtime._sdxl_models_fetched_at -= 59
+        assert runtime.list_sdxl_models().default_model == "first"
+        client = FakeGpStationClient.instances[0]
+        assert len(_sdxl_model_calls(client)) == 1
+
+        FakeGpStationClient.sdxl_models_release = threading.Event()
+        runtime._sdxl_models_fetched_at -= 1
+        assert runtime.list_sdxl_models().default_model == "first"
+        assert runtime.list_sdxl_models().default_model == "first"
+        FakeGpStationClient.sdxl_models_release.set()
+        deadline = time.time() + 1
+        while runtime.list_sdxl_models().default_model != "second":
+            assert time.time() < deadline
+            time.sleep(0.005)
+        assert len(_sdxl_model_calls(client)) == 2
+
+        refreshed = asyncio.run(runtime.refresh_sdxl_models_async())
+        assert refreshed.default_model == "third"
+        assert runtime.list_sdxl_models().default_model == "third"
+    finally:
+        runtime.stop()
+
+
+def test_sdxl_models_ttl_zero_disables_catalogue_cache():
+    FakeGpStationClient.sdxl_models_payloads = [
+        _sdxl_catalog("first"), _sdxl_catalog("second"),
+    ]
+    runtime = scene_models.GpStationAiRuntime(
+        "http://gpstation.test",
+        "token",
+        client_factory=FakeGpStationClient,
+        sdxl_models_ttl_seconds=0,
+    )
+    runtime.start()
+    try:
+        assert runtime.list_sdxl_models().default_model == "first"
+        assert runtime.list_sdxl_models().default_model == "second"
+    finally:
+        runtime.stop()
+    with pytest.raises(ValueError):
+        scene_models.GpStationAiRuntime(
+            "http://gpstation.test", "token", sdxl_models_ttl_seconds=-1
+        )
+
+
 def test_runtime_rejects_empty_and_oversized_snapshot(tmp_path):
     runtime = scene_models.GpStationAiRuntime(
         "http://gpstation.test", "token", client_factory=FakeGpStationClient
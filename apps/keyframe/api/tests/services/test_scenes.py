@@ -1,12 +1,14 @@
 import math
 import struct
+from pathlib import Path
 
 import pytest
 from sqlalchemy import select
 
 from app.db import Scene
 from app.routers import scenes
-from app.services import scene_models, scene_processing, scene_query
+from app.services import media_processing, scene_models, scene_processing, scene_query
+from app.services.keyframes import store_keyframes
 from tests.test_models import make_movie
 
 
@@ -21,7 +23,11 @@ def test_scene_api_validates_timestamp_sorts_and_rejects_duplicates(
         database.commit()
         movie_id = movie.id
     scheduled = []
-    monkeypatch.setattr(scenes, "schedule_scenes", lambda _app, ids: scheduled.extend(ids))
+    monkeypatch.setattr(
+        scenes,
+        "schedule_scenes",
+        lambda _app, ids, priority: scheduled.extend(ids),
+    )
 
     assert api_client.post(
         f"/api/movies/{movie_id}/scenes", json={"timestamp_ms": -1}
@@ -48,6 +54,35 @@ def test_scene_api_validates_timestamp_sorts_and_rejects_duplicates(
     assert all("embedding" not in item for item in listed)
 
 
+def test_scene_api_snaps_to_the_nearest_keyframe_when_indexed(
+    api_client, session_factory, tmp_path, monkeypatch
+):
+    with session_factory() as database:
+        indexed = make_movie(str(tmp_path / "indexed.mp4"), duration_ms=10_000)
+        plain = make_movie(str(tmp_path / "plain.mp4"), duration_ms=10_000)
+        database.add_all([indexed, plain])
+        database.flush()
+        store_keyframes(database, indexed.id, [0, 4_000, 8_000, 12_000])
+        database.commit()
+        indexed_id, plain_id = indexed.id, plain.id
+    monkeypatch.setattr(scenes, "schedule_scenes", lambda _app, ids, priority: None)
+
+    snapped = api_client.post(
+        f"/api/movies/{indexed_id}/scenes",
+        json={"timestamp_ms": 9_900, "snap_to_keyframe": True},
+    )
+    exact = api_client.post(f"/api/movies/{indexed_id}/scenes", json={"timestamp_ms": 5_100})
+    unindexed = api_client.post(
+        f"/api/movies/{plain_id}/scenes",
+        json={"timestamp_ms": 5_100, "snap_to_keyframe": True},
+    )
+    assert snapped.json()["timestamp_ms"] == 8_000
+    assert exact.json()["timestamp_ms"] == 5_100
+    assert unindexed.json()["timestamp_ms"] == 5_100
+    assert api_client.get(f"/api/movies/{indexed_id}").json()["keyframe_count"] == 4
+    assert api_client.get(f"/api/movies/{plain_id}").json()["keyframe_count"] is None
+
+
 def test_scene_explorer_lists_latest_and_searches_by_clip_similarity(
     api_client, session_factory, tmp_path, monkeypatch
 ):
@@ -55,11 +90,11 @@ def test_scene_explorer_lists_latest_and_searches_by_clip_similarity(
     second_axis = [0.0, 1.0] + [0.0] * 766
     first_embedding = struct.pack("<768f", *first_axis)
     second_embedding = struct.pack("<768f", *second_axis)
-    monkeypatch.setattr(
-        scene_query,
-        "extract_clip_text_embedding",
-        lambda _query: first_embedding,
-    )
+
+    async def embed_query(_query):
+        return first_embedding
+
+    monkeypatch.setattr(scene_query, "extract_clip_text_embedding_async", embed_query)
     with session_factory() as database:
         movie = make_movie(str(tmp_path / "탐색 영상.mp4"))
         movie.title = "탐색 영상"
@@ -135,11 +170,10 @@ def test_scene_explorer_validates_paging_and_reports_search_model_errors(
     assert api_client.get("/api/scenes", params={"limit": 101}).status_code == 422
     assert api_client.get("/api/scenes", params={"query": "x" * 501}).status_code == 422
 
-    monkeypatch.setattr(
-        scene_query,
-        "extract_clip_text_embedding",
-        lambda _query: (_ for _ in ()).throw(RuntimeError("model load failure")),
-    )
+    async def fail_embedding(_query):
+        raise RuntimeError("model load failure")
+
+    monkeypatch.setattr(scene_query, "extract_clip_text_embedding_async", fail_embedding)
     response = api_client.get("/api/scenes", params={"query": "blue sky"})
     assert response.status_code == 503
     assert response.json()["detail"] == (
@@ -381,16 +415,16 @@ def test_scene_processing_removes_snapshot_when_scene_is_deleted_mid_job(
         scene_id = scene.id
         movie_id = movie.id
 
-    def snapshot(_source, _movie_id, _scene_id, _timestamp_ms):
+    def snapshot(_source, _movie_id, _scenes, _keyframes=None):
         target = scene_dir / str(movie_id) / f"{scene_id}.webp"
         target.parent.mkdir(parents=True)
         target.write_bytes(b"webp")
         with session_factory() as database:
             database.delete(database.get(Scene, scene_id))
             database.commit()
-        return target
+        return {scene_id: target}
 
-    monkeypatch.setattr(scene_processing, "create_scene_snapshot", snapshot)
+    monkeypatch.setattr(scene_processing, "create_scene_snapshots", snapshot)
     scene_processing.process_scene(scene_id)
 
     assert not (scene_dir / str(movie_id) / f"{scene_id}.webp").exists()
@@ -408,13 +442,16 @@ def test_scene_analysis_saves_snapshot_embedding_and_prompt(
     monkeypatch.setattr(scene_processing, "DATA_DIR", data_dir)
     monkeypatch.setattr(scene_processing, "SCENE_DIR", scene_dir)
 
-    def snapshot(_source, movie_id, scene_id, _timestamp_ms):
-        target = scene_dir / str(movie_id) / f"{scene_id}.webp"
-        target.parent.mkdir(parents=True, exist_ok=True)
-        target.write_bytes(b"webp")
-        return target
+    def snapshot(_source, movie_id, scenes, _keyframes=None):
+        targets = {}
+        for scene_id, _timestamp_ms in scenes:
+            target = scene_dir / str(movie_id) / f"{scene_id}.webp"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(b"webp")
+            targets[scene_id] = target
+        return targets
 
-    monkeypatch.setattr(scene_processing, "create_scene_snapshot", snapshot)
+    monkeypatch.setattr(scene_processing, "create_scene_snapshots", snapshot)
     monkeypatch.setattr(
         scene_processing,
         "analyze_scene",
@@ -447,6 +484,138 @@ def test_scene_analysis_saves_snapshot_embedding_and_prompt(
         assert result.keywords == ["blue sky", "1girl"]
 
 
+def test_snapshot_batch_uses_one_ffmpeg_process_per_movie(tmp_path, monkeypatch):
+    scene_dir = tmp_path / "scenes"
+    monkeypatch.setattr(scene_processing, "SCENE_DIR", scene_dir)
+    commands = []
+
+    def run_command(command, timeout):
+        commands.append(command)
+        outputs = [Path(part) for part in command if part.endswith(".tmp.webp")]
+        for output in outputs[:-1]:
+            output.write_bytes(b"webp")
+        outputs[-1].write_bytes(b"")
+
+    monkeypatch.setattr(media_processing, "_run_command", run_command)
+    snapshots = scene_processing.create_scene_snapshots(
+        "movie.mp4", 4, [(1, 1_000), (2, 61_500), (3, 90_000)]
+    )
+
+    assert len(commands) == 1
+    assert [commands[0][index + 1] for index, part in enumerate(commands[0]) if part == "-ss"] == [
+        "1.000", "61.500", "90.000",
+    ]
+    assert snapshots == {1: scene_dir / "4" / "1.webp", 2: scene_dir / "4" / "2.webp"}
+    assert sorted(path.name for path in (scene_dir / "4").iterdir()) == ["1.webp", "2.webp"]
+
+
+def test_nearby_snapshots_share_one_seeked_input(tmp_path, monkeypatch):
+    commands = []
+    monkeypatch.setattr(
+        media_processing, "_run_command", lambda command, timeout: commands.append(command)
+    )
+    frames = [(61_500, tmp_path / "c.webp"), (1_000, tmp_path / "a.webp"), (4_000, tmp_path / "b.webp")]
+    media_processing.SubprocessMediaBackend().write_frames("movie.mp4", frames, width=640, quality=80)
+
+    command = commands[0]
+    assert command.count("-i") == 2
+    assert [command[index + 1] for index, part in enumerate(command) if part == "-ss"] == [
+        "1.000", "61.500",
+    ]
+    graph = command[command.index("-filter_complex") + 1]
+    assert "[0:v:0]split=2[f0_0s][f0_1s]" in graph
+    assert "[f0_1s]trim=start=2.999,scale=" in graph
+    assert "[1:v:0]split=1[f1_0s]" in graph
+    targets = [command[index + 1] for index, part in enumerate(command) if part == "-map"]
+    assert targets == ["[f0_0]", "[f0_1]", "[f1_0]"]
+    assert command[-1] == str(tmp_path / "c.webp")
+
+
+def test_snapshots_seek_to_the_preceding_keyframe_and_trim(tmp_path, monkeypatch):
+    commands = []
+    monkeypatch.setattr(
+        media_processing, "_run_command", lambda command, timeout: commands.append(command)
+    )
+    frames = [(2_500, tmp_path / "a.webp"), (4_000, tmp_path / "b.webp"), (20_020, tmp_path / "c.webp")]
+    media_processing.SubprocessMediaBackend().write_frames(
+        "movie.mp4", frames, width=640, quality=80, keyframes=[0, 2_002, 20_020]
+    )
+
+    command = commands[0]
+    assert [command[index + 1] for index, part in enumerate(command) if part == "-ss"] == [
+        "2.001", "20.019",
+    ]
+    # Only the lone exact keyframe skips decoding the frames around it.
+    assert command.count("-skip_frame") == 1
+    assert command[command.index("-skip_frame") + 3:command.index("-skip_frame") + 5] == ["20.019", "-i"]
+    graph = command[command.index("-filter_complex") + 1]
+    assert "[f0_0s]trim=start=0.498,scale=" in graph
+    assert "[f0_1s]trim=start=1.998,scale=" in graph
+    assert "[f1_0s]scale=" in graph
+
+
+def test_scene_processing_extracts_queued_sibling_snapshots_together(
+    session_factory, tmp_path, monkeypatch
+):
+    data_dir = tmp_path / "data"
+    scene_dir = data_dir / "scenes"
+    source = tmp_path / "movie.mp4"
+    source.write_bytes(b"video")
+    monkeypatch.setattr(scene_processing, "DATA_DIR", data_dir)
+    monkeypatch.setattr(scene_processing, "SCENE_DIR", scene_dir)
+    batches = []
+
+    def snapshot(_source, movie_id, scenes, _keyframes=None):
+        batches.append([scene_id for scene_id, _timestamp_ms in scenes])
+        if len(scenes) > 1 and any(timestamp_ms == 9_000 for _id, timestamp_ms in scenes):
+            raise RuntimeError("bad frame")
+        targets = {}
+        for scene_id, _timestamp_ms in scenes:
+            target = scene_dir / str(movie_id) / f"{scene_id}.webp"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(b"webp")
+            targets[scene_id] = target
+        return targets
+
+    monkeypatch.setattr(scene_processing, "create_scene_snapshots", snapshot)
+    monkeypatch.setattr(
+        scene_processing,
+        "analyze_scene",
+        lambda _path: scene_models.SceneAnalysis(
+            embedding=b"\0" * 768 * 4, prompt="sky", keywords=["sky"]
+        ),
+    )
+    with session_factory() as database:
+        movie = make_movie(str(source), duration_ms=30_000)
+        database.add(movie)
+        database.flush()
+        first, second, done = (
+            Scene(movie_file_id=movie.id, timestamp_ms=1_000, analysis_status="pending"),
+            Scene(movie_file_id=movie.id, timestamp_ms=2_000, analysis_status="pending"),
+            Scene(movie_file_id=movie.id, timestamp_ms=3_000, analysis_status="ready"),
+        )
+        database.add_all([first, second, done])
+        database.commit()
+        first_id, second_id = first.id, second.id
+
+    scene_processing.process_scene(first_id)
+    scene_processing.process_scene(second_id)
+    assert batches == [[first_id, second_id]]
+    with session_factory() as database:
+        assert database.get(Scene, second_id).analysis_status == "ready"
+        broken = Scene(movie_file_id=first.movie_file_id, timestamp_ms=9_000, analysis_status="pending")
+        fine = Scene(movie_file_id=first.movie_file_id, timestamp_ms=4_000, analysis_status="pending")
+        database.add_all([broken, fine])
+        database.commit()
+        fine_id, broken_id = fine.id, broken.id
+
+    scene_processing.process_scene(fine_id)
+    assert batches[1:] == [[fine_id, broken_id], [fine_id]]
+    with session_factory() as database:
+        assert database.get(Scene, fine_id).analysis_status == "ready"
+        assert database.get(Scene, broken_id).snapshot_path is None
+
+
 def test_scene_analysis_failure_keeps_snapshot_and_can_retry(
     api_client, session_factory, tmp_path, monkeypatch
 ):
@@ -457,13 +626,16 @@ def test_scene_analysis_failure_keeps_snapshot_and_can_retry(
     monkeypatch.setattr(scene_processing, "DATA_DIR", data_dir)
     monkeypatch.setattr(scene_processing, "SCENE_DIR", scene_dir)
 
-    def snapshot(_source, movie_id, scene_id, _timestamp_ms):
-        target = scene_dir / str(movie_id) / f"{scene_id}.webp"
-        target.parent.mkdir(parents=True, exist_ok=True)
-        target.write_bytes(b"webp")
-        return target
+    def snapshot(_source, movie_id, scenes, _keyframes=None):
+        targets = {}
+        for scene_id, _timestamp_ms in scenes:
+            target = scene_dir / str(movie_id) / f"{scene_id}.webp"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(b"webp")
+            targets[scene_id] = target
+        return targets
 
-    monkeypatch.setattr(scene_processing, "create_scene_snapshot", snapshot)
+    monkeypatch.setattr(scene_processing, "create_scene_snapshots", snapshot)
     monkeypatch.setattr(
         scene_processing,
         "analyze_scene",
@@ -486,7 +658,11 @@ def test_scene_analysis_failure_keeps_snapshot_and_can_retry(
         assert failed.snapshot_path is not None
 
     scheduled = []
-    monkeypatch.setattr(scenes, "schedule_scenes", lambda _app, ids: scheduled.extend(ids))
+    monkeypatch.setattr(
+        scenes,
+        "schedule_scenes",
+        lambda _app, ids, priority: scheduled.extend(ids),
+    )
     response = api_client.post(f"/api/scenes/{scene_id}/retry")
     assert response.status_code == 200
     assert response.json()["analysis_status"] == "pending"
@@ -0,0 +1,25 @@
+from app.services.status_events import StatusEventLog
+
+
+def test_changes_are_coalesced_per_item_and_resumable():
+    log = StatusEventLog(history_size=8)
+    start = log.latest_id()
+    log.publish("movie", [3, 1])
+    log.publish("scene", [7])
+    log.publish("movie", [3])
+    latest, changed = log.changes_after(start)
+    assert changed == {"movie": [1, 3], "scene": [7]}
+    assert log.changes_after(latest) == (latest, {})
+
+    log.publish("scene", [8])
+    assert log.changes_after(latest)[1] == {"scene": [8]}
+
+
+def test_unknown_or_expired_ids_require_a_reload():
+    log = StatusEventLog(history_size=2)
+    start = log.latest_id()
+    log.publish("movie", [1, 2, 3])
+    assert log.changes_after(start) is None
+    assert log.changes_after("another-run-0") is None
+    assert log.changes_after(f"{log.run_id}-99") is None
+    assert log.changes_after(f"{log.run_id}-1")[1] == {"movie": [2, 3]}
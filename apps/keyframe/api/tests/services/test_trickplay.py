@@ -0,0 +1,121 @@
+from pathlib import Path
+
+from app.services import media_processing, trickplay
+from tests.test_models import make_movie
+
+
+def test_layout_fits_long_movies_into_one_sheet():
+    short = trickplay.trickplay_layout(95_000, 1920, 1080, 10_000)
+    assert (short.interval_ms, short.tile_count, short.rows, short.tile_height) == (
+        10_000, 10, 1, 90,
+    )
+    # 16383 // 90 = 182 rows of 10 tiles; a 10 hour movie needs 20 s tiles.
+    long = trickplay.trickplay_layout(36_000_000, 1920, 1080, 10_000)
+    assert long.interval_ms == 20_000
+    assert long.rows * long.tile_height <= trickplay.MAX_SPRITE_HEIGHT
+
+
+def test_vtt_cues_point_into_the_versioned_sheet():
+    layout = trickplay.trickplay_layout(25_000, 640, 480, 10_000)
+    assert trickplay.render_vtt(3, layout, 42).splitlines()[:7] == [
+        "WEBVTT",
+        "",
+        "00:00:00.000 --> 00:00:10.000",
+        "/api/movies/3/trickplay.webp?v=42#xywh=0,0,160,120",
+        "",
+        "00:00:10.000 --> 00:00:20.000",
+        "/api/movies/3/trickplay.webp?v=42#xywh=160,0,160,120",
+    ]
+
+
+def test_metadata_stage_builds_sprite_and_serves_it_immutably(
+    api_client, session_factory, tmp_path, monkeypatch
+):
+    with session_factory() as database:
+        movie = make_movie(str(tmp_path / "movie.mp4"), "pending")
+        database.add(movie)
+        database.commit()
+        movie_id = movie.id
+    commands = []
+
+    def run_command(command, timeout):
+        commands.append(command)
+        Path(command[-1]).write_bytes(b"sprite")
+
+    monkeypatch.setattr(media_processing, "_run_command", run_command)
+    monkeypatch.setattr(
+        media_processing,
+        "probe_video",
+        lambda _path: {"duration_ms": 95_000, "width": 1920, "height": 1080},
+    )
+    monkeypatch.setattr(media_processing, "probe_keyframes", lambda _path: [0, 4_000, 8_000])
+    monkeypatch.setattr(
+        media_processing, "create_thumbnail", lambda *_args: f"thumbnails/{movie_id}.webp"
+    )
+    monkeypatch.setattr(trickplay, "_interval_ms", 10_000)
+    media_processing.process_movie_metadata(movie_id)
+
+    assert len(commands) == 1
+    assert commands[0][4:6] == ["-skip_frame", "nokey"]
+    assert "fps=1000/10000:round=down,scale=160:90,tile=10x1" in commands[0]
+    detail = api_client.get(f"/api/movies/{movie_id}").json()
+    assert detail["trickplay_url"].startswith(f"/api/movies/{movie_id}/trickplay.vtt?v=")
+
+    index = api_client.get(detail["trickplay_url"])
+    assert index.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert index.text.count("#xywh=") == 10
+    sprite_url = index.text.splitlines()[3].partition("#")[0]
+    sprite = api_client.get(sprite_url)
+    assert sprite.content == b"sprite"
+    assert sprite.headers["cache-control"] == "public, max-age=31536000, immutable"
+    revalidated = api_client.get(sprite_url, headers={"If-None-Match": sprite.headers["etag"]})
+    assert revalidated.status_code == 304
+    unversioned = api_client.get(f"/api/movies/{movie_id}/trickplay.webp")
+    assert unversioned.headers["cache-control"] == "no-cache"
+    assert unversioned.headers["etag"] == sprite.headers["etag"]
+    assert api_client.get("/api/movies/999/trickplay.webp").status_code == 404
+
+
+def test_regenerated_sprite_gets_new_files_and_old_urls_are_not_cached(
+    api_client, session_factory, tmp_path, monkeypatch
+):
+    with session_factory() as database:
+        movie = make_movie(str(tmp_path / "movie.mp4"), "pending")
+        database.add(movie)
+        database.commit()
+        movie_id = movie.id
+    sprites = iter([b"first", b"second"])
+    monkeypatch.setattr(
+        media_processing,
+        "_run_command",
+        lambda command, timeout: Path(command[-1]).write_bytes(next(sprites)),
+    )
+    monkeypatch.setattr(
+        media_processing,
+        "probe_video",
+        lambda _path: {"duration_ms": 95_000, "width": 1920, "height": 1080},
+    )
+    monkeypatch.setattr(media_processing, "probe_keyframes", lambda _path: None)
+    monkeypatch.setattr(
+        media_processing, "create_thumbnail", lambda *_args: f"thumbnails/{movie_id}.webp"
+    )
+    monkeypatch.setattr(media_processing, "store_probe", lambda *_args: None)
+    monkeypatch.setattr(trickplay, "_interval_ms", 10_000)
+    versions = iter([1_000, 2_000])
+    monkeypatch.setattr(media_processing, "new_trickplay_version", lambda: next(versions))
+
+    media_processing.process_movie_metadata(movie_id)
+    old_index = api_client.get(f"/api/movies/{movie_id}/trickplay.vtt?v=1000").text
+    with session_factory() as database:
+        database.get(type(movie), movie_id).metadata_status = "pending"
+        database.commit()
+    media_processing.process_movie_metadata(movie_id)
+
+    assert sorted(path.name for path in trickplay.TRICKPLAY_DIR.iterdir()) == [
+        f"{movie_id}-2000.vtt", f"{movie_id}-2000.webp",
+    ]
+    stale = api_client.get(old_index.splitlines()[3].partition("#")[0])
+    assert stale.content == b"second"
+    assert stale.headers["cache-control"] == "no-cache"
+    current = api_client.get(f"/api/movies/{movie_id}/trickplay.webp?v=2000")
+    assert current.headers["cache-control"] == "public, max-age=31536000, immutable"
@@ -0,0 +1,219 @@
+import threading
+
+from app.db import MovieFile
+from app.services import job_queue
+from app.services.media_processing import fail_movie_metadata, reset_interrupted_jobs
+from app.services.worker_pool import (
+    BACKGROUND_PRIORITY,
+    DROPPED_JOB_ERROR,
+    INTERACTIVE_PRIORITY,
+    JobWorkerPool,
+)
+from tests.test_models import make_movie
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Recorder:
+    """Processor that parks on item 0 until released and records the rest."""
+
+    def __init__(self):
+        self.order = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, item_id):
+        if item_id == 0:
+            self.started.set()
+            self.release.wait(5)
+            return
+        self.order.append(item_id)
+
+
+def _blocked_pool(clock, processor, aging_seconds=60.0, workers=1):
+    pool = JobWorkerPool(
+        "scene",
+        processor,
+        workers,
+        aging_seconds,
+        owner="test-owner",
+        lease_seconds=60,
+        poll_seconds=0.05,
+        clock=clock,
+    )
+    pool.submit([0], BACKGROUND_PRIORITY)
+    assert processor.started.wait(2)
+    return pool
+
+
+def _drain(pool, processor, expected):
+    processor.release.set()
+    for _ in range(200):
+        if len(processor.order) >= expected:
+            break
+        threading.Event().wait(0.01)
+    pool.shutdown(wait=True)
+
+
+def test_interactive_items_run_before_background_backlog(session_factory):
+    clock = Clock()
+    processor = Recorder()
+    pool = _blocked_pool(clock, processor)
+    pool.submit([1, 2, 3], BACKGROUND_PRIORITY)
+    clock.now += 1
+    pool.submit([9], INTERACTIVE_PRIORITY)
+
+    positions = pool.positions([1, 9, 0])
+    assert positions[0]["state"] == "running"
+    assert positions[9]["position"] == 1
+    assert positions[1]["position"] == 2
+    _drain(pool, processor, 4)
+    assert processor.order == [9, 1, 2, 3]
+
+
+def test_aged_background_items_overtake_newer_interactive_items(session_factory):
+    clock = Clock()
+    processor = Recorder()
+    pool = _blocked_pool(clock, processor, aging_seconds=60)
+    pool.submit([1], BACKGROUND_PRIORITY)
+    clock.now += 61
+    pool.submit([2], INTERACTIVE_PRIORITY)
+    _drain(pool, processor, 2)
+    assert processor.order == [1, 2]
+
+
+def test_resubmitting_moves_a_queued_item_ahead_once(session_factory):
+    clock = Clock()
+    processor = Recorder()
+    pool = _blocked_pool(clock, processor)
+    pool.submit([1, 2], BACKGROUND_PRIORITY)
+    pool.submit([2], INTERACTIVE_PRIORITY)
+    pool.submit([2], INTERACTIVE_PRIORITY)
+    pool.submit([1], BACKGROUND_PRIORITY)
+    assert pool.stats()["queued"] == 2
+    assert pool.positions([2])[2]["position"] == 1
+    _drain(pool, processor, 2)
+    assert processor.order == [2, 1]
+    assert pool.stats()["queued"] == 0
+
+
+def test_estimated_wait_uses_average_duration_and_worker_count(session_factory):
+    clock = Clock()
+    finished = threading.Event()
+
+    def timed(_item_id):
+        clock.now += 10
+        finished.set()
+
+    pool = JobWorkerPool(
+        "scene", timed, 2, 60,
+        owner="test-owner", lease_seconds=60, poll_seconds=0.05, clock=clock,
+    )
+    pool.submit([1], BACKGROUND_PRIORITY)
+    assert finished.wait(2)
+    pool.shutdown(wait=True)
+    assert pool.stats()["average_seconds"] == 10
+
+    gate = threading.Event()
+    started = threading.Barrier(3)
+
+    def hold(item_id):
+        if item_id in (1, 2):
+            started.wait(2)
+            gate.wait(5)
+
+    waiting = JobWorkerPool(
+        "metadata", hold, 2, 60,
+        owner="test-owner", lease_seconds=60, poll_seconds=0.05, clock=clock,
+    )
+    waiting._average_seconds = 10.0
+    waiting.submit([1, 2], BACKGROUND_PRIORITY)
+    started.wait(2)
+    waiting.submit([3, 4, 5], BACKGROUND_PRIORITY)
+    positions = waiting.positions([3, 4, 5])
+    assert [positions[item]["estimated_wait_seconds"] for item in (3, 4, 5)] == [
+        10.0, 10.0, 20.0,
+    ]
+    gate.set()
+    waiting.shutdown(wait=True)
+
+
+def test_queued_jobs_survive_shutdown_for_the_next_pool(session_factory):
+    clock = Clock()
+    processor = Recorder()
+    pool = _blocked_pool(clock, processor)
+    pool.submit([1, 2], BACKGROUND_PRIORITY)
+    pool.shutdown(wait=False)
+    processor.release.set()
+    pool.shutdown(wait=True)
+    assert processor.order == []
+
+    restarted = JobWorkerPool(
+        "scene", processor, 1, 60,
+        owner="next-owner", lease_seconds=60, poll_seconds=0.05, clock=clock,
+    )
+    _drain(restarted, processor, 2)
+    assert processor.order == [1, 2]
+    assert job_queue.job_counts("scene", now=clock.now) == {"queued": 0, "running": 0}
+
+
+def _wait_for_empty_queue(job_type, clock):
+    for _ in range(200):
+        if job_queue.job_counts(job_type, now=clock.now) == {"queued": 0, "running": 0}:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("queue did not drain")
+
+
+def test_dropped_job_fails_its_item_instead_of_coming_back(session_factory, tmp_path):
+    clock = Clock()
+    with session_factory() as database:
+        movie = make_movie(str(tmp_path / "crash.mp4"), status="processing")
+        database.add(movie)
+        database.commit()
+        movie_id = movie.id
+    job_queue.enqueue_jobs("metadata", [movie_id], BACKGROUND_PRIORITY, 60, now=clock.now)
+    # Three workers died holding the lease.
+    for _ in range(job_queue.MAX_JOB_ATTEMPTS):
+        assert job_queue.claim_jobs("metadata", "crashed", 1, 30, now=clock.now)
+        clock.now += 31
+
+    def crash(_item_id):
+        raise AssertionError("a dropped job must not run again")
+
+    pool = JobWorkerPool(
+        "metadata", crash, 1, 60,
+        owner="test-owner", lease_seconds=60, poll_seconds=0.05, clock=clock,
+        on_failure=fail_movie_metadata,
+    )
+    _wait_for_empty_queue("metadata", clock)
+    pool.shutdown(wait=True)
+
+    with session_factory() as database:
+        movie = database.get(MovieFile, movie_id)
+        assert (movie.metadata_status, movie.metadata_error) == ("failed", DROPPED_JOB_ERROR)
+    assert reset_interrupted_jobs() == []
+
+
+def test_processor_errors_are_stored_on_the_item(session_factory):
+    clock = Clock()
+    failures = []
+
+    def broken(_item_id):
+        raise RuntimeError("디코딩 실패")
+
+    pool = JobWorkerPool(
+        "scene", broken, 1, 60,
+        owner="test-owner", lease_seconds=60, poll_seconds=0.05, clock=clock,
+        on_failure=lambda item_id, error: failures.append((item_id, error)),
+    )
+    pool.submit([5], BACKGROUND_PRIORITY)
+    _wait_for_empty_queue("scene", clock)
+    pool.shutdown(wait=True)
+    assert failures == [(5, "디코딩 실패")]
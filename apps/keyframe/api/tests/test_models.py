@@ -2,10 +2,11 @@ from datetime import datetime
 from pathlib import Path
 
 import pytest
-from sqlalchemy import func, select
+from sqlalchemy import func, select, text
 from sqlalchemy.exc import IntegrityError
 
-from app.db import Image, MovieFile, Scene
+from app.db import COUNTER_TRIGGERS, Base, Image, MovieFile, Scene
+from app.services.counters import counter_values, movie_scene_count
 from app.services.movie_import import normalize_path
 
 
@@ -61,3 +62,59 @@ def test_image_persists_requested_columns(session_factory):
         assert image.file_path == "scenes/1/1.webp"
         assert image.prompt == "blue sky"
         assert image.embedding == embedding
+
+
+def test_counters_follow_inserts_status_changes_and_cascades(session_factory, tmp_path):
+    with session_factory() as database:
+        first = make_movie(str(tmp_path / "first.mp4"), status="pending")
+        second = make_movie(str(tmp_path / "second.mp4"), status="ready")
+        database.add_all([first, second])
+        database.flush()
+        database.add_all(
+            [Scene(movie_file_id=first.id, timestamp_ms=ms, play_count=0) for ms in (0, 500)]
+            + [Scene(movie_file_id=second.id, timestamp_ms=0, play_count=0)]
+        )
+        database.add(Image(file_path="images/1.png", prompt=None, embedding=None))
+        database.commit()
+        first.metadata_status = "processing"
+        database.commit()
+        assert counter_values(
+            database, "movies", "scenes", "images", "movies:pending", "movies:processing", "movies:ready"
+        ) == {
+            "movies": 2, "scenes": 3, "images": 1,
+            "movies:pending": 0, "movies:processing": 1, "movies:ready": 1,
+        }
+        assert movie_scene_count(database, first.id) == 2
+
+        database.delete(first)
+        database.commit()
+        assert counter_values(database, "movies", "scenes", "movies:processing") == {
+            "movies": 1, "scenes": 1, "movies:processing": 0,
+        }
+        assert movie_scene_count(database, second.id) == 1
+        assert movie_scene_count(database, first.id) == 0
+
+
+def test_counter_install_seeds_existing_rows_once(session_factory, tmp_path):
+    with session_factory() as database:
+        movie = make_movie(str(tmp_path / "movie.mp4"), status="failed")
+        database.add(movie)
+        database.flush()
+        database.add(Scene(movie_file_id=movie.id, timestamp_ms=0, play_count=0))
+        database.commit()
+        movie_id = movie.id
+        # A database created before the counters existed has no triggers.
+        for name in COUNTER_TRIGGERS:
+            database.execute(text(f"DROP TRIGGER {name}"))
+        database.execute(text("DELETE FROM library_counters"))
+        database.execute(text("DELETE FROM movie_scene_counts"))
+        database.commit()
+
+    engine = session_factory.kw["bind"]
+    Base.metadata.create_all(engine)
+    Base.metadata.create_all(engine)
+    with session_factory() as database:
+        assert counter_values(database, "movies", "scenes", "movies:failed") == {
+            "movies": 1, "scenes": 1, "movies:failed": 1,
+        }
+        assert movie_scene_count(database, movie_id) == 1
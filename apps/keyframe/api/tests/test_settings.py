@@ -21,6 +21,15 @@ def test_gpstation_settings_load_and_validate_timeout(monkeypatch):
     assert str(settings.gpstation_api_base_url) == "http://127.0.0.1:8000/"
     assert settings.gpstation_client_token.get_secret_value() == "client-token"
     assert settings.gpstation_job_timeout_seconds == 600
+    assert settings.gpstation_answer_mode == "poll"
+    assert settings.gpstation_sdxl_models_ttl_seconds == 300
+    assert settings.gpstation_job_slots == 1
+    assert settings.media_metadata_workers is None
+    assert settings.media_job_lease_seconds == 60
+    assert settings.media_backend == "auto"
+    assert settings.frame_cache_max_mb == 1024
+    assert settings.playback_workers == 1
+    assert settings.library_sync_interval_seconds == 900
 
 
 @pytest.mark.parametrize("value", ["", "0", "-1"])
@@ -36,3 +45,13 @@ def test_gpstation_timeout_or_token_cannot_be_empty_or_nonpositive(value):
         arguments["gpstation_job_timeout_seconds"] = 600
     with pytest.raises(ValidationError):
         KeyframeSettings(**arguments)
+
+
+def test_gpstation_answer_mode_accepts_only_known_modes(monkeypatch):
+    monkeypatch.setenv("GPSTATION_API_BASE_URL", "http://127.0.0.1:8000")
+    monkeypatch.setenv("GPSTATION_CLIENT_TOKEN", "token")
+    monkeypatch.setenv("GPSTATION_ANSWER_MODE", "stream")
+    assert KeyframeSettings(_env_file=None).gpstation_answer_mode == "stream"
+    monkeypatch.setenv("GPSTATION_ANSWER_MODE", "push")
+    with pytest.raises(ValidationError):
+        KeyframeSettings(_env_file=None)
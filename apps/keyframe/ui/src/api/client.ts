@@ -1,3 +1,14 @@
+async function responseError(response: Response): Promise<Error> {
+  let message = `요청에 실패했습니다. (${response.status})`
+  try {
+    const body = (await response.json()) as { detail?: string }
+    message = body.detail || message
+  } catch {
+    // JSON 오류 본문이 아니면 기본 메시지를 사용한다.
+  }
+  return new Error(message)
+}
+
 export async function request<T>(path: string, options: RequestInit = {}): Promise<T> {
   const response = await fetch(path, {
     ...options,
@@ -6,16 +17,25 @@ export async function request<T>(path: string, options: RequestInit = {}): Promi
       : options.headers,
   })
 
-  if (!response.ok) {
-    let message = `요청에 실패했습니다. (${response.status})`
-    try {
-      const body = (await response.json()) as { detail?: string }
-      message = body.detail || message
-    } catch {
-      // JSON 오류 본문이 아니면 기본 메시지를 사용한다.
-    }
-    throw new Error(message)
-  }
+  if (!response.ok) throw await responseError(response)
 
   return response.json() as Promise<T>
 }
+
+export async function* requestJsonLines<T>(path: string, options: RequestInit = {}): AsyncGenerator<T> {
+  const response = await fetch(path, options)
+  if (!response.ok) throw await responseError(response)
+  if (!response.body) return
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+  let buffer = ''
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += value
+    const lines = buffer.split('\n')
+    buffer = lines.pop() ?? ''
+    for (const line of lines) if (line.trim()) yield JSON.parse(line) as T
+  }
+  if (buffer.trim()) yield JSON.parse(buffer) as T
+}
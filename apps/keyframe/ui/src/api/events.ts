@@ -0,0 +1,34 @@
+import type { MovieDetail } from './movies'
+import type { Scene } from './scenes'
+
+export type MovieChange = Omit<MovieDetail, 'video_codec' | 'audio_codec' | 'scene_count' | 'keyframe_count'>
+
+export interface StatusEventHandlers {
+  onMovies?: (items: MovieChange[], processingCount: number) => void
+  onScenes?: (items: Scene[]) => void
+  /** 처음 연결했을 때와 놓친 변경을 알 수 없을 때 호출된다. 현재 상태를 다시 불러와야 한다.
+   *  `Last-Event-ID`로 이어받은 재연결(`resumed`)은 놓친 변경만 받으므로 호출하지 않는다. */
+  onResync?: () => void
+}
+
+function data<T>(event: Event): T {
+  return JSON.parse((event as MessageEvent<string>).data) as T
+}
+
+export function statusEventsSupported(): boolean {
+  return typeof EventSource !== 'undefined'
+}
+
+/** `/api/events` 구독. EventSource가 없으면 null을 반환하므로 호출하는 쪽은 polling을 유지한다. */
+export function subscribeStatusEvents(handlers: StatusEventHandlers): (() => void) | null {
+  if (!statusEventsSupported()) return null
+  const source = new EventSource('/api/events')
+  source.addEventListener('movies', (event) => {
+    const payload = data<{ items: MovieChange[]; processing_count: number }>(event)
+    handlers.onMovies?.(payload.items, payload.processing_count)
+  })
+  source.addEventListener('scenes', (event) => handlers.onScenes?.(data<{ items: Scene[] }>(event).items))
+  source.addEventListener('ready', () => handlers.onResync?.())
+  source.addEventListener('reset', () => handlers.onResync?.())
+  return () => source.close()
+}
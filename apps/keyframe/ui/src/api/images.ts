@@ -42,6 +42,21 @@ export interface ImageGenerationRequest {
   format: 'png' | 'jpg'
 }
 
+export interface ImageGenerationJob {
+  id: number
+  movie_id: number
+  timestamp_ms: number
+  status: 'pending' | 'processing' | 'ready' | 'failed'
+  stage: 'snapshot' | 'tagging' | 'rendering' | 'embedding' | null
+  total_images: number
+  completed_images: number
+  prompt: string | null
+  error: string | null
+  images: GeneratedImage[]
+  created_at: string | null
+  updated_at: string | null
+}
+
 export function getImages(beforeId: number | null = null): Promise<ImagePage> {
   const query = new URLSearchParams({ limit: '24' })
   if (beforeId) query.set('before_id', String(beforeId))
@@ -55,9 +70,13 @@ export function getSdxlModels(): Promise<SdxlModelCatalog> {
 export function generateMovieImages(
   movieId: number,
   payload: ImageGenerationRequest,
-): Promise<{ items: GeneratedImage[] }> {
+): Promise<ImageGenerationJob> {
   return request(`/api/movies/${movieId}/images`, {
     method: 'POST',
     body: JSON.stringify(payload),
   })
 }
+
+export function getImageGenerationJob(jobId: number): Promise<ImageGenerationJob> {
+  return request(`/api/images/jobs/${jobId}`)
+}
@@ -1,8 +1,14 @@
-import { request } from './client'
+import { request, requestJsonLines } from './client'
 
 export type MetadataStatus = 'pending' | 'processing' | 'ready' | 'failed'
 export type PlaybackStatus = 'unprepared' | 'direct' | 'pending' | 'processing' | 'ready' | 'failed'
 
+export interface QueueStatus {
+  state: 'queued' | 'running'
+  position: number
+  estimated_wait_seconds: number | null
+}
+
 export interface Movie {
   id: number
   title: string
@@ -19,8 +25,19 @@ export interface Movie {
   thumbnail_url: string | null
   created_at: string
   updated_at: string
+  queue?: QueueStatus | null
+}
+
+export type MovieSort = 'id' | 'title' | 'duration' | 'resolution' | 'size' | 'codec'
+
+export interface MovieListOptions {
+  sort: MovieSort
+  order: 'asc' | 'desc'
+  status: MetadataStatus | null
 }
 
+export const DEFAULT_MOVIE_LIST: MovieListOptions = { sort: 'id', order: 'desc', status: null }
+
 export interface MoviePage {
   items: Movie[]
   total: number
@@ -35,7 +52,9 @@ export interface MovieDetail extends Movie {
   playback_status: PlaybackStatus
   playback_error: string | null
   stream_url: string | null
+  playback_progress: number | null
   scene_count: number
+  keyframe_count: number | null
 }
 
 export interface MovieStatuses {
@@ -48,13 +67,26 @@ export interface ImportResult {
   selected_count: number
   added_count: number
   duplicate_count: number
+  updated_count: number
   failed_count: number
   added_ids: number[]
+  updated_ids: number[]
   failures: string[]
 }
 
-export function getMovies(beforeId: number | null = null): Promise<MoviePage> {
-  const query = new URLSearchParams({ limit: '24' })
+export interface ImportProgress {
+  directories: number
+  videos: number
+}
+
+type FolderImportEvent =
+  | ({ type: 'progress' } & ImportProgress)
+  | ({ type: 'result' } & ImportResult)
+  | { type: 'error'; detail: string }
+
+export function getMovies(beforeId: number | null = null, options: MovieListOptions = DEFAULT_MOVIE_LIST): Promise<MoviePage> {
+  const query = new URLSearchParams({ limit: '24', sort: options.sort, order: options.order })
+  if (options.status) query.set('status', options.status)
   if (beforeId) query.set('before_id', String(beforeId))
   return request(`/api/movies?${query}`)
 }
@@ -63,8 +95,13 @@ export function importMovieFiles(): Promise<ImportResult> {
   return request('/api/movies/import/files', { method: 'POST' })
 }
 
-export function importMovieFolder(): Promise<ImportResult> {
-  return request('/api/movies/import/folder', { method: 'POST' })
+export async function importMovieFolder(onProgress?: (progress: ImportProgress) => void): Promise<ImportResult> {
+  for await (const event of requestJsonLines<FolderImportEvent>('/api/movies/import/folder/stream', { method: 'POST' })) {
+    if (event.type === 'progress') onProgress?.({ directories: event.directories, videos: event.videos })
+    else if (event.type === 'error') throw new Error(event.detail)
+    else return event
+  }
+  throw new Error('폴더 가져오기 결과를 받지 못했습니다.')
 }
 
 export function getMovieStatuses(ids: number[]): Promise<MovieStatuses> {
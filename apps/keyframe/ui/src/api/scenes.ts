@@ -1,4 +1,5 @@
 import { request } from './client'
+import type { QueueStatus } from './movies'
 
 export type SceneAnalysisStatus = 'pending' | 'processing' | 'ready' | 'failed'
 
@@ -15,6 +16,7 @@ export interface Scene {
   snapshot_url: string | null
   created_at: string
   updated_at: string
+  queue?: QueueStatus | null
 }
 
 export interface ExplorerScene extends Scene {
@@ -51,10 +53,10 @@ export function getMovieScenes(movieId: number): Promise<{ items: Scene[] }> {
   return request(`/api/movies/${movieId}/scenes`)
 }
 
-export function createMovieScene(movieId: number, timestampMs: number): Promise<Scene> {
+export function createMovieScene(movieId: number, timestampMs: number, snapToKeyframe = false): Promise<Scene> {
   return request(`/api/movies/${movieId}/scenes`, {
     method: 'POST',
-    body: JSON.stringify({ timestamp_ms: timestampMs }),
+    body: JSON.stringify({ timestamp_ms: timestampMs, snap_to_keyframe: snapToKeyframe }),
   })
 }
 
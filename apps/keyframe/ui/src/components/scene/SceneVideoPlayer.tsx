@@ -11,6 +11,7 @@ interface SceneVideoPlayerProps {
   streamUrl: string | null
   durationMs: number | null
   playbackError: string | null
+  playbackProgress?: number | null
   creating: boolean
   onCreateScene: (timestampMs: number) => void
   actionLabel?: string
@@ -19,6 +20,8 @@ interface SceneVideoPlayerProps {
   shortcutKey?: string | null
   startAtMs?: number
   autoPlayStart?: boolean
+  snapToKeyframe?: boolean
+  onSnapToKeyframeChange?: (snapToKeyframe: boolean) => void
 }
 
 function editableTarget(target: EventTarget | null): boolean {
@@ -28,9 +31,10 @@ function editableTarget(target: EventTarget | null): boolean {
 export const SceneVideoPlayer = forwardRef<SceneVideoPlayerHandle, SceneVideoPlayerProps>(
   function SceneVideoPlayer(
     {
-      streamUrl, durationMs, playbackError, creating, onCreateScene,
+      streamUrl, durationMs, playbackError, playbackProgress = null, creating, onCreateScene,
       actionLabel = '현재 위치에 Scene 생성', creatingLabel = 'Scene 등록 중',
       actionDisabled = false, shortcutKey = 's', startAtMs, autoPlayStart = false,
+      snapToKeyframe = false, onSnapToKeyframeChange,
     },
     ref,
   ) {
@@ -124,6 +128,12 @@ export const SceneVideoPlayer = forwardRef<SceneVideoPlayerHandle, SceneVideoPla
               }}
               onTimeUpdate={(event) => setCurrentTimeMs(Math.round(event.currentTarget.currentTime * 1000))}
             >이 브라우저는 영상 재생을 지원하지 않습니다.</video>
+          ) : playbackProgress !== null ? (
+            <div className="scene-video-player__state" role="status">
+              <FiLoader />
+              <strong>재생용 영상을 준비하는 중입니다</strong>
+              <span>{Math.floor(playbackProgress * 100)}% · 브라우저가 재생할 수 없는 codec이나 형식을 MP4로 변환하고 있습니다.</span>
+            </div>
           ) : (
             <div className="scene-video-player__state scene-video-player__state--error" role="alert">
               <FiAlertCircle />
@@ -134,6 +144,16 @@ export const SceneVideoPlayer = forwardRef<SceneVideoPlayerHandle, SceneVideoPla
         </div>
         <div className="scene-video-player__toolbar">
           <div><span>현재 위치</span><strong>{formatSceneTimestamp(currentTimeMs)}</strong></div>
+          {onSnapToKeyframeChange ? (
+            <label className="scene-video-player__snap">
+              <input
+                type="checkbox"
+                checked={snapToKeyframe}
+                onChange={(event) => onSnapToKeyframeChange(event.currentTarget.checked)}
+              />
+              가까운 키프레임에 맞춤
+            </label>
+          ) : null}
           <button type="button" className="primary-button" disabled={!streamUrl || creating || actionDisabled} onClick={createAtCurrentTime}>
             {creating ? <FiLoader className="button-spinner" aria-hidden="true" /> : <FiCamera aria-hidden="true" />}
             {creating ? creatingLabel : actionLabel}
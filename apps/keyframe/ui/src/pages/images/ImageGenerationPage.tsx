@@ -5,8 +5,8 @@ import {
 } from 'react-icons/fi'
 import { Link, useParams } from 'react-router-dom'
 import {
-  generateMovieImages, getImages, getSdxlModels,
-  type GeneratedImage, type ImageGenerationRequest, type SdxlModelDefaults,
+  generateMovieImages, getImageGenerationJob, getImages, getSdxlModels,
+  type GeneratedImage, type ImageGenerationJob, type ImageGenerationRequest, type SdxlModelDefaults,
 } from '../../api/images'
 import { getMovieDetail, prepareMoviePlayback, type MovieDetail } from '../../api/movies'
 import { SceneVideoPlayer } from '../../components/scene/SceneVideoPlayer'
@@ -15,6 +15,18 @@ import { useMovieLibrary } from '../movies/useMovieLibrary'
 import './ImageGenerationPage.css'
 
 const MAX_SEED = 2_147_483_647
+const JOB_POLL_INTERVAL_MS = 1500
+
+const STAGE_LABELS: Record<NonNullable<ImageGenerationJob['stage']>, string> = {
+  snapshot: '프레임 추출 중',
+  tagging: 'Prompt 분석 중',
+  rendering: 'SDXL 렌더링 중',
+  embedding: 'CLIP 분석 중',
+}
+
+function wait(milliseconds: number) {
+  return new Promise((resolve) => window.setTimeout(resolve, milliseconds))
+}
 
 interface FormSettings {
   model: string
@@ -113,8 +125,10 @@ function ImageGenerationWorkspace({ movieId }: { movieId: number }) {
   const [imagesError, setImagesError] = useState('')
   const [generating, setGenerating] = useState(false)
   const [generationError, setGenerationError] = useState('')
+  const [generationJob, setGenerationJob] = useState<ImageGenerationJob | null>(null)
   const sentinelRef = useRef<HTMLDivElement>(null)
   const loadingMoreRef = useRef(false)
+  const mergedJobImageIdsRef = useRef(new Set<number>())
 
   const loadMovie = useCallback(async () => {
     setMovieLoading(true)
@@ -229,27 +243,53 @@ function ImageGenerationWorkspace({ movieId }: { movieId: number }) {
     }
   }, [settings])
 
+  function mergeJobImages(job: ImageGenerationJob) {
+    const added = job.images.filter((image) => !mergedJobImageIdsRef.current.has(image.id))
+    if (added.length === 0) return
+    added.forEach((image) => mergedJobImageIdsRef.current.add(image.id))
+    setImages((current) => {
+      const addedIds = new Set(added.map((image) => image.id))
+      return [...added, ...current.filter((image) => !addedIds.has(image.id))]
+    })
+    setTotal((current) => current + added.length)
+  }
+
   async function createAt(timestampMs: number) {
     if (generating || !formResult.payload) return
     setGenerating(true)
     setGenerationError('')
+    mergedJobImageIdsRef.current = new Set()
     try {
-      const response = await generateMovieImages(movieId, {
+      let job = await generateMovieImages(movieId, {
         timestamp_ms: timestampMs,
         ...formResult.payload,
       })
-      setImages((current) => {
-        const newIds = new Set(response.items.map((image) => image.id))
-        return [...response.items, ...current.filter((image) => !newIds.has(image.id))]
-      })
-      setTotal((current) => current + response.items.length)
+      setGenerationJob(job)
+      mergeJobImages(job)
+      while (job.status === 'pending' || job.status === 'processing') {
+        await wait(JOB_POLL_INTERVAL_MS)
+        try {
+          job = await getImageGenerationJob(job.id)
+        } catch {
+          // 일시적인 polling 오류는 다음 주기에 다시 시도한다.
+          continue
+        }
+        setGenerationJob(job)
+        mergeJobImages(job)
+      }
+      if (job.status === 'failed') setGenerationError(`이미지 생성에 실패했습니다: ${job.error || '알 수 없는 오류'}`)
     } catch (error) {
       setGenerationError(error instanceof Error ? error.message : '이미지를 생성하지 못했습니다.')
     } finally {
       setGenerating(false)
+      setGenerationJob(null)
     }
   }
 
+  const generationProgress = generationJob
+    ? `${generationJob.stage ? STAGE_LABELS[generationJob.stage] : '대기 중'} · ${generationJob.completed_images}/${generationJob.total_images}`
+    : ''
+
   if (movieLoading) return <div className="detail-loading" role="status"><FiLoader /><span>이미지 생성 workspace를 준비하는 중입니다.</span></div>
   if (movieError || !movie) {
     return (
@@ -287,7 +327,7 @@ function ImageGenerationWorkspace({ movieId }: { movieId: number }) {
           creating={generating}
           onCreateScene={(timestampMs) => void createAt(timestampMs)}
           actionLabel="이미지 생성"
-          creatingLabel="이미지 생성 중"
+          creatingLabel={generationProgress ? `이미지 생성 중 (${generationProgress})` : '이미지 생성 중'}
           actionDisabled={modelsLoading || Boolean(modelsError) || Boolean(formResult.error)}
           shortcutKey={null}
         />
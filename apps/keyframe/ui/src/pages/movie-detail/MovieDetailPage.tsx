@@ -1,4 +1,4 @@
-import { useRef } from 'react'
+import { useRef, useState } from 'react'
 import { FiAlertCircle, FiArrowLeft, FiCamera, FiClock, FiFilm, FiLoader, FiRefreshCw, FiX } from 'react-icons/fi'
 import { Link, useParams } from 'react-router-dom'
 import type { Scene } from '../../api/scenes'
@@ -13,6 +13,7 @@ export function MovieDetailPage() {
   const movieId = Number(params.movieId)
   const detail = useMovieDetail(Number.isInteger(movieId) && movieId > 0 ? movieId : -1)
   const playerRef = useRef<SceneVideoPlayerHandle>(null)
+  const [snapToKeyframe, setSnapToKeyframe] = useState(false)
 
   function playScene(scene: Scene) {
     playerRef.current?.playAt(scene.timestamp_ms, true)
@@ -64,8 +65,11 @@ export function MovieDetailPage() {
           streamUrl={movie.stream_url}
           durationMs={movie.duration_ms}
           playbackError={movie.playback_error}
+          playbackProgress={movie.playback_progress}
           creating={detail.creating}
-          onCreateScene={(timestampMs) => void detail.create(timestampMs)}
+          onCreateScene={(timestampMs) => void detail.create(timestampMs, snapToKeyframe && Boolean(movie.keyframe_count))}
+          snapToKeyframe={snapToKeyframe}
+          onSnapToKeyframeChange={movie.keyframe_count ? setSnapToKeyframe : undefined}
         />
 
         <aside className="scene-panel" aria-label="Scene 목록">
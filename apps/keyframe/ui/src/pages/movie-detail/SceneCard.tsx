@@ -1,6 +1,6 @@
 import { FiAlertCircle, FiImage, FiLoader, FiPlay, FiRefreshCw, FiTrash2 } from 'react-icons/fi'
 import type { Scene } from '../../api/scenes'
-import { formatSceneTimestamp } from './formatters'
+import { formatQueueStatus, formatSceneTimestamp } from './formatters'
 
 const statusText = {
   pending: '분석 대기 중',
@@ -20,6 +20,7 @@ interface SceneCardProps {
 
 export function SceneCard({ scene, retrying, deleting, onPlay, onRetry, onDelete }: SceneCardProps) {
   const working = scene.analysis_status === 'pending' || scene.analysis_status === 'processing'
+  const queueText = scene.analysis_status === 'pending' ? formatQueueStatus(scene.queue) : ''
   return (
     <article className={`scene-card scene-card--${scene.analysis_status}`}>
       <button type="button" className="scene-card__play" onClick={() => onPlay(scene)}>
@@ -36,7 +37,7 @@ export function SceneCard({ scene, retrying, deleting, onPlay, onRetry, onDelete
           <span className="scene-card__time"><FiPlay aria-hidden="true" />{formatSceneTimestamp(scene.timestamp_ms)}</span>
         </span>
         <span className="scene-card__content">
-          <span className={`scene-card__status scene-card__status--${scene.analysis_status}`}>{statusText[scene.analysis_status]}</span>
+          <span className={`scene-card__status scene-card__status--${scene.analysis_status}`}>{statusText[scene.analysis_status]}{queueText ? ` (${queueText})` : ''}</span>
           <strong>{scene.prompt || (working ? 'Snapshot과 태그를 생성하고 있습니다.' : '추출된 prompt가 없습니다.')}</strong>
         </span>
       </button>
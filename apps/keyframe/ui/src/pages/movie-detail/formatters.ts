@@ -1,3 +1,13 @@
+import type { QueueStatus } from '../../api/movies'
+
+export function formatQueueStatus(queue: QueueStatus | null | undefined): string {
+  if (!queue || queue.state !== 'queued') return ''
+  const wait = queue.estimated_wait_seconds
+  if (wait === null || wait < 1) return `${queue.position}번째`
+  const label = wait < 60 ? `${Math.round(wait)}초` : `${Math.round(wait / 60)}분`
+  return `${queue.position}번째 · 약 ${label}`
+}
+
 export function formatSceneTimestamp(value: number): string {
   const milliseconds = Math.max(0, Math.round(value))
   const hours = Math.floor(milliseconds / 3_600_000)
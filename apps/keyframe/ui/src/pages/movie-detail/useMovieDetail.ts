@@ -1,5 +1,6 @@
 import { useCallback, useEffect, useMemo, useState } from 'react'
 import { getMovieDetail, prepareMoviePlayback, type MovieDetail } from '../../api/movies'
+import { statusEventsSupported, subscribeStatusEvents } from '../../api/events'
 import { createMovieScene, deleteScene, getMovieScenes, retryScene, type Scene } from '../../api/scenes'
 
 function message(error: unknown): string {
@@ -43,12 +44,52 @@ export function useMovieDetail(movieId: number) {
 
   useEffect(() => { void load() }, [load])
 
+  useEffect(() => subscribeStatusEvents({
+    onMovies: (items) => {
+      const change = items.find((item) => item.id === movieId)
+      if (change) setMovie((current) => current ? { ...current, ...change } : current)
+    },
+    onScenes: (items) => {
+      const changes = items.filter((scene) => scene.movie_file_id === movieId)
+      if (!changes.length) return
+      setScenes((current) => {
+        const updates = new Map(changes.map((scene) => [scene.id, scene]))
+        return current.map((scene) => updates.get(scene.id) || scene)
+      })
+    },
+    onResync: () => {
+      Promise.all([getMovieDetail(movieId), getMovieScenes(movieId)]).then(([detail, scenePage]) => {
+        setMovie(detail)
+        setScenes(scenePage.items)
+      }, () => undefined)
+    },
+  }) || undefined, [movieId])
+
+  const preparingPlayback = movie?.playback_status === 'pending' || movie?.playback_status === 'processing'
+  useEffect(() => {
+    if (!preparingPlayback || statusEventsSupported()) return
+    let cancelled = false
+    let timer = 0
+    async function poll() {
+      try {
+        const detail = await getMovieDetail(movieId)
+        if (!cancelled) setMovie(detail)
+      } catch {
+        // 일시적인 polling 오류는 다음 주기에 다시 시도한다.
+      } finally {
+        if (!cancelled) timer = window.setTimeout(poll, 2000)
+      }
+    }
+    timer = window.setTimeout(poll, 2000)
+    return () => { cancelled = true; window.clearTimeout(timer) }
+  }, [movieId, preparingPlayback])
+
   const activeSceneKey = useMemo(
     () => scenes.filter((scene) => ['pending', 'processing'].includes(scene.analysis_status)).map((scene) => scene.id).join(','),
     [scenes],
   )
   useEffect(() => {
-    if (!activeSceneKey) return
+    if (!activeSceneKey || statusEventsSupported()) return
     let cancelled = false
     let timer = 0
     async function poll() {
@@ -65,12 +106,12 @@ export function useMovieDetail(movieId: number) {
     return () => { cancelled = true; window.clearTimeout(timer) }
   }, [activeSceneKey, movieId])
 
-  async function create(timestampMs: number) {
+  async function create(timestampMs: number, snapToKeyframe = false) {
     if (creating) return
     setCreating(true)
     setActionError('')
     try {
-      const scene = await createMovieScene(movieId, timestampMs)
+      const scene = await createMovieScene(movieId, timestampMs, snapToKeyframe)
       setScenes((current) => sortScenes([...current, scene]))
       setMovie((current) => current ? { ...current, scene_count: current.scene_count + 1 } : current)
     } catch (createError) {
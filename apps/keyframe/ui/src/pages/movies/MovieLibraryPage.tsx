@@ -1,10 +1,29 @@
 import { useEffect, useRef } from 'react'
+import type { MetadataStatus, MovieListOptions } from '../../api/movies'
 import { FiAlertCircle, FiCheckCircle, FiFilm, FiFolder, FiLoader, FiRefreshCw, FiX } from 'react-icons/fi'
 import { AddMovieMenu } from './AddMovieMenu'
 import { MovieCard } from './MovieCard'
 import { useMovieLibrary } from './useMovieLibrary'
 import './MovieLibraryPage.css'
 
+const SORT_OPTIONS: { label: string; value: Pick<MovieListOptions, 'sort' | 'order'> }[] = [
+  { label: '최근 추가순', value: { sort: 'id', order: 'desc' } },
+  { label: '오래된 순', value: { sort: 'id', order: 'asc' } },
+  { label: '제목순', value: { sort: 'title', order: 'asc' } },
+  { label: '재생 시간 긴 순', value: { sort: 'duration', order: 'desc' } },
+  { label: '해상도 높은 순', value: { sort: 'resolution', order: 'desc' } },
+  { label: '파일 크기 큰 순', value: { sort: 'size', order: 'desc' } },
+  { label: '코덱순', value: { sort: 'codec', order: 'asc' } },
+]
+
+const STATUS_OPTIONS: { label: string; value: MetadataStatus | '' }[] = [
+  { label: '모든 상태', value: '' },
+  { label: '처리 대기', value: 'pending' },
+  { label: '처리 중', value: 'processing' },
+  { label: '준비됨', value: 'ready' },
+  { label: '실패', value: 'failed' },
+]
+
 export function MovieLibraryPage() {
   const library = useMovieLibrary()
   const sentinelRef = useRef<HTMLDivElement>(null)
@@ -33,6 +52,22 @@ export function MovieLibraryPage() {
 
       <section className="library-summary" aria-label="라이브러리 요약">
         <div><span className="library-summary__value">{library.total.toLocaleString('ko-KR')}</span><span>개의 영상</span></div>
+        <div className="library-controls">
+          <select
+            aria-label="정렬"
+            value={SORT_OPTIONS.findIndex(({ value }) => value.sort === library.listOptions.sort && value.order === library.listOptions.order)}
+            onChange={(event) => library.setListOptions({ ...library.listOptions, ...SORT_OPTIONS[Number(event.target.value)].value })}
+          >
+            {SORT_OPTIONS.map((option, index) => <option key={option.label} value={index}>{option.label}</option>)}
+          </select>
+          <select
+            aria-label="상태"
+            value={library.listOptions.status || ''}
+            onChange={(event) => library.setListOptions({ ...library.listOptions, status: (event.target.value || null) as MetadataStatus | null })}
+          >
+            {STATUS_OPTIONS.map((option) => <option key={option.label} value={option.value}>{option.label}</option>)}
+          </select>
+        </div>
         {library.processingCount > 0 ? (
           <div className="processing-chip" role="status"><FiLoader aria-hidden="true" />{library.processingCount.toLocaleString('ko-KR')}개 미리보기 처리 중</div>
         ) : (
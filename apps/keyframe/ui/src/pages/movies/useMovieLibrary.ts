@@ -1,8 +1,9 @@
 import { useCallback, useEffect, useMemo, useRef, useState } from 'react'
 import {
-  getMovies, getMovieStatuses, importMovieFiles, importMovieFolder,
-  type MetadataStatus, type Movie,
+  DEFAULT_MOVIE_LIST, getMovies, getMovieStatuses, importMovieFiles, importMovieFolder,
+  type MetadataStatus, type Movie, type MovieListOptions,
 } from '../../api/movies'
+import { statusEventsSupported, subscribeStatusEvents } from '../../api/events'
 import type { ImportMode } from './AddMovieMenu'
 
 const PROCESSING_STATUSES = new Set<MetadataStatus>(['pending', 'processing'])
@@ -22,6 +23,7 @@ export function useMovieLibrary() {
   const [error, setError] = useState('')
   const [importing, setImporting] = useState<ImportMode | null>(null)
   const [notice, setNotice] = useState<Notice | null>(null)
+  const [listOptions, setListOptions] = useState<MovieListOptions>(DEFAULT_MOVIE_LIST)
   const loadingMoreRef = useRef(false)
   const requestSequence = useRef(0)
 
@@ -30,7 +32,7 @@ export function useMovieLibrary() {
     setLoadingInitial(true)
     setError('')
     try {
-      const response = await getMovies()
+      const response = await getMovies(null, listOptions)
       if (sequence !== requestSequence.current) return
       setMovies(response.items)
       setNextCursor(response.next_cursor)
@@ -41,7 +43,7 @@ export function useMovieLibrary() {
     } finally {
       if (sequence === requestSequence.current) setLoadingInitial(false)
     }
-  }, [])
+  }, [listOptions])
 
   useEffect(() => { void loadFirstPage() }, [loadFirstPage])
 
@@ -49,8 +51,10 @@ export function useMovieLibrary() {
     if (!nextCursor || loadingMoreRef.current) return
     loadingMoreRef.current = true
     setLoadingMore(true)
+    const sequence = requestSequence.current
     try {
-      const response = await getMovies(nextCursor)
+      const response = await getMovies(nextCursor, listOptions)
+      if (sequence !== requestSequence.current) return
       setMovies((current) => {
         const knownIds = new Set(current.map((movie) => movie.id))
         return [...current, ...response.items.filter((movie) => !knownIds.has(movie.id))]
@@ -64,7 +68,7 @@ export function useMovieLibrary() {
       loadingMoreRef.current = false
       setLoadingMore(false)
     }
-  }, [nextCursor])
+  }, [listOptions, nextCursor])
 
   const activeIds = useMemo(
     () => movies.filter((movie) => PROCESSING_STATUSES.has(movie.metadata_status)).map((movie) => movie.id),
@@ -72,8 +76,27 @@ export function useMovieLibrary() {
   )
   const activeIdsKey = activeIds.join(',')
 
+  const loadedIds = useRef<number[]>([])
+  useEffect(() => { loadedIds.current = movies.map((movie) => movie.id) }, [movies])
+
+  useEffect(() => subscribeStatusEvents({
+    onMovies: (items, count) => {
+      const updates = new Map(items.map((movie) => [movie.id, movie]))
+      setMovies((current) => current.map((movie) => updates.get(movie.id) || movie))
+      setProcessingCount(count)
+    },
+    onResync: () => {
+      if (!loadedIds.current.length) return
+      getMovieStatuses(loadedIds.current).then((response) => {
+        const updates = new Map(response.items.map((movie) => [movie.id, movie]))
+        setMovies((current) => current.map((movie) => updates.get(movie.id) || movie))
+        setProcessingCount(response.processing_count)
+      }, () => undefined)
+    },
+  }) || undefined, [])
+
   useEffect(() => {
-    if (processingCount === 0 && !activeIdsKey) return
+    if (statusEventsSupported() || (processingCount === 0 && !activeIdsKey)) return
     const ids = activeIdsKey ? activeIdsKey.split(',').map(Number) : []
     let cancelled = false
     let timer: number
@@ -100,14 +123,24 @@ export function useMovieLibrary() {
     setImporting(mode)
     setNotice(null)
     try {
-      const result = mode === 'files' ? await importMovieFiles() : await importMovieFolder()
+      const result = mode === 'files'
+        ? await importMovieFiles()
+        : await importMovieFolder(({ directories, videos }) => setNotice({
+          tone: 'neutral',
+          text: `폴더 검색 중 · 폴더 ${directories.toLocaleString('ko-KR')}개 · 영상 ${videos.toLocaleString('ko-KR')}개`,
+        }))
       if (result.cancelled) {
         setNotice({ tone: 'neutral', text: '영상 추가를 취소했습니다.' })
         return
       }
       setNotice({
         tone: result.failed_count ? 'warning' : 'success',
-        text: `새 영상 ${result.added_count}개 · 중복 ${result.duplicate_count}개 · 실패 ${result.failed_count}개`,
+        text: [
+          `새 영상 ${result.added_count}개`,
+          ...(result.updated_count ? [`변경 ${result.updated_count}개`] : []),
+          `중복 ${result.duplicate_count}개`,
+          `실패 ${result.failed_count}개`,
+        ].join(' · '),
         detail: result.failures?.[0] || '',
       })
       await loadFirstPage()
@@ -120,6 +153,6 @@ export function useMovieLibrary() {
 
   return {
     movies, nextCursor, total, processingCount, loadingInitial, loadingMore,
-    error, importing, notice, setNotice, loadFirstPage, loadMore, handleImport,
+    error, importing, notice, setNotice, listOptions, setListOptions, loadFirstPage, loadMore, handleImport,
   }
 }
@@ -4,9 +4,10 @@ import { MemoryRouter, useLocation } from 'react-router-dom'
 import { afterEach, beforeEach, describe, expect, it, vi } from 'vitest'
 import App from '../App'
 import type { Movie, MoviePage } from '../api/movies'
-import { getMovies, getMovieStatuses, importMovieFiles, importMovieFolder } from '../api/movies'
+import { DEFAULT_MOVIE_LIST, getMovies, getMovieStatuses, importMovieFiles, importMovieFolder } from '../api/movies'
 
 vi.mock('../api/movies', () => ({
+  DEFAULT_MOVIE_LIST: { sort: 'id', order: 'desc', status: null },
   getMovies: vi.fn(),
   getMovieStatuses: vi.fn(),
   importMovieFiles: vi.fn(),
@@ -83,8 +84,8 @@ describe('Keyframe movie library', () => {
     const user = userEvent.setup()
     mockedGetMovies.mockResolvedValueOnce(emptyPage).mockResolvedValueOnce({ ...emptyPage, items: [movie()], total: 1 })
     mockedImportFiles.mockResolvedValue({
-      cancelled: false, selected_count: 2, added_count: 1, duplicate_count: 1,
-      failed_count: 0, added_ids: [1], failures: [],
+      cancelled: false, selected_count: 2, added_count: 1, duplicate_count: 1, updated_count: 0,
+      failed_count: 0, added_ids: [1], updated_ids: [], failures: [],
     })
     renderApp()
     await screen.findByText('아직 추가된 영상이 없습니다')
@@ -103,7 +104,22 @@ describe('Keyframe movie library', () => {
     await screen.findByRole('heading', { name: '최근 영상' })
     act(() => globalThis.__latestIntersectionObserver?.trigger())
     expect(await screen.findByRole('heading', { name: '이전 영상' })).toBeInTheDocument()
-    expect(mockedGetMovies).toHaveBeenLastCalledWith(2)
+    expect(mockedGetMovies).toHaveBeenLastCalledWith(2, DEFAULT_MOVIE_LIST)
+  })
+
+  it('reloads the first page with the chosen sort and status', async () => {
+    const user = userEvent.setup()
+    mockedGetMovies
+      .mockResolvedValueOnce({ ...emptyPage, items: [movie({ id: 2, title: '최근 영상' })], total: 2 })
+      .mockResolvedValueOnce({ ...emptyPage, items: [movie({ id: 1, title: '긴 영상' })], total: 2 })
+      .mockResolvedValueOnce({ ...emptyPage, items: [movie({ id: 1, title: '긴 영상' })], total: 1 })
+    renderApp()
+    await screen.findByRole('heading', { name: '최근 영상' })
+    await user.selectOptions(screen.getByRole('combobox', { name: '정렬' }), '재생 시간 긴 순')
+    expect(await screen.findByRole('heading', { name: '긴 영상' })).toBeInTheDocument()
+    expect(mockedGetMovies).toHaveBeenLastCalledWith(null, { sort: 'duration', order: 'desc', status: null })
+    await user.selectOptions(screen.getByRole('combobox', { name: '상태' }), '준비됨')
+    await vi.waitFor(() => expect(mockedGetMovies).toHaveBeenLastCalledWith(null, { sort: 'duration', order: 'desc', status: 'ready' }))
   })
 
   it('polls pending cards and replaces them with ready metadata', async () => {
@@ -124,8 +140,8 @@ describe('Keyframe movie library', () => {
   it('can start folder import from the empty state', async () => {
     const user = userEvent.setup()
     mockedImportFolder.mockResolvedValue({
-      cancelled: true, selected_count: 0, added_count: 0, duplicate_count: 0,
-      failed_count: 0, added_ids: [], failures: [],
+      cancelled: true, selected_count: 0, added_count: 0, duplicate_count: 0, updated_count: 0,
+      failed_count: 0, added_ids: [], updated_ids: [], failures: [],
     })
     renderApp()
     await screen.findByText('아직 추가된 영상이 없습니다')
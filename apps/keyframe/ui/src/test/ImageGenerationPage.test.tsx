@@ -4,8 +4,8 @@ import { MemoryRouter, useLocation } from 'react-router-dom'
 import { beforeEach, describe, expect, it, vi } from 'vitest'
 import App from '../App'
 import {
-  generateMovieImages, getImages, getSdxlModels,
-  type ImagePage, type SdxlModelCatalog,
+  generateMovieImages, getImageGenerationJob, getImages, getSdxlModels,
+  type ImageGenerationJob, type ImagePage, type SdxlModelCatalog,
 } from '../api/images'
 import { getMovieDetail, getMovies, prepareMoviePlayback, type MovieDetail } from '../api/movies'
 
@@ -13,6 +13,7 @@ vi.mock('../api/images', () => ({
   getImages: vi.fn(),
   getSdxlModels: vi.fn(),
   generateMovieImages: vi.fn(),
+  getImageGenerationJob: vi.fn(),
 }))
 
 vi.mock('../api/movies', () => ({
@@ -32,6 +33,7 @@ vi.mock('../api/scenes', () => ({
 const mockedGetImages = vi.mocked(getImages)
 const mockedGetModels = vi.mocked(getSdxlModels)
 const mockedGenerate = vi.mocked(generateMovieImages)
+const mockedGetJob = vi.mocked(getImageGenerationJob)
 const mockedGetMovie = vi.mocked(getMovieDetail)
 const mockedPrepare = vi.mocked(prepareMoviePlayback)
 const mockedGetMovies = vi.mocked(getMovies)
@@ -42,7 +44,7 @@ const movie: MovieDetail = {
   width: 1920, height: 1080, fps: 30, metadata_status: 'ready', metadata_error: null,
   thumbnail_url: '/api/movies/7/thumbnail', created_at: '2026-07-15T03:00:00Z',
   updated_at: '2026-07-15T03:00:00Z', video_codec: 'h264', audio_codec: 'aac',
-  playback_status: 'direct', playback_error: null, stream_url: '/api/movies/7/stream', scene_count: 0,
+  playback_status: 'direct', playback_error: null, stream_url: '/api/movies/7/stream', playback_progress: null, scene_count: 0, keyframe_count: null,
 }
 
 const catalog: SdxlModelCatalog = {
@@ -53,6 +55,17 @@ const catalog: SdxlModelCatalog = {
   ],
 }
 
+const queuedJob: ImageGenerationJob = {
+  id: 4, movie_id: 7, timestamp_ms: 12_345, status: 'pending', stage: null,
+  total_images: 1, completed_images: 0, prompt: null, error: null, images: [],
+  created_at: '2026-07-15T03:00:00Z', updated_at: '2026-07-15T03:00:00Z',
+}
+
+const finishedJob: ImageGenerationJob = {
+  ...queuedJob, status: 'ready', completed_images: 1, prompt: 'blue sky, 1girl',
+  images: [{ id: 2, prompt: 'blue sky, 1girl', image_url: '/api/images/2/file' }],
+}
+
 const emptyImages: ImagePage = {
   items: [], total: 0, next_cursor: null, has_more: false,
 }
@@ -77,9 +90,8 @@ describe('Image generation page', () => {
     mockedPrepare.mockResolvedValue(movie)
     mockedGetModels.mockResolvedValue(catalog)
     mockedGetImages.mockResolvedValue(emptyImages)
-    mockedGenerate.mockResolvedValue({
-      items: [{ id: 2, prompt: 'blue sky, 1girl', image_url: '/api/images/2/file' }],
-    })
+    mockedGenerate.mockResolvedValue(queuedJob)
+    mockedGetJob.mockResolvedValue(finishedJob)
     mockedGetMovies.mockResolvedValue({
       items: [movie], total: 1, processing_count: 0, next_cursor: null, has_more: false,
     })
@@ -123,7 +135,8 @@ describe('Image generation page', () => {
       height: 1024,
       format: 'png',
     }))
-    expect(await screen.findByRole('img', { name: 'blue sky, 1girl' })).toBeInTheDocument()
+    expect(await screen.findByRole('img', { name: 'blue sky, 1girl' }, { timeout: 3000 })).toBeInTheDocument()
+    expect(mockedGetJob).toHaveBeenCalledWith(4)
     expect(screen.getByText('1개의 생성 이미지')).toBeInTheDocument()
   })
 
@@ -63,7 +63,9 @@ function movie(overrides: Partial<MovieDetail> = {}): MovieDetail {
     playback_status: 'direct',
     playback_error: null,
     stream_url: '/api/movies/7/stream',
+    playback_progress: null,
     scene_count: 0,
+    keyframe_count: null,
     ...overrides,
   }
 }
@@ -158,12 +160,41 @@ describe('Keyframe movie detail', () => {
     player.currentTime = 12.345
     player.focus()
     await user.keyboard('s')
-    await waitFor(() => expect(mockedCreateScene).toHaveBeenCalledWith(7, 12_345))
+    await waitFor(() => expect(mockedCreateScene).toHaveBeenCalledWith(7, 12_345, false))
     fireEvent.keyDown(window, { key: 's', repeat: true })
     expect(mockedCreateScene).toHaveBeenCalledTimes(1)
     expect(await screen.findByText('분석 대기 중')).toBeInTheDocument()
   })
 
+  it('offers snapping to the nearest keyframe only for indexed movies', async () => {
+    const user = userEvent.setup()
+    mockedGetDetail.mockResolvedValue(movie({ keyframe_count: 120 }))
+    renderDetail()
+    await screen.findByRole('heading', { name: '상세 테스트 영상' })
+    const player = document.querySelector('video') as HTMLVideoElement
+    player.currentTime = 12.345
+    await user.click(screen.getByRole('checkbox', { name: '가까운 키프레임에 맞춤' }))
+    await user.click(screen.getByRole('button', { name: '현재 위치에 Scene 생성' }))
+    await waitFor(() => expect(mockedCreateScene).toHaveBeenCalledWith(7, 12_345, true))
+  })
+
+  it('hides keyframe snapping when the movie has no keyframe index', async () => {
+    renderDetail()
+    await screen.findByRole('heading', { name: '상세 테스트 영상' })
+    expect(screen.queryByRole('checkbox', { name: '가까운 키프레임에 맞춤' })).not.toBeInTheDocument()
+  })
+
+  it('shows the queue position and estimated wait of a pending Scene', async () => {
+    mockedGetScenes.mockResolvedValue({
+      items: [scene({
+        analysis_status: 'pending', prompt: null, snapshot_url: null,
+        queue: { state: 'queued', position: 3, estimated_wait_seconds: 42 },
+      })],
+    })
+    renderDetail()
+    expect(await screen.findByText('분석 대기 중 (3번째 · 약 42초)')).toBeInTheDocument()
+  })
+
   it('seeks to a Scene and starts playback when its card is activated', async () => {
     mockedGetScenes.mockResolvedValue({ items: [scene()] })
     renderDetail()
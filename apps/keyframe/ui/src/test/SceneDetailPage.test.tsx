@@ -83,7 +83,9 @@ function movie(overrides: Partial<MovieDetail> = {}): MovieDetail {
     playback_status: 'direct',
     playback_error: null,
     stream_url: '/api/movies/7/stream',
+    playback_progress: null,
     scene_count: 2,
+    keyframe_count: null,
     ...overrides,
   }
 }
@@ -41,6 +41,22 @@ describe('SceneVideoPlayer', () => {
     expect(screen.getByText('00:20.000')).toBeInTheDocument()
   })
 
+  it('shows preparation progress instead of the playback block', () => {
+    render(
+      <SceneVideoPlayer
+        streamUrl={null}
+        durationMs={600_000}
+        playbackError={null}
+        playbackProgress={0.425}
+        creating={false}
+        onCreateScene={vi.fn()}
+      />,
+    )
+    expect(screen.getByRole('status')).toHaveTextContent('재생용 영상을 준비하는 중입니다')
+    expect(screen.getByRole('status')).toHaveTextContent('42%')
+    expect(screen.queryByRole('alert')).not.toBeInTheDocument()
+  })
+
   it('exposes playAt and optionally scrolls the shared player into view', () => {
     const ref = createRef<SceneVideoPlayerHandle>()
     render(